@@ -1,18 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
+import hmac
+import ipaddress
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.auth import (
     UserRegisterRequest,
     UserLoginRequest,
+    RefreshTokenRequest,
     AuthTokenResponse,
+    BulkProvisionRequest,
 )
-from app.core.db import get_db_session
-from app.domain.auth.repositories import UserRepository
+from app.core.db import async_session_factory, get_db_session
+from app.core.settings import settings
+from app.domain.auth.repositories import RefreshTokenRepository, UserRepository
 from app.infrastructure.db.repositories.user_repository import SqlAlchemyUserRepository
+from app.infrastructure.db.repositories.refresh_token_repository import SqlAlchemyRefreshTokenRepository
 from app.infrastructure.auth.password import PasswordHasher
 from app.infrastructure.auth.jwt import create_access_token
+from app.infrastructure.auth.rate_limiter import TooManyAttemptsError, login_rate_limiter
 from app.application.auth.use_cases.register_user import RegisterUserUseCase
 from app.application.auth.use_cases.authenticate_user import AuthenticateUserUseCase
+from app.application.auth.use_cases.issue_refresh_token import IssueRefreshTokenUseCase
+from app.application.auth.use_cases.refresh_access_token import RefreshAccessTokenUseCase
+from app.application.auth.use_cases.provision_users import ProvisionUserRow, ProvisionUsersUseCase
 
 
 router = APIRouter()
@@ -22,9 +39,20 @@ def get_user_repository(session: AsyncSession = Depends(get_db_session)) -> User
     return SqlAlchemyUserRepository(session)
 
 
+def get_refresh_token_repository(session: AsyncSession = Depends(get_db_session)) -> RefreshTokenRepository:
+    return SqlAlchemyRefreshTokenRepository(session)
+
+
+async def issue_tokens(user_id: str, refresh_repo: RefreshTokenRepository) -> AuthTokenResponse:
+    refresh_token = await IssueRefreshTokenUseCase(refresh_repo).execute(user_id)
+    return AuthTokenResponse(access_token=create_access_token(user_id), refresh_token=refresh_token)
+
+
 @router.post("/register", response_model=AuthTokenResponse, status_code=201)
 async def register_user(
-    payload: UserRegisterRequest, repo: UserRepository = Depends(get_user_repository)
+    payload: UserRegisterRequest,
+    repo: UserRepository = Depends(get_user_repository),
+    refresh_repo: RefreshTokenRepository = Depends(get_refresh_token_repository),
 ) -> AuthTokenResponse:
     hasher = PasswordHasher()
     use_case = RegisterUserUseCase(user_repository=repo, password_hasher=hasher)
@@ -32,22 +60,98 @@ async def register_user(
         user = await use_case.execute(payload.login, payload.email, payload.password)
     except ValueError:
         raise HTTPException(status_code=400, detail="User already exists")
-    token = create_access_token(user.id)
-    return AuthTokenResponse(access_token=token)
+    return await issue_tokens(user.id, refresh_repo)
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(spec: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_networks(settings.trusted_proxies))
+
+
+def get_client_ip(request: Request) -> Optional[str]:
+    """Client address for per-IP throttling; behind a trusted proxy it comes from X-Forwarded-For."""
+    peer = request.client.host if request.client else None
+    if peer is None or not _is_trusted_proxy(peer):
+        return peer
+    # Proxies append to the right; entries to the left of the last trusted hop can be forged by the client
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
 
 
 @router.post("/login", response_model=AuthTokenResponse)
 async def login_user(
-    payload: UserLoginRequest, repo: UserRepository = Depends(get_user_repository)
+    payload: UserLoginRequest,
+    request: Request,
+    repo: UserRepository = Depends(get_user_repository),
+    refresh_repo: RefreshTokenRepository = Depends(get_refresh_token_repository),
 ) -> AuthTokenResponse:
     hasher = PasswordHasher()
-    use_case = AuthenticateUserUseCase(user_repository=repo, password_hasher=hasher)
+    use_case = AuthenticateUserUseCase(
+        user_repository=repo, password_hasher=hasher, rate_limiter=login_rate_limiter
+    )
+    client_ip = get_client_ip(request)
     try:
-        user = await use_case.execute(payload.login, payload.password)
+        user = await use_case.execute(payload.login, payload.password, client_ip=client_ip)
+    except TooManyAttemptsError:
+        raise HTTPException(status_code=429, detail="Too many login attempts")
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(user.id)
-    return AuthTokenResponse(access_token=token)
+    return await issue_tokens(user.id, refresh_repo)
+
+
+@router.post("/refresh", response_model=AuthTokenResponse)
+async def refresh_tokens(
+    payload: RefreshTokenRequest,
+    refresh_repo: RefreshTokenRepository = Depends(get_refresh_token_repository),
+) -> AuthTokenResponse:
+    use_case = RefreshAccessTokenUseCase(refresh_token_repository=refresh_repo)
+    try:
+        user_id, refresh_token = await use_case.execute(payload.refresh_token)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return AuthTokenResponse(access_token=create_access_token(user_id), refresh_token=refresh_token)
+
+
+def get_provisioning_executor(request: Request) -> Optional[ProcessPoolExecutor]:
+    # One hashing pool per process, created in the app lifespan (see app/main.py)
+    return getattr(request.app.state, "provisioning_executor", None)
+
 
+async def stream_provisioning(rows: List[ProvisionUserRow], executor: ProcessPoolExecutor) -> AsyncIterator[str]:
+    # The session is opened here rather than via Depends so that it outlives the handler
+    async with async_session_factory() as session:
+        use_case = ProvisionUsersUseCase(
+            user_repository=SqlAlchemyUserRepository(session),
+            password_hasher=PasswordHasher(),
+            executor=executor,
+            chunk_size=settings.provisioning_chunk_size,
+        )
+        async for progress in use_case.execute(rows):
+            yield json.dumps(asdict(progress), ensure_ascii=False) + "\n"
 
 
+@router.post("/provision")
+async def provision_users(
+    payload: BulkProvisionRequest,
+    x_provisioning_key: str = Header(default=""),
+    executor: Optional[ProcessPoolExecutor] = Depends(get_provisioning_executor),
+) -> StreamingResponse:
+    if not settings.provisioning_api_key or not hmac.compare_digest(
+        x_provisioning_key, settings.provisioning_api_key
+    ):
+        raise HTTPException(status_code=403, detail="Provisioning is not allowed")
+    if executor is None:
+        raise HTTPException(status_code=503, detail="Provisioning is not available")
+    rows = [ProvisionUserRow(login=u.login, email=u.email, password=u.password) for u in payload.users]
+    return StreamingResponse(stream_provisioning(rows, executor), media_type="application/x-ndjson")
@@ -22,6 +22,7 @@ from app.domain.chat.repositories import ChatRepository
 from app.domain.chat.entities import ChatSession
 from app.infrastructure.auth.jwt import decode_access_token
 from app.infrastructure.db.repositories.chat_repository import SqlAlchemyChatRepository
+from app.services.container import ServiceContainer, get_service_container
 from app.services.recommendations.recommendation_service import RecommendationService
 
 
@@ -35,9 +36,10 @@ def get_chat_repository(session: AsyncSession = Depends(get_db_session)) -> Chat
 class WebSocketHandler:
     """Handles WebSocket communication for chat sessions"""
     
-    def __init__(self, websocket: WebSocket, repo: ChatRepository):
+    def __init__(self, websocket: WebSocket, repo: ChatRepository, services: Optional[ServiceContainer] = None):
         self.websocket = websocket
         self.repo = repo
+        self.services = services
         
     async def send_json(self, data: dict) -> bool:
         """Safely send JSON data through WebSocket"""
@@ -217,8 +219,16 @@ class WebSocketHandler:
         try:
             print(f"🔍 Получение карьерной консультации и рекомендаций для сессии {session_id}")
             
-            # Создаем сервис рекомендаций
-            recommendation_service = RecommendationService(self.repo)
+            if self.services is None:
+                raise RuntimeError("сервисы рекомендаций не инициализированы")
+            
+            # Сервис рекомендаций поверх общих клиентов приложения (без создания новых соединений)
+            recommendation_service = RecommendationService(
+                self.repo,
+                embeddings_service=self.services.embeddings_service,
+                qdrant_service=self.services.qdrant_service,
+                career_consultation_service=self.services.career_consultation_service,
+            )
             
             # Получаем полную карьерную консультацию и рекомендации
             result = await recommendation_service.get_career_consultation_and_recommendations(session_id)
@@ -244,6 +254,12 @@ class WebSocketHandler:
             # 2. Затем отправляем рекомендации вакансий
             print("📋 Отправка рекомендаций вакансий...")
             recommendations = result.vacancy_recommendations
+            if not recommendations:
+                await self.send_json({
+                    "event": "recommendations_error",
+                    "message": "😔 Не удалось подобрать вакансии. Попробуйте позже."
+                })
+                return
             message = f"🎯 Нашли {len(recommendations)} подходящих вакансий для вас:"
             
             # Извлекаем hh_id для отображения
@@ -343,6 +359,7 @@ async def chat_websocket(
     websocket: WebSocket,
     token: str,
     repo: ChatRepository = Depends(get_chat_repository),
+    services: Optional[ServiceContainer] = Depends(get_service_container),
 ):
     try:
         # 1. Initialize connection
@@ -352,7 +369,7 @@ async def chat_websocket(
             await websocket.close(code=1008)
             return
         
-        handler = WebSocketHandler(websocket, repo)
+        handler = WebSocketHandler(websocket, repo, services)
         
         # 2. Get or create session
         session = await get_or_create_session(user_uuid, repo)
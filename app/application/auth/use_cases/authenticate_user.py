@@ -1,20 +1,26 @@
 from dataclasses import dataclass
+from typing import Optional
 
 from app.domain.auth.entities import User
 from app.domain.auth.repositories import UserRepository
 from app.infrastructure.auth.password import PasswordHasher
+from app.infrastructure.auth.rate_limiter import LoginRateLimiter
 
 
 @dataclass
 class AuthenticateUserUseCase:
     user_repository: UserRepository
     password_hasher: PasswordHasher
+    rate_limiter: Optional[LoginRateLimiter] = None
 
-    async def execute(self, login: str, password: str) -> User:
+    async def execute(self, login: str, password: str, client_ip: Optional[str] = None) -> User:
+        window = None
+        if self.rate_limiter:
+            # The attempt is counted up front: raises TooManyAttemptsError before any PBKDF2 work
+            window = await self.rate_limiter.reserve(login, client_ip)
         user = await self.user_repository.get_by_login(login)
         if not user or not self.password_hasher.verify(password, user.password_hash):
             raise ValueError("Invalid credentials")
+        if self.rate_limiter:
+            await self.rate_limiter.register_success(login, client_ip, window)
         return user
-
-
-
@@ -0,0 +1,26 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.domain.auth.repositories import RefreshTokenRepository
+from app.infrastructure.auth.refresh_tokens import (
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    generate_refresh_token,
+    hash_refresh_token,
+)
+
+
+@dataclass
+class IssueRefreshTokenUseCase:
+    refresh_token_repository: RefreshTokenRepository
+
+    async def execute(self, user_id: str, family_id: Optional[str] = None) -> str:
+        token = generate_refresh_token()
+        await self.refresh_token_repository.create(
+            user_id=user_id,
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or str(uuid.uuid4()),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        return token
@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Sequence
+
+from app.domain.auth.repositories import UserRepository
+from app.infrastructure.auth.password import PasswordHasher
+
+MAX_LOGIN_LENGTH = 50
+MAX_EMAIL_LENGTH = 255
+
+
+@dataclass
+class ProvisionUserRow:
+    login: str
+    email: str
+    password: str
+
+
+@dataclass
+class ProvisionRowError:
+    row: int
+    login: str
+    reason: str
+
+
+@dataclass
+class ProvisionProgress:
+    processed: int
+    total: int
+    created: int
+    failed: int
+    errors: List[ProvisionRowError] = field(default_factory=list)
+
+
+@dataclass
+class ProvisionUsersUseCase:
+    """Bulk account import: one conflict query and one multi-row insert per chunk"""
+
+    user_repository: UserRepository
+    password_hasher: PasswordHasher
+    executor: Optional[Executor] = None  # process pool for PBKDF2; None = default thread pool
+    chunk_size: int = 500
+
+    async def execute(self, rows: Sequence[ProvisionUserRow]) -> AsyncIterator[ProvisionProgress]:
+        total = len(rows)
+        created_total = failed_total = 0
+        seen_logins: set = set()
+        seen_emails: set = set()
+
+        for start in range(0, total, self.chunk_size):
+            chunk = list(enumerate(rows[start:start + self.chunk_size], start=start))
+            errors: List[ProvisionRowError] = []
+
+            candidates = []
+            for index, row in chunk:
+                reason = self._validate(row)
+                if not reason and row.login in seen_logins:
+                    reason = "duplicate login in import"
+                if not reason and row.email in seen_emails:
+                    reason = "duplicate email in import"
+                if reason:
+                    errors.append(ProvisionRowError(row=index, login=row.login, reason=reason))
+                    continue
+                seen_logins.add(row.login)
+                seen_emails.add(row.email)
+                candidates.append((index, row))
+
+            # Conflicts are resolved before hashing so that rejected rows cost nothing
+            taken_logins, taken_emails = await self.user_repository.find_existing(
+                [row.login for _, row in candidates], [row.email for _, row in candidates]
+            )
+            to_insert = []
+            for index, row in candidates:
+                if row.login in taken_logins or row.email in taken_emails:
+                    errors.append(ProvisionRowError(row=index, login=row.login, reason="user already exists"))
+                else:
+                    to_insert.append((index, row))
+
+            loop = asyncio.get_running_loop()
+            hashes = await asyncio.gather(
+                *(loop.run_in_executor(self.executor, self.password_hasher.hash, row.password) for _, row in to_insert)
+            )
+            created = await self.user_repository.bulk_create(
+                [(row.login, row.email, password_hash) for (_, row), password_hash in zip(to_insert, hashes)]
+            )
+            for index, row in to_insert:
+                if row.login not in created:
+                    # Lost an ON CONFLICT race with a concurrent registration
+                    errors.append(ProvisionRowError(row=index, login=row.login, reason="user already exists"))
+
+            created_total += len(created)
+            failed_total += len(errors)
+            yield ProvisionProgress(
+                processed=start + len(chunk),
+                total=total,
+                created=created_total,
+                failed=failed_total,
+                errors=sorted(errors, key=lambda e: e.row),
+            )
+
+    @staticmethod
+    def _validate(row: ProvisionUserRow) -> Optional[str]:
+        if not row.login or not row.login.strip():
+            return "empty login"
+        if len(row.login) > MAX_LOGIN_LENGTH:
+            return f"login longer than {MAX_LOGIN_LENGTH} characters"
+        if not row.email or "@" not in row.email:
+            return "invalid email"
+        if len(row.email) > MAX_EMAIL_LENGTH:
+            return f"email longer than {MAX_EMAIL_LENGTH} characters"
+        if not row.password:
+            return "empty password"
+        return None
@@ -0,0 +1,38 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Tuple
+
+from app.application.auth.use_cases.issue_refresh_token import IssueRefreshTokenUseCase
+from app.domain.auth.repositories import RefreshTokenRepository
+from app.infrastructure.auth.refresh_tokens import hash_refresh_token
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshAccessTokenUseCase:
+    refresh_token_repository: RefreshTokenRepository
+
+    async def execute(self, refresh_token: str) -> Tuple[str, str]:
+        """Rotate a refresh token; returns (user_id, new refresh token)"""
+        stored = await self.refresh_token_repository.get_by_hash(hash_refresh_token(refresh_token))
+        if not stored:
+            raise ValueError("Invalid refresh token")
+
+        # A revoked token presented again means it leaked: kill the whole family
+        if stored.revoked_at is not None or not await self.refresh_token_repository.revoke(stored.id):
+            logger.warning("Refresh token reuse detected for user %s", stored.user_id)
+            await self.refresh_token_repository.revoke_family(stored.family_id)
+            raise ValueError("Refresh token reuse detected")
+
+        expires_at = stored.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            raise ValueError("Refresh token expired")
+
+        new_token = await IssueRefreshTokenUseCase(self.refresh_token_repository).execute(
+            stored.user_id, family_id=stored.family_id
+        )
+        return stored.user_id, new_token
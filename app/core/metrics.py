@@ -0,0 +1,26 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class MetricsRegistry:
+    """Process-local counters exposed through the /metrics endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+metrics = MetricsRegistry()  # singleton-style, like settings
@@ -0,0 +1,138 @@
+"""
+Защита от деградации внешних сервисов (Yandex Cloud ML, Qdrant):
+- CircuitBreaker - общий на процесс "предохранитель" для апстрима с half-open пробами;
+- Deadline - бюджет времени на обработку одного завершенного интервью.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Апстрим считается недоступным - вызов отклонен без обращения к нему."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open после `failure_threshold` ошибок подряд;
+    open -> half_open через `recovery_timeout` секунд: пропускается одна проба;
+    half_open -> closed при успехе пробы, иначе снова open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Бросает CircuitOpenError, если вызов сейчас делать нельзя."""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return
+        metrics.inc(f"circuit_{self.name}_rejected_total")
+        raise CircuitOpenError(f"Сервис {self.name} временно недоступен")
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                metrics.inc(f"circuit_{self.name}_opened_total")
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет корутину-фабрику под защитой предохранителя."""
+        self.before_call()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Отмена по дедлайну вызывающего - не показатель здоровья апстрима
+            self._probe_in_flight = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Общий на процесс предохранитель апстрима (embeddings, completions, qdrant)."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            recovery_timeout=settings.circuit_breaker_recovery_seconds,
+        )
+    return _breakers[name]
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени исчерпан."""
+
+
+class Deadline:
+    """Абсолютный срок, общий для всех шагов одного запроса."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, awaitable: Awaitable[T], reserve: float = 0.0) -> T:
+        """Ждет awaitable не дольше остатка бюджета (минус `reserve` для следующих шагов)."""
+        timeout = self.remaining() - reserve
+        if timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded()
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            metrics.inc("deadline_exceeded_total")
+            raise DeadlineExceeded() from None
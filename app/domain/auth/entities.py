@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 
 
 @dataclass
@@ -9,4 +11,12 @@ class User:
     password_hash: str
 
 
-
+@dataclass
+class RefreshToken:
+    id: str
+    user_id: str
+    token_hash: str
+    family_id: str
+    created_at: datetime
+    expires_at: datetime
+    revoked_at: Optional[datetime] = None
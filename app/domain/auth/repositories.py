@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 
-from .entities import User
+from .entities import RefreshToken, User
 
 
 class UserRepository(ABC):
@@ -18,5 +19,34 @@ class UserRepository(ABC):
     async def create(self, login: str, email: str, password_hash: str) -> User:
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_existing(self, logins: Iterable[str], emails: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """Return (taken logins, taken emails) with a single set-based query"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_create(self, users: List[Tuple[str, str, str]]) -> Set[str]:
+        """Insert (login, email, password_hash) rows, skipping conflicts; returns created logins"""
+        raise NotImplementedError
+
+
+class RefreshTokenRepository(ABC):
+    @abstractmethod
+    async def create(
+        self, user_id: str, token_hash: str, family_id: str, expires_at: datetime
+    ) -> RefreshToken:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
+        raise NotImplementedError
 
+    @abstractmethod
+    async def revoke(self, token_id: str) -> bool:
+        """Revoke an active token; returns False if it was already revoked"""
+        raise NotImplementedError
 
+    @abstractmethod
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke every token issued from the same login (used on reuse detection)"""
+        raise NotImplementedError
@@ -0,0 +1,171 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyAttemptsError(Exception):
+    pass
+
+
+class RateLimitStore(ABC):
+    """Sliding-window counters: (previous window, current window) per key."""
+
+    @abstractmethod
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        """Atomically counts one attempt and returns the counts including it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def decrement(self, key: str, window: int, window_seconds: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def reset(self, key: str, window: int) -> None:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process store; the least recently touched keys are evicted past max_keys."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    @staticmethod
+    def _shift(bucket: Optional[Tuple[int, int, int]], window: int) -> Tuple[int, int]:
+        if bucket is None:
+            return 0, 0
+        bucket_window, previous, current = bucket
+        if bucket_window == window:
+            return previous, current
+        if bucket_window == window - 1:
+            return current, 0
+        return 0, 0
+
+    def _add(self, key: str, window: int, delta: int) -> Tuple[int, int]:
+        # No await inside: read-modify-write is atomic within the event loop
+        previous, current = self._shift(self._buckets.pop(key, None), window)
+        current = max(current + delta, 0)
+        self._buckets[key] = (window, previous, current)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return previous, current
+
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        return self._add(key, window, 1)
+
+    async def decrement(self, key: str, window: int, window_seconds: int) -> None:
+        if key in self._buckets:
+            self._add(key, window, -1)
+
+    async def reset(self, key: str, window: int) -> None:
+        self._buckets.pop(key, None)
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Shared store so that every worker sees the same counters."""
+
+    def __init__(self, url: str, prefix: str = "login_rl") -> None:
+        from redis import asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(url)
+        self._prefix = prefix
+
+    def _key(self, key: str, window: int) -> str:
+        return f"{self._prefix}:{key}:{window}"
+
+    async def increment(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        redis_key = self._key(key, window)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(redis_key)
+            # Keep the bucket alive while it can still be the "previous" window
+            pipe.expire(redis_key, window_seconds * 2)
+            pipe.get(self._key(key, window - 1))
+            current, _, previous = await pipe.execute()
+        return int(previous or 0), int(current)
+
+    async def decrement(self, key: str, window: int, window_seconds: int) -> None:
+        redis_key = self._key(key, window)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.decr(redis_key)
+            pipe.expire(redis_key, window_seconds * 2)
+            await pipe.execute()
+
+    async def reset(self, key: str, window: int) -> None:
+        await self._redis.delete(self._key(key, window - 1), self._key(key, window))
+
+
+class LoginRateLimiter:
+    """
+    Counts login attempts per login and per client IP. An attempt is reserved (counted)
+    before password hashing, so a concurrent burst cannot pass the check before any
+    failure is recorded; a successful login releases its reservation.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        *,
+        max_attempts_per_login: int,
+        max_attempts_per_ip: int,
+        window_seconds: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store = store
+        self.max_attempts_per_login = max_attempts_per_login
+        self.max_attempts_per_ip = max_attempts_per_ip
+        self.window_seconds = window_seconds
+        self._clock = clock
+
+    def _keys(self, login: str, client_ip: Optional[str]) -> List[Tuple[str, int]]:
+        keys = [(f"login:{login.strip().lower()}", self.max_attempts_per_login)]
+        if client_ip:
+            keys.append((f"ip:{client_ip}", self.max_attempts_per_ip))
+        return keys
+
+    async def reserve(self, login: str, client_ip: Optional[str] = None) -> int:
+        """Counts the attempt and raises TooManyAttemptsError past the limit; returns the window."""
+        now = self._clock()
+        window = int(now // self.window_seconds)
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        for key, limit in self._keys(login, client_ip):
+            previous, current = await self.store.increment(key, window, self.window_seconds)
+            if previous * (1 - elapsed) + current > limit:
+                metrics.inc("login_rate_limited_total")
+                logger.warning("Login throttled for %s", key)
+                raise TooManyAttemptsError(key)
+        return window
+
+    async def register_success(self, login: str, client_ip: Optional[str] = None, window: Optional[int] = None) -> None:
+        if window is None:
+            window = int(self._clock() // self.window_seconds)
+        await self.store.reset(f"login:{login.strip().lower()}", window)
+        if client_ip:
+            # A successful login does not count against the shared per-IP budget
+            await self.store.decrement(f"ip:{client_ip}", window, self.window_seconds)
+
+
+def create_login_rate_limiter() -> LoginRateLimiter:
+    if settings.redis_url:
+        store: RateLimitStore = RedisRateLimitStore(settings.redis_url)
+    else:
+        store = InMemoryRateLimitStore(max_keys=settings.login_rate_limit_max_keys)
+    return LoginRateLimiter(
+        store,
+        max_attempts_per_login=settings.login_rate_limit_per_login,
+        max_attempts_per_ip=settings.login_rate_limit_per_ip,
+        window_seconds=settings.login_rate_limit_window_seconds,
+    )
+
+
+login_rate_limiter = create_login_rate_limiter() if settings.login_rate_limit_enabled else None
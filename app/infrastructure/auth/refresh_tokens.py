@@ -0,0 +1,13 @@
+import hashlib
+import secrets
+
+REFRESH_TOKEN_EXPIRE_DAYS = 30
+
+
+def generate_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Tokens are 256-bit random values, so a fast hash is enough (no PBKDF2 needed)
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.auth.entities import RefreshToken
+from app.domain.auth.repositories import RefreshTokenRepository
+from app.infrastructure.db.models.refresh_token import RefreshTokenModel
+
+
+class SqlAlchemyRefreshTokenRepository(RefreshTokenRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    @staticmethod
+    def _to_entity(model: RefreshTokenModel) -> RefreshToken:
+        return RefreshToken(
+            id=model.id,
+            user_id=model.user_id,
+            token_hash=model.token_hash,
+            family_id=model.family_id,
+            created_at=model.created_at,
+            expires_at=model.expires_at,
+            revoked_at=model.revoked_at,
+        )
+
+    async def create(
+        self, user_id: str, token_hash: str, family_id: str, expires_at: datetime
+    ) -> RefreshToken:
+        model = RefreshTokenModel(
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id,
+            created_at=datetime.now(timezone.utc),
+            expires_at=expires_at,
+        )
+        self._session.add(model)
+        await self._session.commit()
+        await self._session.refresh(model)
+        return self._to_entity(model)
+
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
+        stmt = select(RefreshTokenModel).where(RefreshTokenModel.token_hash == token_hash)
+        result = await self._session.execute(stmt)
+        model = result.scalars().first()
+        if model:
+            return self._to_entity(model)
+        return None
+
+    async def revoke(self, token_id: str) -> bool:
+        # Conditional update so that two concurrent refreshes cannot both win
+        stmt = (
+            update(RefreshTokenModel)
+            .where(RefreshTokenModel.id == token_id, RefreshTokenModel.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        result = await self._session.execute(stmt)
+        await self._session.commit()
+        return result.rowcount == 1
+
+    async def revoke_family(self, family_id: str) -> None:
+        stmt = (
+            update(RefreshTokenModel)
+            .where(RefreshTokenModel.family_id == family_id, RefreshTokenModel.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        await self._session.execute(stmt)
+        await self._session.commit()
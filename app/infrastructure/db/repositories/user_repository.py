@@ -1,12 +1,17 @@
-from typing import Optional
+import uuid
+from typing import Iterable, List, Optional, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.auth.entities import User
 from app.domain.auth.repositories import UserRepository
 from app.infrastructure.db.models.user import UserModel
 
+# asyncpg limits a single statement to 32767 bind parameters
+MAX_BIND_PARAMS = 32767
+
 
 class SqlAlchemyUserRepository(UserRepository):
     def __init__(self, session: AsyncSession) -> None:
@@ -35,5 +40,40 @@ class SqlAlchemyUserRepository(UserRepository):
         await self._session.refresh(model)
         return User(id=model.id, login=model.login, email=model.email, password_hash=model.password_hash)
 
+    async def find_existing(self, logins: Iterable[str], emails: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        logins, emails = list(logins), list(emails)
+        found_logins: Set[str] = set()
+        found_emails: Set[str] = set()
+        step = MAX_BIND_PARAMS // 2
+        for start in range(0, max(len(logins), len(emails)), step):
+            stmt = select(UserModel.login, UserModel.email).where(
+                or_(UserModel.login.in_(logins[start:start + step]), UserModel.email.in_(emails[start:start + step]))
+            )
+            result = await self._session.execute(stmt)
+            for row in result.all():
+                found_logins.add(row.login)
+                found_emails.add(row.email)
+        return found_logins, found_emails
 
-
+    async def bulk_create(self, users: List[Tuple[str, str, str]]) -> Set[str]:
+        if not users:
+            return set()
+        created: Set[str] = set()
+        # 4 parameters per row: split so that a large chunk_size stays under the bind parameter limit
+        step = MAX_BIND_PARAMS // 4
+        for start in range(0, len(users), step):
+            stmt = (
+                insert(UserModel)
+                .values(
+                    [
+                        {"id": str(uuid.uuid4()), "login": login, "email": email, "password_hash": password_hash}
+                        for login, email, password_hash in users[start:start + step]
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(UserModel.login)
+            )
+            result = await self._session.execute(stmt)
+            created.update(result.scalars().all())
+        await self._session.commit()
+        return created
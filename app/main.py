@@ -1,14 +1,42 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from app.api.v1.routes.auth import router as auth_router
 from app.api.v1.routes.chat import router as chat_router
+from app.core.metrics import metrics
 from app.core.settings import settings
+from app.services.container import ServiceContainer
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    # Клиенты рекомендаций создаются один раз на процесс, а не на каждое завершенное интервью
+    application.state.services = None
+    if settings.enable_vacancy_recommendations:
+        try:
+            application.state.services = ServiceContainer.create()
+        except Exception as e:
+            print(f"⚠️ Сервисы рекомендаций не инициализированы: {e}")
+    # Пул хеширования паролей для /auth/provision - один на процесс (воркеры стартуют при первой задаче)
+    application.state.provisioning_executor = (
+        ProcessPoolExecutor(max_workers=settings.provisioning_hash_workers or None)
+        if settings.provisioning_api_key else None
+    )
+    yield
+    if application.state.services is not None:
+        await application.state.services.close()
+    if application.state.provisioning_executor is not None:
+        # shutdown ждет воркеров - не в event loop
+        await asyncio.to_thread(application.state.provisioning_executor.shutdown, cancel_futures=True)
 
 
 def create_app() -> FastAPI:
-    application = FastAPI(title="Chat Service", version="0.1.0")
+    application = FastAPI(title="Chat Service", version="0.1.0", lifespan=lifespan)
 
     # CORS
     cors_origins = ["http://127.0.0.1:3000", "http://localhost:3000", "http://127.0.0.1:3001", "http://localhost:3001", "http://localhost:5173"]
@@ -34,6 +62,11 @@ def create_app() -> FastAPI:
             "recommendations_enabled": settings.enable_vacancy_recommendations
         }
 
+    # Internal counters (rate limiting, caches)
+    @application.get("/metrics")
+    async def get_metrics():
+        return metrics.snapshot()
+
     # Routers
     application.include_router(auth_router, prefix="/api/v1/auth", tags=["auth"])
     application.include_router(chat_router, prefix="/api/v1/chat", tags=["chat"])
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional
 from yandex_cloud_ml_sdk import YCloudML
 from tenacity import retry, wait_exponential_jitter, stop_after_attempt, retry_if_exception_type
 
+from app.core.metrics import metrics
+from app.core.resilience import CircuitBreaker, get_circuit_breaker
 from app.core.settings import settings
 from app.services.vacancies.vacancy_service import VacancyData
 
@@ -16,8 +18,9 @@ logger = logging.getLogger(__name__)
 class CareerConsultationService:
     """Сервис для получения карьерной консультации от Yandex GPT"""
     
-    def __init__(self, model: str = "yandexgpt"):
+    def __init__(self, model: str = "yandexgpt", breaker: Optional[CircuitBreaker] = None):
         self.model = model
+        self.breaker = breaker or get_circuit_breaker("completions")
         api_key = settings.yandex_gpt_api_key
         folder_id = settings.yandex_gpt_folder_id
         if not api_key:
@@ -25,6 +28,8 @@ class CareerConsultationService:
         if not folder_id:
             raise ValueError("Yandex GPT folder_id не найден в настройках")
         self.sdk = YCloudML(folder_id=folder_id, auth=api_key)
+        # Handle модели создается один раз на сервис, а не на каждый запрос
+        self.gpt_model = self.sdk.models.completions(self.model).configure(temperature=0.5)
     
     @retry(
         wait=wait_exponential_jitter(initial=2, max=60),
@@ -34,7 +39,8 @@ class CareerConsultationService:
     async def get_career_consultation(
         self, 
         user_data: Dict,
-        vacancies: List[VacancyData]
+        vacancies: List[VacancyData],
+        timeout: Optional[float] = None
     ) -> str:
         """
         Получает карьерную консультацию на основе данных пользователя и подходящих вакансий
@@ -42,11 +48,15 @@ class CareerConsultationService:
         Args:
             user_data: Собранные данные пользователя из чата
             vacancies: Список подходящих вакансий
+            timeout: Сколько секунд можно ждать модель (остаток бюджета интервью); None - без ограничения
             
         Returns:
             Текст карьерной консультации
         """
         try:
+            if timeout is not None and timeout <= 0:
+                raise TimeoutError("бюджет времени на консультацию исчерпан")
+            
             # Формируем контекст для Yandex GPT
             user_context = self._build_user_context(user_data)
             vacancies_context = self._build_vacancies_context(vacancies)
@@ -63,11 +73,11 @@ class CareerConsultationService:
             
             # Используем синхронный вызов через executor для совместимости с async
             loop = asyncio.get_event_loop()
-            gpt_model = self.sdk.models.completions(self.model).configure(temperature=0.5)
-            result = await loop.run_in_executor(
-                None,
-                functools.partial(gpt_model.run, messages)
-            )
+            # Предохранитель отклоняет вызов сразу, если модель недавно стабильно падала
+            result = await self.breaker.call(lambda: asyncio.wait_for(
+                loop.run_in_executor(None, functools.partial(self.gpt_model.run, messages)),
+                timeout
+            ))
             
             consultation = result.alternatives[0].text.strip()
             
@@ -76,7 +86,8 @@ class CareerConsultationService:
             return consultation
             
         except Exception as e:
-            logger.error(f"❌ Ошибка получения карьерной консультации: {e}")
+            logger.error(f"❌ Ошибка получения карьерной консультации: {e!r}")
+            metrics.inc("career_consultation_fallback_total")
             return self._get_fallback_consultation()
     
     def _build_user_context(self, user_data: Dict) -> str:
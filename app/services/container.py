@@ -0,0 +1,44 @@
+"""
+Контейнер сервисов на время жизни приложения: клиенты Yandex Cloud ML и Qdrant
+создаются один раз при старте (FastAPI lifespan) и закрываются при остановке.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from app.services.chat.career_consultation_service import CareerConsultationService
+from app.services.recommendations.embedding_cache import close_embedding_caches
+from app.services.recommendations.embeddings_service import EmbeddingsService
+from app.services.recommendations.qdrant_service import QdrantService
+from app.services.vacancies.vacancy_service import vacancy_service
+
+
+@dataclass
+class ServiceContainer:
+    """Долгоживущие сервисы рекомендаций."""
+    embeddings_service: EmbeddingsService
+    qdrant_service: QdrantService
+    career_consultation_service: CareerConsultationService
+
+    @classmethod
+    def create(cls) -> "ServiceContainer":
+        embeddings_service = EmbeddingsService()
+        embeddings_service.warm_up()
+        if not vacancy_service.is_loaded():
+            vacancy_service.load_vacancies()
+        return cls(
+            embeddings_service=embeddings_service,
+            qdrant_service=QdrantService(),
+            career_consultation_service=CareerConsultationService(),
+        )
+
+    async def close(self) -> None:
+        await self.qdrant_service.close()
+        # Кэш эмбеддингов общий на процесс (его держат и другие EmbeddingsService) - закрываем здесь
+        close_embedding_caches()
+
+
+def get_service_container(connection: HTTPConnection) -> Optional[ServiceContainer]:
+    """Dependency: контейнер из app.state (None, если рекомендации выключены или не инициализировались)."""
+    return getattr(connection.app.state, "services", None)
@@ -0,0 +1,184 @@
+"""
+Кэш эмбеддингов с адресацией по содержимому: память (LRU) + диск (SQLite).
+Ключ - хэш от (модель, размерность, нормализованный текст), вектор хранится как float32 bytes.
+Из async кода - aget/aput: чтение и запись SQLite идут в потоке, а не в event loop.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+
+def normalize_text(text: str) -> str:
+    """Нормализует текст для ключа кэша: NFKC + схлопывание пробелов."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def make_cache_key(model: str, dimensions: int, text: str) -> str:
+    payload = f"{model}\x00{dimensions}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Двухуровневый кэш эмбеддингов для одной модели."""
+
+    def __init__(
+        self,
+        model: str,
+        dimensions: int,
+        path: Optional[str] = None,
+        max_memory_items: int = 10_000,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Отдельные блокировки: обращение к памяти из event loop не ждет диск
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, dimensions INTEGER NOT NULL,"
+                " vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            # Смена размерности модели делает ее старые векторы бесполезными - удаляем их;
+            # векторы других моделей в том же файле не трогаем (у них свои кэши)
+            deleted = self._db.execute(
+                "DELETE FROM embeddings WHERE model = ? AND dimensions != ?",
+                (model, dimensions),
+            ).rowcount
+            self._db.commit()
+            if deleted:
+                print(f"🧹 Кэш эмбеддингов: удалено {deleted} векторов {model} другой размерности")
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Возвращает копию вектора из кэша или None."""
+        key = make_cache_key(self.model, self.dimensions, text)
+        vector = self._memory_get(key)
+        if vector is None:
+            vector = self._disk_get(key)
+        return self._count(vector)
+
+    async def aget(self, text: str) -> Optional[np.ndarray]:
+        """get для async кода: промах памяти читается с диска в потоке."""
+        key = make_cache_key(self.model, self.dimensions, text)
+        vector = self._memory_get(key)
+        if vector is None and self._db is not None:
+            vector = await asyncio.to_thread(self._disk_get, key)
+        return self._count(vector)
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """Сохраняет вектор в оба уровня кэша."""
+        key = make_cache_key(self.model, self.dimensions, text)
+        vector = np.array(vector, dtype=np.float32, copy=True)
+        with self._lock:
+            self._remember(key, vector)
+        self._disk_put(key, vector)
+
+    async def aput(self, text: str, vector: np.ndarray) -> None:
+        """put для async кода: запись и commit SQLite - в потоке."""
+        key = make_cache_key(self.model, self.dimensions, text)
+        vector = np.array(vector, dtype=np.float32, copy=True)
+        with self._lock:
+            self._remember(key, vector)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, vector)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                metrics.inc("embedding_cache_memory_hits_total")
+            return vector
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        vector = np.frombuffer(row[0], dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+        metrics.inc("embedding_cache_disk_hits_total")
+        return vector
+
+    def _disk_put(self, key: str, vector: np.ndarray) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dimensions, vector, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, self.model, self.dimensions, vector.tobytes(), time.time()),
+                )
+                self._db.commit()
+
+    @staticmethod
+    def _count(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if vector is None:
+            metrics.inc("embedding_cache_misses_total")
+            return None
+        return vector.copy()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        vector.setflags(write=False)
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+
+_shared_caches: Dict[Tuple[str, int], EmbeddingCache] = {}
+
+
+def get_embedding_cache(model: str, dimensions: int) -> Optional[EmbeddingCache]:
+    """Общий на процесс кэш для модели (или None, если кэш выключен)."""
+    if not settings.embedding_cache_enabled:
+        return None
+    key = (model, dimensions)
+    if key not in _shared_caches:
+        _shared_caches[key] = EmbeddingCache(
+            model=model,
+            dimensions=dimensions,
+            path=settings.embedding_cache_path or None,
+            max_memory_items=settings.embedding_cache_memory_items,
+        )
+    return _shared_caches[key]
+
+
+def close_embedding_caches() -> None:
+    """Закрывает общие кэши процесса (при остановке приложения); следующий вызов откроет новые."""
+    while _shared_caches:
+        _, cache = _shared_caches.popitem()
+        cache.close()
@@ -0,0 +1,207 @@
+"""
+Общий клиент Yandex Embeddings API: один handle модели на процесс,
+параллельные запросы с ограничением concurrency и общий rate limit.
+Используется и сервисом рекомендаций, и scripts/generate_embeddings.py.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from tenacity import AsyncRetrying, retry_if_not_exception_type, stop_after_attempt, wait_exponential_jitter
+from yandex_cloud_ml_sdk import YCloudML
+
+from app.core.resilience import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from app.core.settings import settings
+from app.services.recommendations.embedding_providers import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """Token bucket: не более `rate` запросов в секунду (с допустимым всплеском `burst`)."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # Резервируем токен сразу (баланс может уйти в минус) и ждем своей очереди;
+        # между await нет переключений, поэтому блокировка не нужна
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+# GCRA: в ключе хранится время, когда освободится следующий слот (мкс по часам Redis,
+# общим для всех хостов). Слот резервируется сразу, скрипт возвращает, сколько ждать.
+_RESERVE_SLOT_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+tat = tat + interval
+redis.call('SET', KEYS[1], tat, 'PX', math.ceil((tat - now) / 1000) + 1000)
+return tat - now - capacity * interval
+"""
+
+
+class RedisRateLimiter:
+    """
+    Тот же token bucket, но в Redis: бюджет общий для всех воркеров приложения
+    и scripts/generate_embeddings.py. Если Redis недоступен - ограничиваем хотя бы процесс.
+    """
+
+    def __init__(self, url: str, rate: float, burst: Optional[int] = None, key: str = "embeddings_rl"):
+        from redis import asyncio as redis_asyncio
+
+        self.rate = rate
+        self.capacity = int(burst or max(1, int(rate)))
+        self.key = key
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(_RESERVE_SLOT_SCRIPT)
+        self._fallback = AsyncRateLimiter(rate, burst)
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        interval_us = int(1_000_000 / self.rate)
+        try:
+            wait_us = int(await self._script(keys=[self.key], args=[interval_us, self.capacity]))
+        except Exception as e:
+            logger.warning("Redis rate limiter unavailable, using in-process limit: %s", e)
+            await self._fallback.acquire()
+            return
+        if wait_us > 0:
+            await asyncio.sleep(wait_us / 1_000_000)
+
+
+class EmbeddingClient(EmbeddingProvider):
+    """Клиент Yandex Embeddings API с переиспользуемым handle модели."""
+
+    max_tokens = 400
+
+    def __init__(
+        self,
+        sdk: YCloudML,
+        model: str = "text-search-doc",
+        max_concurrency: int = 8,
+        rate_limiter: Optional[Union[AsyncRateLimiter, RedisRateLimiter]] = None,
+        max_attempts: int = 5,
+        max_backoff: float = 30,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.sdk = sdk
+        self.model = model
+        # Handle создается один раз, а не на каждый текст
+        self._model_handle = sdk.models.text_embeddings(model)
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.breaker = breaker
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Клиент может пережить event loop (asyncio.run в скриптах и тестах) - семафор привязан к loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run_once(self, text: str) -> np.ndarray:
+        if self.breaker is not None:
+            return await self.breaker.call(lambda: self._request(text))
+        return await self._request(text)
+
+    async def _request(self, text: str) -> np.ndarray:
+        async with self._get_semaphore():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self._model_handle.run, text)
+        return np.asarray(result.embedding, dtype=np.float32)
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        """Эмбеддинг одного текста с ретраями (без нормализации); при открытом предохранителе - без ретраев."""
+        async for attempt in AsyncRetrying(
+            wait=wait_exponential_jitter(initial=2, max=self.max_backoff),
+            stop=stop_after_attempt(self.max_attempts),
+            retry=retry_if_not_exception_type(CircuitOpenError),
+            reraise=True,
+        ):
+            with attempt:
+                return await self._run_once(text)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Эмбеддинги для списка текстов: запросы идут параллельно,
+        порядок результата совпадает с порядком входа. Векторы L2-нормированы.
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = await asyncio.gather(*(self.embed_one(text) for text in texts))
+        vecs = np.vstack(vectors).astype(np.float32, copy=False)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        return vecs / norms
+
+    async def embed_each(self, texts: List[str]) -> List[Union[np.ndarray, BaseException]]:
+        """
+        У Yandex API нет батч-метода: каждый текст - отдельный запрос, и ошибка одного
+        не должна доставаться остальным. Векторы L2-нормированы, как в embed.
+        """
+        results = await asyncio.gather(*(self.embed_one(text) for text in texts), return_exceptions=True)
+        return [
+            result if isinstance(result, BaseException) else result / (np.linalg.norm(result) + 1e-12)
+            for result in results
+        ]
+
+
+_shared_rate_limiter: Optional[Union[AsyncRateLimiter, RedisRateLimiter]] = None
+_shared_clients: Dict[str, EmbeddingClient] = {}
+
+
+def get_shared_rate_limiter() -> Optional[Union[AsyncRateLimiter, RedisRateLimiter]]:
+    """
+    Общий бюджет запросов к Embeddings API: при заданном REDIS_URL - один на все процессы
+    (как у лимитера логинов), иначе - на процесс.
+    """
+    global _shared_rate_limiter
+    if settings.embedding_requests_per_second <= 0:
+        return None
+    if _shared_rate_limiter is None:
+        if settings.redis_url:
+            _shared_rate_limiter = RedisRateLimiter(settings.redis_url, settings.embedding_requests_per_second)
+        else:
+            _shared_rate_limiter = AsyncRateLimiter(settings.embedding_requests_per_second)
+    return _shared_rate_limiter
+
+
+def get_embedding_client(model: str = "text-search-doc", **kwargs) -> EmbeddingClient:
+    """Возвращает общий клиент для модели, создавая SDK из настроек при первом вызове."""
+    if model not in _shared_clients:
+        api_key = settings.yandex_gpt_api_key
+        folder_id = settings.yandex_gpt_folder_id
+        if not api_key or not folder_id:
+            raise ValueError("Yandex GPT API ключ и folder_id должны быть установлены в настройках")
+        kwargs.setdefault("breaker", get_circuit_breaker("embeddings"))
+        _shared_clients[model] = EmbeddingClient(
+            YCloudML(folder_id=folder_id, auth=api_key),
+            model=model,
+            max_concurrency=settings.embedding_max_concurrency,
+            rate_limiter=get_shared_rate_limiter(),
+            **kwargs,
+        )
+    return _shared_clients[model]
@@ -0,0 +1,150 @@
+"""
+Диспетчер запросов эмбеддингов под пиковой нагрузкой:
+- одинаковые тексты "в полете" схлопываются в один future (single-flight);
+- разные тексты, пришедшие в течение нескольких миллисекунд, уходят одним батчем;
+- результаты раздаются обратно всем ожидающим; ошибка текста достается только его ожидающим;
+- когда у батча не осталось ожидающих (все ушли по дедлайну), он отменяется вместе с ретраями.
+У Yandex провайдера нет батч-метода: батч - это те же N запросов, выигрыш дает схлопывание
+одинаковых текстов, а цена - до embedding_batch_max_delay_ms дополнительной задержки.
+"""
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.services.recommendations.embedding_cache import normalize_text
+
+# Список текстов -> вектор или исключение для каждого текста (матрица тоже подходит)
+BatchFn = Callable[[List[str]], Awaitable[Union[np.ndarray, Sequence[Union[np.ndarray, BaseException]]]]]
+
+
+class EmbeddingDispatcher:
+    """Коалесцирует и микро-батчит вызовы batch_fn (список текстов -> вектор или ошибка на каждый текст)."""
+
+    def __init__(self, batch_fn: BatchFn, max_batch_size: int = 32, max_delay: float = 0.005):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: Dict[str, str] = {}
+        self._waiters: Dict[str, int] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Запущенные батчи и их ключи: батч без ожидающих отменяется
+        self._tasks: Dict[asyncio.Task, List[str]] = {}
+        self._key_tasks: Dict[str, asyncio.Task] = {}
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Возвращает эмбеддинг текста, разделяя запрос с другими вызывающими."""
+        key = normalize_text(text)
+        future = self._inflight.get(key)
+        if future is not None:
+            metrics.inc("embedding_dispatcher_coalesced_total")
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._pending[key] = text
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_delay, self._flush)
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # shield: отмена одного ожидающего не должна отменять общий запрос
+            vector = await asyncio.shield(future)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not future.done():
+                    self._abandon(key, future)
+        return vector.copy()
+
+    def _abandon(self, key: str, future: asyncio.Future) -> None:
+        """Последний ожидающий ушел: текст снимается с очереди, а батч без ожидающих отменяется."""
+        if self._pending.pop(key, None) is not None:
+            self._inflight.pop(key, None)
+            future.cancel()
+            return
+        task = self._key_tasks.get(key)
+        if task is None or any(self._waiters.get(k) for k in self._tasks.get(task, ())):
+            return
+        metrics.inc("embedding_dispatcher_abandoned_total")
+        for k in self._tasks[task]:
+            orphan = self._inflight.get(k)
+            if orphan is not None and self._key_tasks.get(k) is task:
+                # Новые вызовы с тем же текстом начнут свой запрос, а не подхватят отмененный
+                del self._inflight[k]
+                orphan.cancel()
+        task.cancel()
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch = [(key, text, self._inflight[key]) for key, text in self._pending.items()]
+        self._pending = {}
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        keys = [key for key, _, _ in batch]
+        self._tasks[task] = keys
+        for key in keys:
+            self._key_tasks[key] = task
+        task.add_done_callback(self._forget_task)
+
+    def _forget_task(self, task: asyncio.Task) -> None:
+        for key in self._tasks.pop(task, ()):
+            if self._key_tasks.get(key) is task:
+                del self._key_tasks[key]
+
+    def _settle(self, key: str, future: asyncio.Future) -> Optional[asyncio.Future]:
+        # Ключ мог уже занять новый запрос (после отмены батча) - его future не трогаем
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        return None if future.done() else future
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        metrics.inc("embedding_dispatcher_batches_total")
+        metrics.inc("embedding_dispatcher_texts_total", len(batch))
+        error: BaseException = RuntimeError("Батч эмбеддингов завершился без результата")
+        try:
+            vectors = await self._batch_fn([text for _, text, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"batch_fn вернул {len(vectors)} векторов на {len(batch)} текстов")
+            for (key, _, future), vector in zip(batch, vectors):
+                future = self._settle(key, future)
+                if future is None:
+                    continue
+                if isinstance(vector, BaseException):
+                    future.set_exception(vector)
+                else:
+                    future.set_result(vector)
+        except Exception as e:
+            error = e
+        finally:
+            # Ни один future не должен остаться в _inflight навсегда (ошибка, отмена, короткий ответ)
+            for key, _, future in batch:
+                future = self._settle(key, future)
+                if future is not None:
+                    future.set_exception(error)
+
+
+_dispatchers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_embedding_dispatcher(client) -> EmbeddingDispatcher:
+    """Один диспетчер на клиент, чтобы запросы разных сессий попадали в общий батч."""
+    dispatcher = _dispatchers.get(client)
+    if dispatcher is None:
+        dispatcher = EmbeddingDispatcher(
+            client.embed_each,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_delay=settings.embedding_batch_max_delay_ms / 1000,
+        )
+        _dispatchers[client] = dispatcher
+    return dispatcher
@@ -0,0 +1,100 @@
+"""
+Интерфейс провайдера эмбеддингов и локальный CPU-бэкенд.
+Провайдер выбирается настройкой EMBEDDING_PROVIDER (yandex | hashing).
+"""
+import math
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_cache import normalize_text
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingProvider(ABC):
+    """Источник L2-нормированных эмбеддингов."""
+
+    # Идентификатор модели - входит в ключ кэша и метаданные файла эмбеддингов
+    model: str
+    # Лимит токенов на один запрос (длинные тексты режутся на чанки); None - без чанкинга
+    max_tokens: Optional[int] = None
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Эмбеддинги для списка текстов в порядке входа, shape (len(texts), dim)."""
+        raise NotImplementedError
+
+    async def embed_each(self, texts: List[str]) -> List[Union[np.ndarray, BaseException]]:
+        """
+        Как embed, но на месте текста, который не удалось обработать, - его исключение
+        (диспетчер раздает результаты разным вызывающим). По умолчанию - один вызов embed.
+        """
+        try:
+            return list(await self.embed(texts))
+        except Exception as e:
+            return [e] * len(texts)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Офлайн-эмбеддинги без модели: символьные n-граммы и слова хэшируются
+    в вектор фиксированной размерности (feature hashing со знаком), веса - log(1 + tf).
+    Не требует сети и ключей, работает за микросекунды на CPU.
+    """
+
+    max_tokens = None
+
+    def __init__(self, dimensions: int = 256, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.model = f"hashing-char{ngram_range[0]}{ngram_range[1]}-{dimensions}"
+
+    def _features(self, text: str) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+        low, high = self.ngram_range
+        for word in _WORD_RE.findall(normalize_text(text).lower()):
+            features["w:" + word] = features.get("w:" + word, 0.0) + 1.0
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for i in range(len(padded) - n + 1):
+                    gram = padded[i:i + n]
+                    features[gram] = features.get(gram, 0.0) + 1.0
+        return features
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, count in self._features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dimensions] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return np.vstack([self.embed_one(text) for text in texts])
+
+
+_shared_providers: Dict[Tuple[str, str, int], EmbeddingProvider] = {}
+
+
+def get_embedding_provider(model: str = "text-search-doc", dimensions: int = 256, **kwargs) -> EmbeddingProvider:
+    """Общий на процесс провайдер согласно settings.embedding_provider."""
+    kind = settings.embedding_provider.lower()
+    key = (kind, model, dimensions)
+    if key not in _shared_providers:
+        if kind == "hashing":
+            _shared_providers[key] = HashingEmbeddingProvider(dimensions=dimensions)
+        elif kind == "yandex":
+            from app.services.recommendations.embedding_client import get_embedding_client
+
+            _shared_providers[key] = get_embedding_client(model, **kwargs)
+        else:
+            raise ValueError(f"Неизвестный провайдер эмбеддингов: {settings.embedding_provider}")
+    return _shared_providers[key]
@@ -0,0 +1,158 @@
+"""
+Компактное хранение офлайн-эмбеддингов (vacancies_with_embeddings.pickle):
+float32 | float16 | int8 (симметричная квантизация с масштабом на строку),
+а также потоковый формат (шарды .npy + parquet) для загрузки без чтения всего файла в память.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+
+def encode_embeddings(embeddings: np.ndarray, dtype: str = "float32") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Возвращает (массив в dtype, масштабы строк для int8 или None)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if dtype == "float32":
+        return embeddings, None
+    if dtype == "float16":
+        return embeddings.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    raise ValueError(f"Неподдерживаемый тип хранения эмбеддингов: {dtype}")
+
+
+def decode_embeddings(embeddings: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Восстанавливает float32 матрицу из сохраненного представления."""
+    if embeddings.dtype == np.int8:
+        if scales is None:
+            raise ValueError("Для int8 эмбеддингов нужны масштабы строк")
+        return embeddings.astype(np.float32) * scales[:, None]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def load_embeddings(data: Dict[str, Any]) -> np.ndarray:
+    """float32 эмбеддинги из словаря, сохраненного scripts/generate_embeddings.py."""
+    return decode_embeddings(np.asarray(data["embeddings"]), data.get("embedding_scales"))
+
+
+# ==================== ПОТОКОВЫЙ ФОРМАТ ====================
+# Каталог: manifest.json + embeddings-NNNNN.npy (шарды, читаются через mmap) + payloads.parquet
+# (row groups). Загрузчик читает его батчами и не держит в памяти весь корпус, в отличие от pickle.
+
+STREAM_MANIFEST = "manifest.json"
+STREAM_PAYLOADS = "payloads.parquet"
+
+
+def write_embedding_shards(
+    path: str, embeddings: np.ndarray, dtype: str = "float32", shard_rows: int = 50_000
+) -> List[Dict[str, Any]]:
+    """Пишет матрицу шардами .npy (для int8 - с масштабами строк); возвращает описание шардов."""
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+    shards = []
+    for number, start in enumerate(range(0, len(embeddings), shard_rows)):
+        stored, scales = encode_embeddings(embeddings[start:start + shard_rows], dtype)
+        shard = {"file": f"embeddings-{number:05d}.npy", "rows": len(stored)}
+        np.save(root / shard["file"], stored)
+        if scales is not None:
+            shard["scales"] = f"scales-{number:05d}.npy"
+            np.save(root / shard["scales"], scales)
+        shards.append(shard)
+    return shards
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Списки/словари в object колонках -> JSON строки (parse_vacancy_data их разбирает), прочее -> str."""
+    df = df.copy()
+    for name in df.columns[df.dtypes == object]:
+        df[name] = df[name].map(
+            lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict))
+            else v if v is None or isinstance(v, str) or pd.isna(v) else str(v)
+        )
+    return df
+
+
+def write_stream_manifest(path: str, shards: List[Dict[str, Any]], metadata: Dict[str, Any]) -> None:
+    manifest = {
+        **metadata,
+        "count": sum(shard["rows"] for shard in shards),
+        "shards": shards,
+        "payloads": STREAM_PAYLOADS,
+    }
+    (Path(path) / STREAM_MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def write_embedding_stream(
+    path: str,
+    df: pd.DataFrame,
+    embeddings: np.ndarray,
+    metadata: Dict[str, Any],
+    dtype: str = "float32",
+    shard_rows: int = 50_000,
+    row_group_rows: int = 5_000,
+) -> None:
+    """Сохраняет датасет в потоковом формате (нужен pyarrow для parquet)."""
+    if len(df) != len(embeddings):
+        raise ValueError(f"Размерности не совпадают: df={len(df)}, embeddings={len(embeddings)}")
+    shards = write_embedding_shards(path, embeddings, dtype, shard_rows)
+    _parquet_safe(df).to_parquet(Path(path) / STREAM_PAYLOADS, row_group_size=row_group_rows, index=False)
+    write_stream_manifest(path, shards, {**metadata, "dtype": dtype, "dimensions": int(embeddings.shape[1])})
+
+
+class EmbeddingStream:
+    """Чтение потокового датасета: векторы - срезы mmap шардов, payload - батчи parquet."""
+
+    def __init__(self, path: str):
+        self.root = Path(path)
+        self.manifest = json.loads((self.root / STREAM_MANIFEST).read_text(encoding="utf-8"))
+        self._shards = [np.load(self.root / shard["file"], mmap_mode="r") for shard in self.manifest["shards"]]
+        self._scales = [
+            np.load(self.root / shard["scales"], mmap_mode="r") if shard.get("scales") else None
+            for shard in self.manifest["shards"]
+        ]
+        self._offsets = np.cumsum([0] + [len(shard) for shard in self._shards])
+
+    @property
+    def count(self) -> int:
+        return int(self._offsets[-1])
+
+    @property
+    def dimensions(self) -> int:
+        return int(self._shards[0].shape[1]) if self._shards else int(self.manifest.get("dimensions", 0))
+
+    def vectors(self, start: int, stop: int) -> np.ndarray:
+        """float32 векторы строк [start, stop) - читаются с диска только нужные шарды."""
+        stop = min(stop, self.count)
+        parts = []
+        first = int(np.searchsorted(self._offsets, start, side="right")) - 1
+        for number in range(max(first, 0), len(self._shards)):
+            shard_start = self._offsets[number]
+            if shard_start >= stop:
+                break
+            lo, hi = max(start - shard_start, 0), min(stop - shard_start, len(self._shards[number]))
+            scales = self._scales[number]
+            parts.append(decode_embeddings(
+                np.asarray(self._shards[number][lo:hi]), None if scales is None else np.asarray(scales[lo:hi])
+            ))
+        if not parts:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def iter_batches(self, batch_rows: int) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """(payload DataFrame, float32 векторы) батчами по batch_rows строк."""
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for record_batch in pq.ParquetFile(self.root / self.manifest["payloads"]).iter_batches(batch_size=batch_rows):
+            df = record_batch.to_pandas()
+            yield df, self.vectors(offset, offset + len(df))
+            offset += len(df)
+        if offset != self.count:
+            raise ValueError(f"Размерности не совпадают: payloads={offset}, embeddings={self.count}")
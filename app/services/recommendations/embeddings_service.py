@@ -1,32 +1,48 @@
 """
-Сервис для создания эмбеддингов с использованием Yandex Cloud ML SDK.
+Сервис для создания эмбеддингов через выбранный провайдер (Yandex Cloud ML SDK или локальный).
 Адаптирован из scripts/load_vacancies_to_qdrant.py
 """
 import asyncio
-import os
 from typing import List, Optional
 import numpy as np
 import tiktoken
-from yandex_cloud_ml_sdk import YCloudML
-from tenacity import retry, wait_exponential_jitter, stop_after_attempt, retry_if_exception_type
-from app.core.settings import settings
+from app.services.recommendations.embedding_cache import EmbeddingCache, get_embedding_cache
+from app.services.recommendations.embedding_dispatcher import EmbeddingDispatcher, get_embedding_dispatcher
+from app.services.recommendations.embedding_providers import EmbeddingProvider, get_embedding_provider
 
 
 class EmbeddingsService:
     """Сервис для создания эмбеддингов текста."""
     
-    def __init__(self, model: str = "text-search-doc", dimensions: int = 256):
+    def __init__(
+        self,
+        model: str = "text-search-doc",
+        dimensions: int = 256,
+        cache: Optional[EmbeddingCache] = None,
+        client: Optional[EmbeddingProvider] = None,
+        dispatcher: Optional[EmbeddingDispatcher] = None,
+    ):
         self.model = model
         self.dimensions = dimensions
-        # Используем Yandex API ключи из настроек приложения
-        api_key = settings.yandex_gpt_api_key
-        folder_id = settings.yandex_gpt_folder_id
-        
-        if not api_key or not folder_id:
-            raise ValueError("Yandex GPT API ключ и folder_id должны быть установлены в настройках")
-        
-        self.sdk = YCloudML(folder_id=folder_id, auth=api_key)
-        self.enc = tiktoken.get_encoding("cl100k_base")
+        # Общий провайдер процесса (settings.embedding_provider); для Yandex ключи берутся из настроек
+        self.client = client or get_embedding_provider(model, dimensions)
+        # Ключ кэша строится по модели провайдера, чтобы векторы разных бэкендов не смешивались
+        self.cache = cache if cache is not None else get_embedding_cache(self.client.model, dimensions)
+        # Диспетчер общий для клиента: схлопывает одинаковые запросы и батчит одновременные
+        self.dispatcher = dispatcher or get_embedding_dispatcher(self.client)
+        self._enc = None
+    
+    @property
+    def enc(self):
+        """Токенизатор загружается лениво: локальному провайдеру он не нужен (и нет сети для загрузки)."""
+        if self._enc is None:
+            self._enc = tiktoken.get_encoding("cl100k_base")
+        return self._enc
+    
+    def warm_up(self) -> None:
+        """Загружает токенизатор заранее (при старте приложения), если провайдеру нужен чанкинг."""
+        if getattr(self.client, "max_tokens", 400) is not None:
+            self.enc
     
     def count_tokens(self, text: str) -> int:
         """Подсчитывает количество токенов в тексте."""
@@ -45,41 +61,10 @@ class EmbeddingsService:
             chunks.append(self.enc.decode(sub))
         return chunks or [""]
     
-    @retry(
-        wait=wait_exponential_jitter(initial=2, max=30),
-        stop=stop_after_attempt(5),
-        retry=retry_if_exception_type((Exception,))
-    )
     async def _create_embedding_batch(self, texts: List[str]) -> np.ndarray:
-        """Создает эмбеддинги для списка текстов с ретраями через Yandex SDK."""
-        try:
-            embeddings_list = []
-            
-            # Обрабатываем тексты по одному через Yandex SDK
-            for text in texts:
-                # Выполняем синхронный вызов в executor для совместимости с async
-                import functools
-                loop = asyncio.get_event_loop()
-                
-                # Используем SDK для создания эмбеддинга
-                embedding_model = self.sdk.models.text_embeddings(self.model)
-                result = await loop.run_in_executor(
-                    None, 
-                    functools.partial(embedding_model.run, text)
-                )
-                
-                # Извлекаем эмбеддинг из результата
-                embedding = np.array(result.embedding, dtype=np.float32)
-                embeddings_list.append(embedding)
-            
-            vecs = np.array(embeddings_list, dtype=np.float32)
-            # L2-нормирование для косинусного расстояния
-            norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-            return vecs / norms
-            
-        except Exception as e:
-            print(f"❌ Ошибка создания эмбеддинга: {e}")
-            raise
+        """Создает L2-нормированные эмбеддинги для списка текстов через общий диспетчер."""
+        vectors = await asyncio.gather(*(self.dispatcher.embed(text) for text in texts))
+        return np.vstack(vectors)
     
     async def create_embedding(self, text: str) -> Optional[np.ndarray]:
         """
@@ -90,14 +75,27 @@ class EmbeddingsService:
             print("⚠️ Пустой текст для эмбеддинга")
             return None
         
+        if self.cache is not None:
+            cached = await self.cache.aget(text)
+            if cached is not None:
+                return cached
+        
+        embedding = await self._compute_embedding(text)
+        if embedding is not None and self.cache is not None:
+            await self.cache.aput(text, embedding)
+        return embedding
+    
+    async def _compute_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Считает эмбеддинг через API (без кэша)."""
         try:
-            # Для коротких текстов используем напрямую
-            if self.count_tokens(text) <= 400:
+            # Для коротких текстов (или провайдера без лимита токенов) используем напрямую
+            max_tokens = getattr(self.client, "max_tokens", 400)
+            if max_tokens is None or self.count_tokens(text) <= max_tokens:
                 embeddings = await self._create_embedding_batch([text])
                 return embeddings[0]
             
             # Для длинных текстов - чанкинг и mean pooling
-            chunks = self.chunk_by_tokens(text, max_tokens=400, overlap=40)
+            chunks = self.chunk_by_tokens(text, max_tokens=max_tokens, overlap=40)
             if not chunks:
                 return None
             
@@ -115,9 +113,5 @@ class EmbeddingsService:
             return None
     
     async def create_embeddings_batch(self, texts: List[str]) -> List[Optional[np.ndarray]]:
-        """Создает эмбеддинги для списка текстов."""
-        results = []
-        for text in texts:
-            embedding = await self.create_embedding(text)
-            results.append(embedding)
-        return results
+        """Создает эмбеддинги для списка текстов (порядок сохраняется)."""
+        return list(await asyncio.gather(*(self.create_embedding(text) for text in texts)))
@@ -1,48 +1,87 @@
 """
 Сервис для работы с Qdrant векторной базой данных.
+Работает через AsyncQdrantClient: запрос не блокирует event loop и отменяется вместе с вызывающей задачей.
+Сам поиск делегируется VectorSearchBackend (Qdrant или in-process NumPy, см. vector_backends.py).
 """
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import httpx
 import numpy as np
-from dataclasses import dataclass
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from qdrant_client import AsyncQdrantClient
+from app.core.resilience import CircuitBreaker, get_circuit_breaker
 from app.core.settings import settings
-
-
-@dataclass
-class VacancyRecommendation:
-    """Модель рекомендации вакансии."""
-    hh_id: str
-    title: str
-    company: str
-    score: float
-    url: Optional[str] = None
-    category: Optional[str] = None
+from app.services.recommendations.search_cache import SearchResultCache
+from app.services.recommendations.vector_backends import (
+    RESULT_PAYLOAD_FIELDS,
+    NumpySearchBackend,
+    QdrantSearchBackend,
+    VacancyRecommendation,
+    VectorSearchBackend,
+)
 
 
 class QdrantService:
     """Сервис для поиска в Qdrant коллекции."""
     
-    def __init__(self, url: str = None, collection_name: str = None):
+    RESULT_PAYLOAD_FIELDS = RESULT_PAYLOAD_FIELDS
+    
+    def __init__(
+        self,
+        url: str = None,
+        collection_name: str = None,
+        breaker: Optional[CircuitBreaker] = None,
+        client: Optional[AsyncQdrantClient] = None,
+        backend: Optional[VectorSearchBackend] = None,
+        search_cache: Optional[SearchResultCache] = None,
+    ):
         self.url = url or settings.qdrant_url
         self.collection_name = collection_name or settings.qdrant_collection
-        self.client = QdrantClient(url=self.url)
+        # Один клиент на сервис (в приложении - на процесс, см. ServiceContainer): keep-alive пул соединений
+        self.client = client or AsyncQdrantClient(
+            url=self.url,
+            timeout=settings.qdrant_timeout_seconds,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port,
+            limits=httpx.Limits(
+                max_connections=settings.qdrant_max_connections,
+                max_keepalive_connections=settings.qdrant_max_connections,
+            ),
+        )
+        self.breaker = breaker or get_circuit_breaker("qdrant")
+        self.backend = backend or self._create_backend()
+        self.search_cache = search_cache if search_cache is not None else SearchResultCache.from_settings()
+        self._version_checked_at: Optional[float] = None
+    
+    def _create_backend(self) -> VectorSearchBackend:
+        """Бэкенд поиска согласно settings.vector_search_backend."""
+        kind = settings.vector_search_backend.lower()
+        if kind == "qdrant":
+            return QdrantSearchBackend(self.client, self.collection_name, self.breaker)
+        if kind == "numpy":
+            return NumpySearchBackend.load(settings.vector_index_path, nprobe=settings.vector_index_nprobe)
+        raise ValueError(f"Неизвестный бэкенд векторного поиска: {settings.vector_search_backend}")
+    
+    async def close(self) -> None:
+        """Закрывает бэкенд поиска и пул соединений клиента."""
+        await self.backend.close()
+        await self.client.close()
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         """Проверяет подключение к Qdrant."""
         try:
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             print(f"✅ Qdrant подключен. Коллекций: {len(collections.collections)}")
             return True
         except Exception as e:
             print(f"❌ Ошибка подключения к Qdrant: {e}")
             return False
     
-    def check_collection(self) -> bool:
+    async def check_collection(self) -> bool:
         """Проверяет существование коллекции."""
         try:
-            info = self.client.get_collection(self.collection_name)
-            count = self.client.count(self.collection_name).count
+            info = await self.client.get_collection(self.collection_name)
+            count = (await self.client.count(self.collection_name)).count
             print(f"✅ Коллекция {self.collection_name} найдена. Векторов: {count}")
             return True
         except Exception as e:
@@ -82,6 +121,19 @@ class QdrantService:
         "Product Designer": ["Product Designer", "UX/UI дизайнер"]
     }
     
+    _category_filter = staticmethod(QdrantSearchBackend.category_filter)
+    
+    async def _refresh_cache_version(self) -> None:
+        """Сверяет версию коллекции (не чаще search_cache_version_check_seconds) и сбрасывает устаревший кэш."""
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < settings.search_cache_version_check_seconds:
+            return
+        self._version_checked_at = now
+        try:
+            self.search_cache.set_version(await self.backend.current_version())
+        except Exception as e:
+            print(f"⚠️  Не удалось получить версию коллекции: {e}")
+    
     def _get_filter_categories(self, target_specialization: str) -> List[str]:
         """Получает список категорий для фильтрации по специализации."""
         return self.SPECIALIZATION_MAPPING.get(
@@ -93,7 +145,8 @@ class QdrantService:
         self, 
         embedding: np.ndarray, 
         target_specialization: str,
-        limit: int = 5
+        limit: int = 5,
+        with_vectors: bool = False
     ) -> List[VacancyRecommendation]:
         """
         Выполняет гибридный поиск: фильтр по категории + векторный поиск по эмбеддингу.
@@ -102,6 +155,7 @@ class QdrantService:
             embedding: Нормализованный вектор эмбеддинга
             target_specialization: Целевая специализация
             limit: Количество результатов
+            with_vectors: Вернуть векторы вакансий (для реранкинга на стороне приложения)
             
         Returns:
             Список рекомендаций вакансий
@@ -113,46 +167,17 @@ class QdrantService:
             print(f"🔍 Поиск для специализации: {target_specialization}")
             print(f"📋 Фильтр категорий: {filter_categories}")
             
-            # Создаем фильтр по категориям
-            filter_condition = Filter(
-                should=[
-                    FieldCondition(
-                        key="raw_category",
-                        match=MatchValue(value=category)
-                    )
-                    for category in filter_categories
-                ]
-            )
-            
-            # Выполняем поиск
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=("tasks", embedding.tolist()),
-                query_filter=filter_condition,
-                limit=limit,
-                with_payload=True
-            )
+            if self.search_cache is not None:
+                await self._refresh_cache_version()
+                cache_key = self.search_cache.make_key(embedding, filter_categories, limit, with_vectors)
+                cached = self.search_cache.get(cache_key)
+                if cached is not None:
+                    print(f"✅ Найдено {len(cached)} рекомендаций (кэш)")
+                    return cached
             
-            # Преобразуем результаты
-            recommendations = []
-            for result in search_results:
-                payload = result.payload or {}
-                
-                hh_id = payload.get('hh_id', 'unknown')
-                title = payload.get('title', 'Без названия')
-                company = payload.get('company', 'Без компании')
-                url = payload.get('url')
-                category = payload.get('raw_category', 'Без категории')
-                
-                recommendation = VacancyRecommendation(
-                    hh_id=str(hh_id),
-                    title=title,
-                    company=company,
-                    score=result.score,
-                    url=url,
-                    category=category
-                )
-                recommendations.append(recommendation)
+            recommendations = await self.backend.search(embedding, filter_categories, limit, with_vectors)
+            if self.search_cache is not None:
+                self.search_cache.put(cache_key, recommendations)
             
             print(f"✅ Найдено {len(recommendations)} рекомендаций")
             return recommendations
@@ -161,30 +186,51 @@ class QdrantService:
             print(f"❌ Ошибка поиска в Qdrant: {e}")
             return []
     
+    async def search_batch(
+        self,
+        queries: Sequence[Tuple[np.ndarray, str, int]],
+        with_vectors: bool = False,
+        chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[List[VacancyRecommendation]]:
+        """
+        Пакетный поиск для офлайн задач (пересчет сессий, оценка маппинга, бенчмарки).
+        
+        Args:
+            queries: Кортежи (эмбеддинг, целевая специализация, limit)
+            with_vectors: Вернуть векторы вакансий
+            chunk_size: Запросов в одном вызове бэкенда (по умолчанию settings.search_batch_chunk_size)
+            concurrency: Одновременных вызовов (по умолчанию settings.search_batch_concurrency)
+            
+        Returns:
+            Списки рекомендаций в порядке запросов; для неудавшегося пакета - пустые списки
+        """
+        chunk_size = chunk_size or settings.search_batch_chunk_size
+        semaphore = asyncio.Semaphore(concurrency or settings.search_batch_concurrency)
+        resolved = [
+            (embedding, self._get_filter_categories(specialization), limit)
+            for embedding, specialization, limit in queries
+        ]
+        results: List[List[VacancyRecommendation]] = [[] for _ in resolved]
+        
+        async def run_chunk(start: int) -> None:
+            chunk = resolved[start:start + chunk_size]
+            async with semaphore:
+                try:
+                    found = await self.backend.search_batch(chunk, with_vectors)
+                except Exception as e:
+                    print(f"❌ Ошибка пакетного поиска (запросы {start}-{start + len(chunk) - 1}): {e}")
+                    return
+            results[start:start + len(chunk)] = found
+        
+        await asyncio.gather(*(run_chunk(start) for start in range(0, len(resolved), chunk_size)))
+        print(f"✅ Пакетный поиск: {len(resolved)} запросов, {sum(1 for found in results if found)} с результатами")
+        return results
+    
     async def search_test_query(self, query: str, embedding: np.ndarray) -> List[VacancyRecommendation]:
         """Тестовый поиск без фильтров."""
         try:
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=("tasks", embedding.tolist()),
-                limit=3,
-                with_payload=True
-            )
-            
-            recommendations = []
-            for result in search_results:
-                payload = result.payload or {}
-                recommendation = VacancyRecommendation(
-                    hh_id=str(payload.get('hh_id', 'unknown')),
-                    title=payload.get('title', 'Без названия'),
-                    company=payload.get('company', 'Без компании'),
-                    score=result.score,
-                    url=payload.get('url'),
-                    category=payload.get('raw_category', 'Без категории')
-                )
-                recommendations.append(recommendation)
-            
-            return recommendations
+            return await self.backend.search(embedding, None, limit=3)
         except Exception as e:
             print(f"❌ Ошибка тестового поиска: {e}")
             return []
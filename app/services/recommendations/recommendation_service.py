@@ -5,8 +5,11 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 from dataclasses import dataclass
 
+from app.core.resilience import Deadline, DeadlineExceeded
+from app.core.settings import settings
 from app.services.recommendations.embeddings_service import EmbeddingsService
 from app.services.recommendations.qdrant_service import QdrantService, VacancyRecommendation
+from app.services.recommendations.reranker import experience_level, rerank_recommendations
 from app.services.vacancies.vacancy_service import vacancy_service
 from app.services.chat.career_consultation_service import CareerConsultationService
 from app.domain.chat.repositories import ChatRepository
@@ -22,26 +25,38 @@ class CareerRecommendationResult:
 class RecommendationService:
     """Сервис для получения персонализированных рекомендаций вакансий."""
     
-    def __init__(self, chat_repo: ChatRepository):
+    def __init__(
+        self,
+        chat_repo: ChatRepository,
+        embeddings_service: Optional[EmbeddingsService] = None,
+        qdrant_service: Optional[QdrantService] = None,
+        career_consultation_service: Optional[CareerConsultationService] = None,
+    ):
+        # В приложении сервисы приходят из ServiceContainer (создаются один раз при старте);
+        # без них (скрипты) создаются собственные экземпляры
         self.chat_repo = chat_repo
-        self.embeddings_service = EmbeddingsService()
-        self.qdrant_service = QdrantService()
-        self.career_consultation_service = CareerConsultationService()
+        self.embeddings_service = embeddings_service or EmbeddingsService()
+        self.qdrant_service = qdrant_service or QdrantService()
+        self.career_consultation_service = career_consultation_service or CareerConsultationService()
         
         # Инициализируем vacancy_service при первом использовании
         if not vacancy_service.is_loaded():
             vacancy_service.load_vacancies()
     
-    async def get_recommendations_for_session(self, session_id: UUID) -> List[VacancyRecommendation]:
+    async def get_recommendations_for_session(
+        self, session_id: UUID, deadline: Optional[Deadline] = None
+    ) -> List[VacancyRecommendation]:
         """
         Получает рекомендации вакансий для завершенной чат-сессии.
         
         Args:
             session_id: ID чат-сессии
+            deadline: Бюджет времени (по умолчанию settings.recommendation_deadline_seconds)
             
         Returns:
             Список рекомендаций или пустой список при ошибке
         """
+        deadline = deadline or Deadline(settings.recommendation_deadline_seconds)
         try:
             # 1. Получаем данные сессии
             session_data = await self._get_session_data(session_id)
@@ -66,40 +81,61 @@ class RecommendationService:
             print(f"   Предпочтительные активности: {preferred_activities}")
             
             # 3. Создаем эмбеддинг для preferred_activities
-            embedding = await self.embeddings_service.create_embedding(preferred_activities)
+            embedding = await deadline.run(self.embeddings_service.create_embedding(preferred_activities))
             if embedding is None:
                 print("❌ Не удалось создать эмбеддинг для preferred_activities")
                 return []
             
             print(f"✅ Эмбеддинг создан: размерность {embedding.shape}")
             
-            # 4. Выполняем гибридный поиск в Qdrant
-            recommendations = await self.qdrant_service.search_similar_vacancies(
+            # 4. Выполняем гибридный поиск в Qdrant (с реранкингом - top-N кандидатов с векторами)
+            rerank = settings.rerank_enabled
+            recommendations = await deadline.run(self.qdrant_service.search_similar_vacancies(
                 embedding=embedding,
                 target_specialization=target_area,
-                limit=5
-            )
+                limit=max(settings.rerank_candidates, 5) if rerank else 5,
+                with_vectors=rerank
+            ))
+            
+            # 5. Диверсификация: MMR + уровень опыта + штраф за повтор компании
+            if rerank:
+                recommendations = rerank_recommendations(
+                    recommendations,
+                    limit=5,
+                    user_level=experience_level(session_data.get('years_experience'))
+                )
             
             print(f"🎯 Найдено {len(recommendations)} рекомендаций")
             
             return recommendations
             
+        except DeadlineExceeded:
+            print("⏱️ Бюджет времени на рекомендации исчерпан")
+            return []
         except Exception as e:
             print(f"❌ Ошибка получения рекомендаций: {e}")
             import traceback
             traceback.print_exc()
             return []
     
-    async def get_career_consultation_and_recommendations(self, session_id: UUID) -> Optional[CareerRecommendationResult]:
+    async def get_career_consultation_and_recommendations(
+        self, session_id: UUID, deadline: Optional[Deadline] = None
+    ) -> Optional[CareerRecommendationResult]:
         """
         Получает полную карьерную консультацию и рекомендации вакансий.
+        Все шаги делят один бюджет времени: если на консультацию его не осталось
+        (или модель недоступна), возвращаются вакансии с запасной консультацией;
+        если не удались эмбеддинг или поиск - консультация без вакансий.
         
         Args:
             session_id: ID чат-сессии
+            deadline: Бюджет времени (по умолчанию settings.recommendation_deadline_seconds)
             
         Returns:
-            CareerRecommendationResult с консультацией и рекомендациями или None при ошибке
+            CareerRecommendationResult с консультацией и рекомендациями (возможно, пустыми)
+            или None, если нет данных сессии
         """
+        deadline = deadline or Deadline(settings.recommendation_deadline_seconds)
         try:
             # 1. Получаем данные сессии
             session_data = await self._get_session_data(session_id)
@@ -109,24 +145,27 @@ class RecommendationService:
             
             # 2. Получаем рекомендации вакансий
             print("🔍 Получение рекомендаций вакансий...")
-            vacancy_recommendations = await self.get_recommendations_for_session(session_id)
+            vacancy_recommendations = await self.get_recommendations_for_session(session_id, deadline)
             
+            vacancy_details = []
             if not vacancy_recommendations:
-                print("⚠️ Рекомендации вакансий не найдены")
-                return None
-            
-            # 3. Получаем подробные данные вакансий из CSV
-            hh_ids = [rec.hh_id for rec in vacancy_recommendations]
-            print(f"📋 Загрузка деталей для вакансий: {hh_ids}")
-            
-            vacancy_details = vacancy_service.get_vacancies_by_ids(hh_ids)
-            print(f"✅ Загружено {len(vacancy_details)} детальных описаний вакансий")
+                # Эмбеддинг/поиск не удались или бюджет исчерпан - отдаем консультацию без вакансий
+                # (при исчерпанном бюджете консультация сразу будет запасной)
+                print("⚠️ Рекомендации вакансий не найдены, консультация без вакансий")
+            else:
+                # 3. Получаем подробные данные вакансий из CSV
+                hh_ids = [rec.hh_id for rec in vacancy_recommendations]
+                print(f"📋 Загрузка деталей для вакансий: {hh_ids}")
+                
+                vacancy_details = vacancy_service.get_vacancies_by_ids(hh_ids)
+                print(f"✅ Загружено {len(vacancy_details)} детальных описаний вакансий")
             
             # 4. Получаем карьерную консультацию
             print("🤖 Получение карьерной консультации от ChatGPT...")
             career_consultation = await self.career_consultation_service.get_career_consultation(
                 user_data=session_data,
-                vacancies=vacancy_details
+                vacancies=vacancy_details,
+                timeout=deadline.remaining()
             )
             
             print(f"✅ Карьерная консультация получена (длина: {len(career_consultation)} символов)")
@@ -167,10 +206,10 @@ class RecommendationService:
         print("🧪 Тестирование сервисов рекомендаций...")
         
         # Тест Qdrant подключения
-        if not self.qdrant_service.test_connection():
+        if not await self.qdrant_service.test_connection():
             return False
         
-        if not self.qdrant_service.check_collection():
+        if not await self.qdrant_service.check_collection():
             return False
         
         # Тест создания эмбеддинга
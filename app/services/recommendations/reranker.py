@@ -0,0 +1,93 @@
+"""
+Реранкинг кандидатов поиска: MMR-диверсификация + структурные признаки (уровень опыта, компания).
+Поиск возвращает top-N (settings.rerank_candidates) вместе с векторами, здесь из них выбираются
+итоговые limit вакансий. Вся работа - операции NumPy над матрицей кандидатов (N x dim),
+цикл только по выбираемым позициям; см. scripts/benchmark_rerank.py.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.settings import settings
+from app.services.recommendations.vector_backends import VacancyRecommendation
+
+# Значения поля experience вакансий hh.ru -> уровень
+EXPERIENCE_LEVELS = {
+    "Нет опыта": 0,
+    "От 1 года до 3 лет": 1,
+    "От 3 до 6 лет": 2,
+    "Более 6 лет": 3,
+}
+
+
+def experience_level(years) -> Optional[int]:
+    """Уровень кандидата по years_experience из анкеты (None - не указан)."""
+    try:
+        years = float(str(years).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    if years < 1:
+        return 0
+    if years < 3:
+        return 1
+    if years < 6:
+        return 2
+    return 3
+
+
+def rerank_recommendations(
+    candidates: List[VacancyRecommendation],
+    limit: int,
+    user_level: Optional[int] = None,
+    mmr_lambda: Optional[float] = None,
+    level_weight: Optional[float] = None,
+    company_penalty: Optional[float] = None,
+) -> List[VacancyRecommendation]:
+    """
+    Выбирает limit вакансий: релевантность (косинус + совпадение уровня) против похожести
+    на уже выбранные (MMR) и штраф за повтор компании.
+
+    Args:
+        candidates: Кандидаты поиска по убыванию score, с векторами (with_vectors=True)
+        limit: Сколько вакансий вернуть
+        user_level: Уровень кандидата (experience_level), None - без учета уровня
+        mmr_lambda, level_weight, company_penalty: По умолчанию - из settings.rerank_*
+
+    Returns:
+        Выбранные рекомендации в порядке выбора
+    """
+    mmr_lambda = settings.rerank_mmr_lambda if mmr_lambda is None else mmr_lambda
+    level_weight = settings.rerank_level_weight if level_weight is None else level_weight
+    company_penalty = settings.rerank_company_penalty if company_penalty is None else company_penalty
+
+    count = len(candidates)
+    if count <= 1 or any(candidate.vector is None for candidate in candidates):
+        return candidates[:limit]
+
+    vectors = np.stack([candidate.vector for candidate in candidates])
+    relevance = np.fromiter((candidate.score for candidate in candidates), dtype=np.float32, count=count)
+    if user_level is not None:
+        levels = np.fromiter(
+            (EXPERIENCE_LEVELS.get(candidate.experience, -1) for candidate in candidates), dtype=np.int8, count=count
+        )
+        relevance = relevance - level_weight * np.where(levels >= 0, np.abs(levels - user_level), 0)
+    relevance *= mmr_lambda
+
+    codes = {}
+    companies = np.fromiter((codes.setdefault(c.company, len(codes)) for c in candidates), dtype=np.int32, count=count)
+    similarity = vectors @ vectors.T
+    max_similarity = np.zeros(count, dtype=np.float32)
+    company_count = np.zeros(count, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    selected: List[int] = []
+
+    for _ in range(min(limit, count)):
+        scores = relevance - (1 - mmr_lambda) * max_similarity - company_penalty * company_count
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        company_count += companies == companies[best]
+
+    return [candidates[i] for i in selected]
@@ -0,0 +1,110 @@
+"""
+Кэш результатов векторного поиска (TTL + LRU, в памяти процесса).
+Ключ - хэш от (версия коллекции, округленный вектор запроса, категории фильтра, limit, with_vectors):
+одинаковые ответы интервью дают одинаковый эмбеддинг и не ходят в Qdrant повторно.
+Смена версии коллекции (пишет загрузчик, см. scripts/load_to_qdrant.py) сбрасывает кэш.
+"""
+import dataclasses
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.services.recommendations.vector_backends import VacancyRecommendation
+
+
+def _copy_recommendation(rec: VacancyRecommendation) -> VacancyRecommendation:
+    vector = None if rec.vector is None else rec.vector.copy()
+    return dataclasses.replace(rec, vector=vector)
+
+
+class SearchResultCache:
+    """
+    TTL+LRU кэш списков рекомендаций. Рекомендации копируются и при записи, и при чтении:
+    вызывающий (реранкер, обработчик чата) может менять свои объекты, не портя кэш.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_items: int = 2048,
+        decimals: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self.decimals = decimals
+        self.clock = clock
+        self.version = ""
+        self._items: "OrderedDict[str, Tuple[float, Tuple[VacancyRecommendation, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> Optional["SearchResultCache"]:
+        if not settings.search_cache_enabled:
+            return None
+        return cls(
+            ttl_seconds=settings.search_cache_ttl_seconds,
+            max_items=settings.search_cache_max_items,
+            decimals=settings.search_cache_decimals,
+        )
+
+    def make_key(self, embedding: np.ndarray, categories: Optional[Sequence[str]], limit: int,
+                 with_vectors: bool = False) -> str:
+        # Округление убирает шум последних разрядов; + 0.0 превращает -0.0 в 0.0
+        rounded = np.round(np.asarray(embedding, dtype=np.float32), self.decimals) + np.float32(0.0)
+        digest = hashlib.sha256(rounded.tobytes())
+        cats = "\x1f".join(sorted(categories)) if categories is not None else "\x1e"
+        digest.update(f"\x00{self.version}\x00{cats}\x00{limit}\x00{int(with_vectors)}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[VacancyRecommendation]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, results = item
+                if expires_at > self.clock():
+                    self._items.move_to_end(key)
+                    metrics.inc("search_cache_hits_total")
+                    return [_copy_recommendation(rec) for rec in results]
+                del self._items[key]
+                metrics.inc("search_cache_expired_total")
+        metrics.inc("search_cache_misses_total")
+        return None
+
+    def put(self, key: str, results: List[VacancyRecommendation]) -> None:
+        stored = tuple(_copy_recommendation(rec) for rec in results)
+        with self._lock:
+            self._items[key] = (self.clock() + self.ttl_seconds, stored)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                metrics.inc("search_cache_evictions_total")
+
+    def set_version(self, version: str) -> bool:
+        """Запоминает версию коллекции; при смене версии кэш очищается. True - если версия сменилась."""
+        with self._lock:
+            if version == self.version:
+                return False
+            had_version = bool(self.version)
+            self.version = version
+            self._items.clear()
+        if had_version:
+            metrics.inc("search_cache_invalidations_total")
+            print(f"🧹 Кэш поиска сброшен: версия коллекции {version}")
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def hit_rate() -> float:
+        """Доля попаданий по счетчикам процесса (те же значения отдает /metrics)."""
+        hits = metrics.get("search_cache_hits_total")
+        total = hits + metrics.get("search_cache_misses_total")
+        return hits / total if total else 0.0
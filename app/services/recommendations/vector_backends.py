@@ -0,0 +1,316 @@
+"""
+Бэкенды векторного поиска вакансий за QdrantService:
+- QdrantSearchBackend - поиск в коллекции Qdrant (по умолчанию);
+- NumpySearchBackend - точный поиск в памяти процесса по memmap-матрице
+  (корпус - десятки тысяч x 256 float32 - помещается в RAM), с опциональным IVF.
+Выбор - settings.vector_search_backend (qdrant | numpy).
+"""
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import NAMESPACE_URL, uuid5
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    NamedVector,
+    QuantizationSearchParams,
+    SearchParams,
+    SearchRequest,
+)
+
+from app.core.resilience import CircuitBreaker
+from app.core.settings import settings
+
+# Поля payload, которые нужны рекомендациям (остальное - tasks_text, skills... - не запрашиваем)
+RESULT_PAYLOAD_FIELDS = ["hh_id", "title", "company", "url", "raw_category", "experience"]
+# Поле payload с версией загрузки коллекции (пишет scripts/load_to_qdrant.py)
+COLLECTION_VERSION_FIELD = "collection_version"
+# Точка-маркер без вектора: --sync хранит версию только в ней, а не переписывает все точки
+VERSION_MARKER_ID = str(uuid5(NAMESPACE_URL, "collection_version"))
+
+
+# (эмбеддинг, категории фильтра или None, limit)
+SearchQuery = Tuple[np.ndarray, Optional[List[str]], int]
+
+
+@dataclass
+class VacancyRecommendation:
+    """Модель рекомендации вакансии."""
+    hh_id: str
+    title: str
+    company: str
+    score: float
+    url: Optional[str] = None
+    category: Optional[str] = None
+    experience: Optional[str] = None
+    # Вектор вакансии (только при with_vectors=True - для реранкинга)
+    vector: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+def recommendation_from_payload(payload: Dict[str, Any], score: float, vector=None) -> VacancyRecommendation:
+    return VacancyRecommendation(
+        hh_id=str(payload.get('hh_id', 'unknown')),
+        title=payload.get('title', 'Без названия'),
+        company=payload.get('company', 'Без компании'),
+        score=float(score),
+        url=payload.get('url'),
+        category=payload.get('raw_category', 'Без категории'),
+        experience=payload.get('experience'),
+        vector=np.asarray(vector, dtype=np.float32) if vector is not None else None,
+    )
+
+
+class VectorSearchBackend(ABC):
+    """Top-k по косинусной близости с фильтром по категориям (raw_category)."""
+
+    @abstractmethod
+    async def search(
+        self,
+        embedding: np.ndarray,
+        categories: Optional[List[str]],
+        limit: int,
+        with_vectors: bool = False,
+    ) -> List[VacancyRecommendation]:
+        raise NotImplementedError
+
+    async def search_batch(
+        self, queries: Sequence[SearchQuery], with_vectors: bool = False
+    ) -> List[List[VacancyRecommendation]]:
+        """Несколько запросов за один вызов; по умолчанию - последовательно через search."""
+        return [await self.search(embedding, categories, limit, with_vectors) for embedding, categories, limit in queries]
+
+    async def current_version(self) -> str:
+        """Версия данных (для инвалидации кэша поиска); пустая строка - неизвестна."""
+        return ""
+
+    async def close(self) -> None:
+        pass
+
+
+class QdrantSearchBackend(VectorSearchBackend):
+    """Поиск в коллекции Qdrant через общий AsyncQdrantClient под предохранителем."""
+
+    def __init__(self, client: AsyncQdrantClient, collection_name: str, breaker: CircuitBreaker):
+        self.client = client
+        self.collection_name = collection_name
+        self.breaker = breaker
+
+    @staticmethod
+    def category_filter(categories: List[str]) -> Filter:
+        # Одно условие MatchAny по индексированному raw_category (см. PAYLOAD_INDEXES в load_to_qdrant.py)
+        return Filter(must=[FieldCondition(key="raw_category", match=MatchAny(any=categories))])
+
+    @staticmethod
+    def search_params() -> SearchParams:
+        """Параметры поиска; quantization для коллекции без квантизации Qdrant игнорирует."""
+        return SearchParams(
+            hnsw_ef=settings.qdrant_hnsw_ef or None,
+            exact=settings.qdrant_exact_search,
+            quantization=QuantizationSearchParams(
+                rescore=settings.qdrant_quantization_rescore,
+                oversampling=settings.qdrant_quantization_oversampling,
+            )
+        )
+
+    @staticmethod
+    def to_recommendation(result) -> VacancyRecommendation:
+        vector = result.vector.get("tasks") if isinstance(result.vector, dict) else result.vector
+        return recommendation_from_payload(result.payload or {}, result.score, vector)
+
+    async def search(self, embedding, categories, limit, with_vectors=False):
+        # При открытом предохранителе - сразу CircuitOpenError
+        results = await self.breaker.call(lambda: self.client.search(
+            collection_name=self.collection_name,
+            query_vector=("tasks", embedding.tolist()),
+            query_filter=self.category_filter(categories) if categories else None,
+            search_params=self.search_params(),
+            limit=limit,
+            with_payload=RESULT_PAYLOAD_FIELDS,
+            with_vectors=["tasks"] if with_vectors else False,
+        ))
+        return [self.to_recommendation(result) for result in results]
+
+    async def search_batch(self, queries, with_vectors=False):
+        # Один HTTP/gRPC запрос на весь пакет вместо round trip на каждый поиск
+        requests = [
+            SearchRequest(
+                vector=NamedVector(name="tasks", vector=embedding.tolist()),
+                filter=self.category_filter(categories) if categories else None,
+                params=self.search_params(),
+                limit=limit,
+                with_payload=RESULT_PAYLOAD_FIELDS,
+                with_vector=["tasks"] if with_vectors else False,
+            )
+            for embedding, categories, limit in queries
+        ]
+        batches = await self.breaker.call(lambda: self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=requests,
+        ))
+        return [[self.to_recommendation(result) for result in results] for results in batches]
+
+    async def current_version(self) -> str:
+        # После --sync версия в маркере; полная загрузка пишет ее в payload каждой точки - достаточно одной
+        markers = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[VERSION_MARKER_ID],
+            with_payload=[COLLECTION_VERSION_FIELD],
+        )
+        if markers:
+            return str((markers[0].payload or {}).get(COLLECTION_VERSION_FIELD, ""))
+        points, _ = await self.client.scroll(
+            collection_name=self.collection_name,
+            limit=1,
+            with_payload=[COLLECTION_VERSION_FIELD],
+            with_vectors=False,
+        )
+        return str((points[0].payload or {}).get(COLLECTION_VERSION_FIELD, "")) if points else ""
+
+
+Rows = Union[slice, np.ndarray]
+
+
+class NumpySearchBackend(VectorSearchBackend):
+    """
+    Точный поиск в памяти: одно матрично-векторное произведение по строкам нужных категорий
+    и argpartition для top-k. Строки индекса отсортированы по категории (см. write_vector_index),
+    поэтому категория - непрерывный срез memmap-матрицы без копирования.
+    При наличии IVF (nprobe > 0) просматриваются только ближайшие к запросу списки.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        payloads: List[Dict[str, Any]],
+        centroids: Optional[np.ndarray] = None,
+        assignments: Optional[np.ndarray] = None,
+        nprobe: int = 0,
+        version: str = "",
+    ):
+        if len(vectors) != len(payloads):
+            raise ValueError(f"Размерности не совпадают: vectors={len(vectors)}, payloads={len(payloads)}")
+        self.vectors = vectors
+        self.payloads = payloads
+        self.version = version
+        self.nprobe = nprobe if centroids is not None else 0
+        self.centroids = centroids
+        self._row_categories = np.array([p.get("raw_category", "") for p in payloads], dtype=object)
+        self._partitions: Dict[str, Rows] = {}
+        for category in dict.fromkeys(self._row_categories):
+            rows = np.flatnonzero(self._row_categories == category)
+            contiguous = rows[-1] - rows[0] + 1 == len(rows)
+            self._partitions[category] = slice(int(rows[0]), int(rows[-1]) + 1) if contiguous else rows
+        self._ivf_lists: List[np.ndarray] = []
+        if centroids is not None and assignments is not None:
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+            self._ivf_lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(centroids))]
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 0) -> "NumpySearchBackend":
+        """Загружает индекс, записанный write_vector_index; матрица отображается в память (mmap)."""
+        root = Path(path)
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        payloads = json.loads((root / "payloads.json").read_text(encoding="utf-8"))
+        vectors = np.load(root / "vectors.npy", mmap_mode="r")
+        centroids = assignments = None
+        if (root / "ivf_centroids.npy").exists():
+            centroids = np.load(root / "ivf_centroids.npy")
+            assignments = np.load(root / "ivf_assignments.npy")
+        return cls(vectors, payloads, centroids, assignments, nprobe=nprobe, version=meta.get("version", ""))
+
+    def _candidate_parts(self, embedding: np.ndarray, categories: Optional[List[str]]) -> List[Rows]:
+        if categories is None:
+            parts: List[Rows] = [slice(0, len(self.vectors))]
+        else:
+            parts = [self._partitions[c] for c in dict.fromkeys(categories) if c in self._partitions]
+        if not self.nprobe:
+            return parts
+
+        probe = np.argpartition(-(self.centroids @ embedding), min(self.nprobe, len(self.centroids)) - 1)[:self.nprobe]
+        rows = np.sort(np.concatenate([self._ivf_lists[i] for i in probe]))
+        if categories is None:
+            return [rows]
+        mask = np.zeros(len(self.vectors), dtype=bool)
+        for part in parts:
+            mask[part] = True
+        return [rows[mask[rows]]]
+
+    def search_sync(self, embedding, categories, limit, with_vectors=False) -> List[VacancyRecommendation]:
+        query = np.asarray(embedding, dtype=np.float32)
+        parts = self._candidate_parts(query, categories)
+        if not parts:
+            return []
+        scores = np.concatenate([self.vectors[part] @ query for part in parts])
+        rows = np.concatenate([
+            np.arange(part.start, part.stop) if isinstance(part, slice) else part for part in parts
+        ])
+        if not len(scores):
+            return []
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            recommendation_from_payload(
+                self.payloads[rows[i]], scores[i], self.vectors[rows[i]] if with_vectors else None
+            )
+            for i in top
+        ]
+
+    async def search(self, embedding, categories, limit, with_vectors=False):
+        # Матвек по десяткам тысяч строк - единицы миллисекунд, поэтому выполняется прямо в event loop
+        return self.search_sync(embedding, categories, limit, with_vectors)
+
+    async def current_version(self) -> str:
+        return self.version
+
+
+def build_ivf(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Сферический k-means: (центроиды, номер списка для каждой строки)."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for i in range(n_lists):
+            members = vectors[assignments == i]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[i] = centroid / (np.linalg.norm(centroid) + 1e-12)
+    assignments = np.argmax(vectors @ centroids.T, axis=1)
+    return centroids, assignments.astype(np.int32)
+
+
+def write_vector_index(
+    path: str,
+    vectors: np.ndarray,
+    payloads: Sequence[Dict[str, Any]],
+    version: str,
+    ivf_lists: int = 0,
+    model: str = "",
+) -> None:
+    """Сохраняет индекс для NumpySearchBackend: строки нормируются и сортируются по категории."""
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+    order = sorted(range(len(payloads)), key=lambda i: str(payloads[i].get("raw_category", "")))
+    vectors = np.ascontiguousarray(vectors[order])
+    payloads = [{name: payloads[i].get(name) for name in RESULT_PAYLOAD_FIELDS} for i in order]
+
+    np.save(root / "vectors.npy", vectors)
+    (root / "payloads.json").write_text(json.dumps(payloads, ensure_ascii=False), encoding="utf-8")
+    for name in ("ivf_centroids.npy", "ivf_assignments.npy"):
+        (root / name).unlink(missing_ok=True)
+    if ivf_lists:
+        centroids, assignments = build_ivf(vectors, ivf_lists)
+        np.save(root / "ivf_centroids.npy", centroids)
+        np.save(root / "ivf_assignments.npy", assignments)
+    meta = {"version": version, "model": model, "count": len(vectors), "dimensions": int(vectors.shape[1]), "ivf_lists": ivf_lists}
+    (root / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
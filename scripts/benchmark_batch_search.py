@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность поиска: по одному запросу против QdrantService.search_batch.
+Использование: python scripts/benchmark_batch_search.py [--queries 1000] [--chunk-size 64] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.qdrant_service import QdrantService
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетного поиска")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    # Без кэша: иначе повторные запросы мерили бы память процесса, а не Qdrant
+    service = QdrantService()
+    service.search_cache = None
+    if not await service.check_collection():
+        return
+    info = await service.client.get_collection(service.collection_name)
+    dim = info.config.params.vectors["tasks"].size
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(args.queries, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    specializations = list(QdrantService.SPECIALIZATION_MAPPING)
+    queries = [(embeddings[i], specializations[i % len(specializations)], args.limit) for i in range(args.queries)]
+
+    print(f"📊 {args.queries} запросов, limit={args.limit}, коллекция {service.collection_name}:")
+    started = time.perf_counter()
+    sequential = [await service.backend.search(e, service._get_filter_categories(s), l) for e, s, l in queries]
+    elapsed = time.perf_counter() - started
+    print(f"   по одному         {args.queries / elapsed:8.1f} запросов/с")
+
+    started = time.perf_counter()
+    batched = await service.search_batch(queries, chunk_size=args.chunk_size, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+    print(f"   search_batch      {args.queries / elapsed:8.1f} запросов/с "
+          f"(пакет {args.chunk_size}, одновременно {args.concurrency})")
+
+    same = sum([r.hh_id for r in a] == [r.hh_id for r in b] for a, b in zip(sequential, batched))
+    print(f"   совпадение выдачи {same}/{args.queries}")
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
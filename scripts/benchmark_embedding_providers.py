@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Сравнение провайдеров эмбеддингов: латентность на запрос и качество поиска.
+Использование: python scripts/benchmark_embedding_providers.py [--queries 200] [--k 5]
+
+Корпус - tasks_text из vacancies_with_embeddings.pickle, запросы - "название + навыки" вакансии.
+Метрики качества:
+  self@k     - исходная вакансия запроса попала в top-k;
+  category@k - доля top-k из той же категории, что и исходная вакансия;
+  overlap@k  - пересечение top-k локального и удаленного провайдера.
+Удаленный провайдер (Yandex) участвует, только если в настройках заданы ключи;
+векторы документов для него берутся из файла, чтобы не платить за повторную генерацию.
+"""
+import argparse
+import asyncio
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_providers import EmbeddingProvider, HashingEmbeddingProvider
+from app.services.recommendations.embedding_storage import load_embeddings
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+
+
+def build_query(row) -> str:
+    skills = row.get("skills")
+    skills_text = ", ".join(str(s) for s in skills) if isinstance(skills, list) else ""
+    return f"{row.get('title', '')}. {skills_text}".strip()
+
+
+async def time_queries(provider: EmbeddingProvider, queries: List[str]) -> Tuple[np.ndarray, List[float]]:
+    """Эмбеддинги запросов по одному (как в онлайне) с замером латентности каждого."""
+    vectors, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        vectors.append((await provider.embed([query]))[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.vstack(vectors), latencies
+
+
+def evaluate(doc_vecs: np.ndarray, query_vecs: np.ndarray, query_rows: np.ndarray,
+             categories: np.ndarray, k: int) -> Dict[str, object]:
+    scores = query_vecs @ doc_vecs.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    self_hits = np.mean([row in hits for row, hits in zip(query_rows, top)])
+    category_hits = np.mean(categories[top] == categories[query_rows][:, None])
+    return {"self": float(self_hits), "category": float(category_hits), "top": top}
+
+
+def report(name: str, latencies: List[float], metrics: Dict[str, object], k: int) -> None:
+    print(
+        f"   {name:<28} p50={np.percentile(latencies, 50):8.2f} ms  p95={np.percentile(latencies, 95):8.2f} ms  "
+        f"self@{k}={metrics['self']:.3f}  category@{k}={metrics['category']:.3f}"
+    )
+
+
+def get_remote_provider() -> Optional[EmbeddingProvider]:
+    if not settings.yandex_gpt_api_key or not settings.yandex_gpt_folder_id:
+        return None
+    from app.services.recommendations.embedding_client import get_embedding_client
+
+    return get_embedding_client("text-search-doc")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк провайдеров эмбеддингов")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not Path(INPUT_FILE).exists():
+        print(f"❌ Файл {INPUT_FILE} не найден!")
+        return
+
+    with open(INPUT_FILE, "rb") as f:
+        data = pickle.load(f)
+    df = data["dataframe"]
+    texts = df["tasks_text"].fillna("").tolist()
+    categories = df["category"].fillna("").astype(str).to_numpy() if "category" in df else np.array([""] * len(df))
+
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(len(df), size=min(args.queries, len(df)), replace=False)
+    queries = [build_query(df.iloc[i]) for i in query_rows]
+    print(f"📂 Корпус: {len(texts)} вакансий, запросов: {len(queries)}, k={args.k}")
+
+    print("\n📊 Результаты:")
+    local = HashingEmbeddingProvider(dimensions=256)
+    started = time.perf_counter()
+    local_docs = await local.embed(texts)
+    print(f"   ⏱️ Индексация корпуса локально: {time.perf_counter() - started:.1f}s")
+    local_query_vecs, local_latencies = await time_queries(local, queries)
+    local_metrics = evaluate(local_docs, local_query_vecs, query_rows, categories, args.k)
+    report(local.model, local_latencies, local_metrics, args.k)
+
+    remote = get_remote_provider()
+    stored_model = data.get("metadata", {}).get("model")
+    if remote is None:
+        print("   ⚠️  Ключи Yandex не заданы - удаленный провайдер пропущен")
+        return
+    if stored_model != remote.model:
+        print(f"   ⚠️  Векторы в {INPUT_FILE} построены моделью {stored_model} - удаленный провайдер пропущен")
+        return
+
+    remote_docs = load_embeddings(data)
+    remote_docs = remote_docs / (np.linalg.norm(remote_docs, axis=1, keepdims=True) + 1e-12)
+    remote_query_vecs, remote_latencies = await time_queries(remote, queries)
+    remote_metrics = evaluate(remote_docs, remote_query_vecs, query_rows, categories, args.k)
+    report(remote.model, remote_latencies, remote_metrics, args.k)
+
+    overlap = np.mean([
+        len(set(a) & set(b)) / args.k for a, b in zip(local_metrics["top"], remote_metrics["top"])
+    ])
+    print(f"   🔁 overlap@{args.k} (локальный vs удаленный): {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
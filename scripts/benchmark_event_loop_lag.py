@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Задержка event loop при одновременных поисках в Qdrant: синхронный QdrantClient
+внутри async функции (как было) против AsyncQdrantClient (QdrantService).
+Использование: python scripts/benchmark_event_loop_lag.py [--concurrency 50] [--rounds 5]
+
+Пока идут поиски, фоновая задача каждые 10 мс засыпает и меряет, насколько позже
+она проснулась - это та задержка, которую видят остальные WebSocket соединения воркера.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.qdrant_service import QdrantService
+
+TICK = 0.01
+
+
+async def measure_lag(stop: asyncio.Event, lags: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - started - TICK) * 1000)
+
+
+async def run_scenario(name: str, search: Callable[[np.ndarray], Awaitable[object]], queries: np.ndarray,
+                       concurrency: int, rounds: int) -> None:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    started = time.perf_counter()
+    for round_num in range(rounds):
+        batch = queries[round_num * concurrency:(round_num + 1) * concurrency]
+        await asyncio.gather(*(search(query) for query in batch))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags_arr = np.array(lags or [0.0])
+    print(
+        f"   {name:<22} поисков/с={concurrency * rounds / elapsed:8.1f}  "
+        f"lag p50={np.percentile(lags_arr, 50):7.2f} ms  p99={np.percentile(lags_arr, 99):7.2f} ms  "
+        f"max={lags_arr.max():7.2f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк задержки event loop")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных завершений интервью")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--specialization", default="Бэкенд-разработчик")
+    args = parser.parse_args()
+
+    service = QdrantService()
+    if not await service.check_collection():
+        return
+    info = await service.client.get_collection(service.collection_name)
+    dim = info.config.params.vectors["tasks"].size
+
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(args.concurrency * args.rounds, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    # Тот же фильтр по категориям, что строит QdrantService
+    filter_condition = service._category_filter(service._get_filter_categories(args.specialization))
+
+    sync_client = QdrantClient(url=settings.qdrant_url, timeout=settings.qdrant_timeout_seconds)
+
+    async def sync_search(query: np.ndarray):
+        # Прежняя реализация: блокирующий HTTP вызов прямо в корутине
+        return sync_client.search(
+            collection_name=service.collection_name,
+            query_vector=("tasks", query.tolist()),
+            query_filter=filter_condition,
+            limit=5,
+            with_payload=True,
+        )
+
+    async def async_search(query: np.ndarray):
+        return await service.search_similar_vacancies(query, args.specialization, limit=5)
+
+    print(f"📊 {args.concurrency} одновременных поисков x {args.rounds} раундов, коллекция {service.collection_name}:")
+    await run_scenario("QdrantClient (sync)", sync_search, queries, args.concurrency, args.rounds)
+    await run_scenario("AsyncQdrantClient", async_search, queries, args.concurrency, args.rounds)
+
+    sync_client.close()
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Латентность фильтрованного поиска по каждой специализации из SPECIALIZATION_MAPPING.
+Использование: python scripts/benchmark_filtered_search.py [--queries 100] [--limit 5]
+
+Для каждой специализации: число вакансий под фильтром, p50/p99 поиска с MatchAny
+и (для сравнения) с прежним should из MatchValue. Скрипт показывает, есть ли
+payload индекс на raw_category - запуск до и после пересоздания коллекции
+scripts/load_to_qdrant.py показывает эффект индекса.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from qdrant_client.http.models import FieldCondition, Filter, MatchValue
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.qdrant_service import QdrantService
+
+
+async def time_search(service: QdrantService, queries: np.ndarray, query_filter: Filter, limit: int) -> List[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await service.client.search(
+            collection_name=service.collection_name,
+            query_vector=("tasks", query.tolist()),
+            query_filter=query_filter,
+            limit=limit,
+            with_payload=service.RESULT_PAYLOAD_FIELDS,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк фильтрованного поиска по категориям")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    service = QdrantService()
+    info = await service.client.get_collection(service.collection_name)
+    dim = info.config.params.vectors["tasks"].size
+    index = info.payload_schema.get("raw_category")
+    print(f"🗂️  Индекс raw_category: {index.params if index and index.params else (index.data_type if index else 'нет')}")
+
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(args.queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"\n{'специализация':<34}{'вакансий':>9}{'MatchAny p50/p99, ms':>24}{'should p50/p99, ms':>22}")
+    for specialization in service.SPECIALIZATION_MAPPING:
+        categories = service._get_filter_categories(specialization)
+        match_any = service._category_filter(categories)
+        should = Filter(should=[
+            FieldCondition(key="raw_category", match=MatchValue(value=category)) for category in categories
+        ])
+        count = (await service.client.count(service.collection_name, count_filter=match_any, exact=True)).count
+        any_latencies = await time_search(service, queries, match_any, args.limit)
+        should_latencies = await time_search(service, queries, should, args.limit)
+        print(
+            f"{specialization:<34}{count:>9}"
+            f"{np.percentile(any_latencies, 50):>14.2f} / {np.percentile(any_latencies, 99):<7.2f}"
+            f"{np.percentile(should_latencies, 50):>12.2f} / {np.percentile(should_latencies, 99):<7.2f}"
+        )
+
+    await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Подбор параметров HNSW: recall@k и латентность для сетки m / ef_construct / hnsw_ef.
+Использование: python scripts/benchmark_hnsw.py [--m 8,16,32] [--ef-construct 64,128,256] [--ef 16,32,64,128,256]
+               [--queries 300] [--k 5] [--target-recall 0.98]
+
+Для каждой пары (m, ef_construct) строится временная коллекция, по ней выполняются те же запросы
+с разными hnsw_ef, в том числе с фильтром по raw_category (как в рекомендациях). Эталон - точный
+поиск NumPy по тем же векторам. В конце печатается самая быстрая (по p99) конфигурация,
+достигшая --target-recall: m/ef_construct - в QDRANT_HNSW_M/QDRANT_HNSW_EF_CONSTRUCT загрузчика,
+hnsw_ef - в QDRANT_HNSW_EF сервиса.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    Distance, FieldCondition, Filter, HnswConfigDiff, MatchValue,
+    OptimizersConfigDiff, PointStruct, SearchParams, VectorParams,
+)
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_storage import load_embeddings
+from scripts.benchmark_quantization import normalize, recall_at_k, wait_for_green
+from scripts.load_to_qdrant import PAYLOAD_INDEXES
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+BENCH_COLLECTION = "bench_hnsw"
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def exact_ground_truth(docs: np.ndarray, categories: np.ndarray, queries: np.ndarray,
+                       query_categories: List[Optional[str]], k: int) -> np.ndarray:
+    """Точный top-k (номера строк) с тем же фильтром по категории, что и в запросе."""
+    scores = queries @ docs.T
+    for i, category in enumerate(query_categories):
+        if category is not None:
+            scores[i, categories != category] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def build_collection(client: QdrantClient, docs: np.ndarray, categories: np.ndarray, m: int, ef_construct: int) -> float:
+    if client.collection_exists(BENCH_COLLECTION):
+        client.delete_collection(BENCH_COLLECTION)
+    started = time.perf_counter()
+    client.create_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config={"tasks": VectorParams(size=docs.shape[1], distance=Distance.COSINE)},
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct),
+        # Низкий порог, чтобы HNSW строился и на маленьком корпусе
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1),
+    )
+    client.create_payload_index(BENCH_COLLECTION, "raw_category", field_schema=PAYLOAD_INDEXES["raw_category"])
+    for start in range(0, len(docs), 256):
+        client.upsert(
+            collection_name=BENCH_COLLECTION,
+            points=[
+                PointStruct(id=start + i, vector={"tasks": vector.tolist()}, payload={"raw_category": str(category)})
+                for i, (vector, category) in enumerate(zip(docs[start:start + 256], categories[start:start + 256]))
+            ],
+        )
+    wait_for_green(client, BENCH_COLLECTION)
+    return time.perf_counter() - started
+
+
+def run_queries(client: QdrantClient, queries: np.ndarray, query_categories: List[Optional[str]], k: int,
+                params: SearchParams) -> Tuple[List[List[int]], List[float]]:
+    found, latencies = [], []
+    for query, category in zip(queries, query_categories):
+        query_filter = None
+        if category is not None:
+            query_filter = Filter(must=[FieldCondition(key="raw_category", match=MatchValue(value=category))])
+        started = time.perf_counter()
+        hits = client.search(
+            collection_name=BENCH_COLLECTION,
+            query_vector=("tasks", query.tolist()),
+            query_filter=query_filter,
+            search_params=params,
+            limit=k,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append([int(hit.id) for hit in hits])
+    return found, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Подбор параметров HNSW")
+    parser.add_argument("--url", default=settings.qdrant_url)
+    parser.add_argument("--m", default="8,16,32")
+    parser.add_argument("--ef-construct", default="64,128,256")
+    parser.add_argument("--ef", default="16,32,64,128,256", help="значения hnsw_ef при поиске")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--target-recall", type=float, default=0.98)
+    args = parser.parse_args()
+
+    if not Path(INPUT_FILE).exists():
+        print(f"❌ Файл {INPUT_FILE} не найден!")
+        return
+    with open(INPUT_FILE, "rb") as f:
+        data = pickle.load(f)
+    docs = normalize(load_embeddings(data))
+    df = data["dataframe"]
+    categories = df["category"].fillna("").astype(str).to_numpy() if "category" in df else np.full(len(docs), "")
+
+    # Запросы - зашумленные векторы вакансий; половина - с фильтром по категории исходной вакансии
+    rng = np.random.default_rng(42)
+    rows = rng.choice(len(docs), size=min(args.queries, len(docs)), replace=False)
+    queries = normalize(docs[rows] + rng.normal(scale=0.05, size=(len(rows), docs.shape[1])).astype(np.float32))
+    query_categories = [categories[row] if i % 2 and categories[row] else None for i, row in enumerate(rows)]
+    truth = exact_ground_truth(docs, categories, queries, query_categories, args.k)
+    print(f"📂 {INPUT_FILE}: {docs.shape}, запросов: {len(queries)} (с фильтром: "
+          f"{sum(c is not None for c in query_categories)}), k={args.k}")
+
+    client = QdrantClient(url=args.url)
+    results = []  # (m, ef_construct, hnsw_ef, recall, p50, p99)
+    try:
+        for m in parse_ints(args.m):
+            for ef_construct in parse_ints(args.ef_construct):
+                build_time = build_collection(client, docs, categories, m, ef_construct)
+                print(f"\n🕸️  m={m}, ef_construct={ef_construct}: построение {build_time:.1f}s")
+                for hnsw_ef in [None] + parse_ints(args.ef):
+                    params = SearchParams(exact=True) if hnsw_ef is None else SearchParams(hnsw_ef=hnsw_ef)
+                    found, latencies = run_queries(client, queries, query_categories, args.k, params)
+                    recall = recall_at_k(found, truth)
+                    p50, p99 = np.percentile(latencies, 50), np.percentile(latencies, 99)
+                    title = "exact" if hnsw_ef is None else f"hnsw_ef={hnsw_ef}"
+                    print(f"   {title:<14} recall@{args.k}={recall:.4f}  p50={p50:6.2f} ms  p99={p99:6.2f} ms")
+                    if hnsw_ef is not None:
+                        results.append((m, ef_construct, hnsw_ef, recall, p50, p99))
+    finally:
+        if client.collection_exists(BENCH_COLLECTION):
+            client.delete_collection(BENCH_COLLECTION)
+        client.close()
+
+    passing = [r for r in results if r[3] >= args.target_recall]
+    if not passing:
+        print(f"\n⚠️  Ни одна конфигурация не достигла recall@{args.k} >= {args.target_recall}")
+        return
+    m, ef_construct, hnsw_ef, recall, p50, p99 = min(passing, key=lambda r: r[5])
+    print(f"\n🏆 recall@{args.k}={recall:.4f}, p99={p99:.2f} ms:")
+    print(f"   QDRANT_HNSW_M={m} QDRANT_HNSW_EF_CONSTRUCT={ef_construct}  (scripts/load_to_qdrant.py)")
+    print(f"   QDRANT_HNSW_EF={hnsw_ef}  (сервис)")
+
+
+if __name__ == "__main__":
+    main()
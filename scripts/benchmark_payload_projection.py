@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Размер ответа и время разбора поиска: полный payload против проекции полей.
+Использование: python scripts/benchmark_payload_projection.py [--queries 300] [--limit 5]
+
+Запросы идут в REST API коллекции напрямую, чтобы измерить байты ответа,
+а разбор - тем же способом, что и в клиенте (JSON -> модели qdrant_client).
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+from qdrant_client.http.models import ScoredPoint
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.qdrant_service import QdrantService
+
+VARIANTS = [
+    ("with_payload=True", True, False),
+    ("проекция полей", QdrantService.RESULT_PAYLOAD_FIELDS, False),
+    ("проекция + векторы", QdrantService.RESULT_PAYLOAD_FIELDS, ["tasks"]),
+]
+
+
+async def run_variant(client: httpx.AsyncClient, collection: str, queries: np.ndarray, limit: int,
+                      with_payload: Any, with_vector: Any) -> Dict[str, float]:
+    sizes: List[int] = []
+    latencies: List[float] = []
+    parse_times: List[float] = []
+    for query in queries:
+        body = {
+            "vector": {"name": "tasks", "vector": query.tolist()},
+            "limit": limit,
+            "with_payload": with_payload,
+            "with_vector": with_vector,
+        }
+        started = time.perf_counter()
+        response = await client.post(f"/collections/{collection}/points/search", json=body)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(response.content))
+
+        started = time.perf_counter()
+        [ScoredPoint.model_validate(point) for point in response.json()["result"]]
+        parse_times.append((time.perf_counter() - started) * 1000)
+    return {
+        "size": float(np.mean(sizes)),
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "parse": float(np.mean(parse_times)),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк проекции payload")
+    parser.add_argument("--url", default=settings.qdrant_url)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    collection = settings.qdrant_collection
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        info = (await client.get(f"/collections/{collection}")).json()["result"]
+        dim = info["config"]["params"]["vectors"]["tasks"]["size"]
+        rng = np.random.default_rng(0)
+        queries = rng.normal(size=(args.queries, dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        print(f"📊 {args.queries} поисков, limit={args.limit}, коллекция {collection}:")
+        for title, with_payload, with_vector in VARIANTS:
+            stats = await run_variant(client, collection, queries, args.limit, with_payload, with_vector)
+            print(
+                f"   {title:<22} ответ={stats['size'] / 1024:7.1f} KB  "
+                f"p50={stats['p50']:6.2f} ms  p99={stats['p99']:6.2f} ms  разбор={stats['parse']:6.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
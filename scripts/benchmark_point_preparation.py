@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Время подготовки точек для Qdrant: построчно (df.iloc + parse_vacancy_data + tolist) против prepare_points.
+Использование: python scripts/benchmark_point_preparation.py [--rows 20000] [--dim 256]
+
+Данные - EMBEDDINGS_FILE, если он есть, иначе синтетический DataFrame того же формата.
+"""
+import argparse
+import json
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.embedding_storage import load_embeddings
+from scripts.load_to_qdrant import INPUT_FILE, parse_vacancy_data, prepare_points
+
+
+def synthetic_frame(rows: int, dim: int):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "hh_id": [str(100000 + i) for i in range(rows)],
+        "url": [f"https://hh.ru/vacancy/{100000 + i}" for i in range(rows)],
+        "title": [f"Разработчик {i}" for i in range(rows)],
+        "company": [f"Компания {i % 500}" for i in range(rows)],
+        "experience": rng.choice(["Нет опыта", "От 1 года до 3 лет", "От 3 до 6 лет"], size=rows),
+        "tasks": [json.dumps(["писать код", "ревьюить", "проектировать"], ensure_ascii=False)] * rows,
+        "skills": [json.dumps(["Python", "SQL"])] * rows,
+        "category": rng.choice(["Бэкенд-разработчик", "Data Scientist", "QA Engineer"], size=rows),
+        "confidence": rng.uniform(size=rows),
+    })
+    return df, rng.normal(size=(rows, dim)).astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк подготовки точек")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    if Path(INPUT_FILE).exists():
+        with open(INPUT_FILE, "rb") as f:
+            data = pickle.load(f)
+        df, embeddings = data["dataframe"], load_embeddings(data)
+    else:
+        df, embeddings = synthetic_frame(args.rows, args.dim)
+    print(f"📊 {len(df)} строк, векторы {embeddings.shape}:")
+
+    started = time.perf_counter()
+    for idx in range(len(df)):
+        parse_vacancy_data(df.iloc[idx])
+        embeddings[idx].tolist()
+    row_wise = time.perf_counter() - started
+    print(f"   построчно        {row_wise:7.2f}s  {len(df) / row_wise:9.0f} строк/с")
+
+    started = time.perf_counter()
+    rows, _, _ = prepare_points(df, embeddings)
+    for start in range(0, len(rows), 256):
+        embeddings[rows[start:start + 256]].tolist()
+    columnar = time.perf_counter() - started
+    print(f"   prepare_points   {columnar:7.2f}s  {len(df) / columnar:9.0f} строк/с  (x{row_wise / columnar:.1f}, с content_hash)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Сравнение транспортов Qdrant: HTTP/JSON против gRPC.
+Использование: python scripts/benchmark_qdrant_transport.py [--points 20000] [--queries 500]
+
+Для каждого транспорта во временную коллекцию загружаются одни и те же точки
+(пропускная способность upsert, точек/с), затем выполняются поиски (латентность p50/p99).
+Векторы берутся из EMBEDDINGS_FILE, если он есть, иначе генерируются случайно.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_storage import load_embeddings
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+BENCH_COLLECTION = "bench_transport"
+CATEGORIES = ["Бэкенд-разработчик", "Фронтенд-разработчик", "Data Scientist", "DevOps-инженер"]
+
+
+def load_vectors(count: int, dim: int) -> np.ndarray:
+    if Path(INPUT_FILE).exists():
+        with open(INPUT_FILE, "rb") as f:
+            vectors = load_embeddings(pickle.load(f))
+        repeats = int(np.ceil(count / len(vectors)))
+        vectors = np.tile(vectors, (repeats, 1))[:count]
+    else:
+        vectors = np.random.default_rng(0).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_transport(name: str, client: QdrantClient, vectors: np.ndarray, queries: np.ndarray, batch_size: int) -> None:
+    if client.collection_exists(BENCH_COLLECTION):
+        client.delete_collection(BENCH_COLLECTION)
+    client.create_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config={"tasks": VectorParams(size=vectors.shape[1], distance=Distance.COSINE)},
+    )
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(vectors), batch_size):
+            batch = vectors[start:start + batch_size]
+            client.upsert(
+                collection_name=BENCH_COLLECTION,
+                points=[
+                    PointStruct(
+                        id=start + i,
+                        vector={"tasks": vector.tolist()},
+                        payload={"raw_category": CATEGORIES[(start + i) % len(CATEGORIES)]},
+                    )
+                    for i, vector in enumerate(batch)
+                ],
+                wait=True,
+            )
+        upload_rate = len(vectors) / (time.perf_counter() - started)
+
+        latencies: List[float] = []
+        for query in queries:
+            started = time.perf_counter()
+            client.search(
+                collection_name=BENCH_COLLECTION,
+                query_vector=("tasks", query.tolist()),
+                limit=5,
+                with_payload=True,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        print(
+            f"   {name:<5} загрузка={upload_rate:9.0f} точек/с  "
+            f"поиск p50={np.percentile(latencies, 50):6.2f} ms  p99={np.percentile(latencies, 99):6.2f} ms"
+        )
+    finally:
+        client.delete_collection(BENCH_COLLECTION)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк транспортов Qdrant")
+    parser.add_argument("--url", default=settings.qdrant_url)
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.points, args.dim)
+    queries = vectors[np.random.default_rng(1).choice(len(vectors), size=args.queries)]
+    print(f"📊 {len(vectors)} точек размерности {vectors.shape[1]}, {len(queries)} поисков ({args.url}):")
+
+    for name, prefer_grpc in (("HTTP", False), ("gRPC", True)):
+        client = QdrantClient(url=args.url, prefer_grpc=prefer_grpc, grpc_port=settings.qdrant_grpc_port)
+        try:
+            bench_transport(name, client, vectors, queries, args.batch_size)
+        except Exception as e:
+            print(f"   ❌ {name}: {e}")
+        finally:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Отчет recall@k / латентность / память для вариантов хранения векторов вакансий.
+Использование: python scripts/benchmark_quantization.py [--url http://localhost:6333] [--queries 200] [--k 5]
+
+1. Офлайн-файл эмбеддингов: float32 / float16 / int8 - размер и recall@k точного поиска
+   по восстановленным векторам относительно float32.
+2. Qdrant: временные коллекции без квантизации, со scalar int8 и product (x16) квантизацией;
+   для квантованных - поиск с rescoring и без. Эталон - точный поиск (exact=True) по float32.
+   Временные коллекции удаляются после замера.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    CollectionStatus, Distance, OptimizersConfigDiff, PointStruct,
+    QuantizationSearchParams, SearchParams, VectorParams,
+)
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.embedding_storage import STORAGE_DTYPES, decode_embeddings, encode_embeddings, load_embeddings
+from scripts.load_to_qdrant import build_quantization_config
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+BENCH_PREFIX = "bench_quantization"
+
+# (название, тип квантизации, rescore)
+QDRANT_VARIANTS: List[Tuple[str, str, Optional[bool]]] = [
+    ("float32", "none", None),
+    ("scalar int8", "scalar", False),
+    ("scalar int8 + rescore", "scalar", True),
+    ("product x16", "product", False),
+    ("product x16 + rescore", "product", True),
+]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+def exact_top_k(docs: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(found: List[List[int]], truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth.tolist())]))
+
+
+def vector_memory_bytes(count: int, dim: int, quantization: str) -> int:
+    """Оценка памяти под векторы в RAM (без HNSW графа)."""
+    if quantization == "scalar":
+        return count * dim  # 1 байт на компоненту
+    if quantization == "product":
+        return count * dim * 4 // 16
+    return count * dim * 4
+
+
+def report_offline(docs: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> None:
+    print("\n📁 Офлайн-хранение эмбеддингов:")
+    for dtype in STORAGE_DTYPES:
+        stored, scales = encode_embeddings(docs, dtype)
+        restored = normalize(decode_embeddings(stored, scales))
+        size = stored.nbytes + (scales.nbytes if scales is not None else 0)
+        found = exact_top_k(restored, queries, k).tolist()
+        print(f"   {dtype:<8} {size / 1024 / 1024:8.2f} MB  recall@{k}={recall_at_k(found, truth):.4f}")
+
+
+def wait_for_green(client: QdrantClient, collection_name: str, timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    while client.get_collection(collection_name).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Коллекция {collection_name} не проиндексирована за {timeout}s")
+        time.sleep(0.5)
+
+
+def build_collection(client: QdrantClient, name: str, docs: np.ndarray, quantization: str) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config={"tasks": VectorParams(size=docs.shape[1], distance=Distance.COSINE)},
+        # Низкий порог, чтобы HNSW и квантованные векторы строились и на маленьком корпусе
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1),
+        quantization_config=build_quantization_config(quantization),
+    )
+    for start in range(0, len(docs), 256):
+        batch = docs[start:start + 256]
+        client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=start + i, vector={"tasks": vector.tolist()})
+                for i, vector in enumerate(batch)
+            ],
+        )
+    wait_for_green(client, name)
+
+
+def run_queries(
+    client: QdrantClient, name: str, queries: np.ndarray, k: int, params: SearchParams
+) -> Tuple[List[List[int]], List[float]]:
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = client.search(
+            collection_name=name,
+            query_vector=("tasks", query.tolist()),
+            search_params=params,
+            limit=k,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append([int(hit.id) for hit in hits])
+    return found, latencies
+
+
+def report_qdrant(client: QdrantClient, docs: np.ndarray, queries: np.ndarray, k: int, oversampling: float) -> None:
+    print(f"\n🗄️ Qdrant ({len(docs)} векторов, oversampling={oversampling}):")
+    built: Dict[str, str] = {}
+    truth = None
+    try:
+        for title, quantization, rescore in QDRANT_VARIANTS:
+            name = f"{BENCH_PREFIX}_{quantization}"
+            if quantization not in built:
+                started = time.perf_counter()
+                build_collection(client, name, docs, quantization)
+                built[quantization] = name
+                print(f"   🔧 {name}: построена за {time.perf_counter() - started:.1f}s")
+            if truth is None:
+                truth, _ = run_queries(client, name, queries, k, SearchParams(exact=True))
+                truth = np.array(truth)
+
+            params = SearchParams()
+            if rescore is not None:
+                params = SearchParams(
+                    quantization=QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+                )
+            found, latencies = run_queries(client, name, queries, k, params)
+            memory = vector_memory_bytes(len(docs), docs.shape[1], quantization)
+            print(
+                f"   {title:<24} recall@{k}={recall_at_k(found, truth):.4f}  "
+                f"p50={np.percentile(latencies, 50):6.2f} ms  p99={np.percentile(latencies, 99):6.2f} ms  "
+                f"RAM векторов≈{memory / 1024 / 1024:.2f} MB"
+            )
+    finally:
+        for name in built.values():
+            client.delete_collection(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк квантизации векторов")
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--offline-only", action="store_true", help="без замеров в Qdrant")
+    args = parser.parse_args()
+
+    if not Path(INPUT_FILE).exists():
+        print(f"❌ Файл {INPUT_FILE} не найден!")
+        return
+
+    with open(INPUT_FILE, "rb") as f:
+        data = pickle.load(f)
+    docs = normalize(load_embeddings(data))
+
+    # Запросы - слегка зашумленные векторы случайных вакансий (похоже на профиль пользователя рядом с вакансией)
+    rng = np.random.default_rng(42)
+    rows = rng.choice(len(docs), size=min(args.queries, len(docs)), replace=False)
+    queries = normalize(docs[rows] + rng.normal(scale=0.05, size=(len(rows), docs.shape[1])).astype(np.float32))
+    print(f"📂 {INPUT_FILE}: {docs.shape}, запросов: {len(queries)}, k={args.k}")
+
+    report_offline(docs, queries, exact_top_k(docs, queries, args.k), args.k)
+
+    if args.offline_only:
+        return
+    try:
+        client = QdrantClient(url=args.url)
+        client.get_collections()
+    except Exception as e:
+        print(f"\n⚠️  Qdrant недоступен ({e}) - замеры коллекций пропущены")
+        return
+    report_qdrant(client, docs, queries, args.k, args.oversampling)
+
+
+if __name__ == "__main__":
+    main()
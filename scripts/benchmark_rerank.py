@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Время реранкинга (MMR + уровень + компания) на один запрос рекомендаций.
+Использование: python scripts/benchmark_rerank.py [--candidates 50] [--dim 256] [--limit 5] [--iterations 2000]
+
+Кандидаты синтетические: векторы из нескольких близких кластеров (как выдача по одной категории),
+несколько компаний с повторами. Цель - меньше 1 мс на запрос.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.reranker import EXPERIENCE_LEVELS, rerank_recommendations
+from app.services.recommendations.vector_backends import VacancyRecommendation
+
+
+def make_candidates(count: int, dim: int, rng: np.random.Generator):
+    centers = rng.normal(size=(5, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size=count)] + rng.normal(scale=0.3, size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = np.sort(rng.uniform(0.5, 0.9, size=count))[::-1]
+    experiences = list(EXPERIENCE_LEVELS)
+    return [
+        VacancyRecommendation(
+            hh_id=str(i), title=f"Вакансия {i}", company=f"Компания {rng.integers(0, count // 4 + 1)}",
+            score=float(scores[i]), experience=experiences[i % len(experiences)], vector=vectors[i],
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк реранкинга")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    batches = [make_candidates(args.candidates, args.dim, rng) for _ in range(20)]
+    for batch in batches:  # прогрев
+        rerank_recommendations(batch, args.limit, user_level=1)
+
+    timings = []
+    for i in range(args.iterations):
+        batch = batches[i % len(batches)]
+        started = time.perf_counter()
+        rerank_recommendations(batch, args.limit, user_level=1)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    p50, p99 = np.percentile(timings, 50), np.percentile(timings, 99)
+    print(f"📊 Реранкинг {args.candidates} кандидатов (dim={args.dim}) -> {args.limit}, {args.iterations} запусков:")
+    print(f"   p50={p50:.3f} ms  p99={p99:.3f} ms  {'✅' if p99 < 1.0 else '⚠️'} цель < 1 ms")
+
+    picked = rerank_recommendations(batches[0], args.limit, user_level=1)
+    top = batches[0][:args.limit]
+    print(f"   компаний в top-{args.limit}: до реранкинга {len({c.company for c in top})}, "
+          f"после {len({c.company for c in picked})}")
+
+
+if __name__ == "__main__":
+    main()
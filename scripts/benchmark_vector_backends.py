@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Сравнение бэкендов поиска: in-process NumPy (точный и IVF) против Qdrant.
+Использование: python scripts/benchmark_vector_backends.py [--queries 500] [--limit 5] [--nprobe 4,8,16]
+
+Индекс NumPy собирается заранее (scripts/build_vector_index.py), коллекция Qdrant -
+scripts/load_to_qdrant.py. Запросы - векторы самого индекса с шумом, фильтр - SPECIALIZATION_MAPPING.
+Печатаются латентность p50/p99 и совпадение top-k с точным поиском (recall@k).
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.qdrant_service import QdrantService
+from app.services.recommendations.vector_backends import (
+    NumpySearchBackend,
+    QdrantSearchBackend,
+    VectorSearchBackend,
+)
+
+
+async def run_backend(backend: VectorSearchBackend, queries: np.ndarray, categories: Sequence[List[str]],
+                      limit: int) -> Dict[str, object]:
+    latencies: List[float] = []
+    results: List[List[str]] = []
+    for query, cats in zip(queries, categories):
+        started = time.perf_counter()
+        found = await backend.search(query, cats, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([rec.hh_id for rec in found])
+    return {"p50": np.percentile(latencies, 50), "p99": np.percentile(latencies, 99), "results": results}
+
+
+def recall(results: List[List[str]], exact: List[List[str]]) -> float:
+    hits = sum(len(set(r) & set(e)) for r, e in zip(results, exact))
+    total = sum(len(e) for e in exact)
+    return hits / total if total else 1.0
+
+
+def report(name: str, stats: Dict[str, object], exact: Optional[List[List[str]]]) -> None:
+    line = f"   {name:<18} p50={stats['p50']:7.3f} ms  p99={stats['p99']:7.3f} ms"
+    if exact is not None:
+        line += f"  recall@k={recall(stats['results'], exact):.3f}"
+    print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк бэкендов векторного поиска")
+    parser.add_argument("--index", default=settings.vector_index_path)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--nprobe", default="4,8,16", help="значения nprobe для IVF (если индекс с IVF)")
+    parser.add_argument("--skip-qdrant", action="store_true")
+    args = parser.parse_args()
+
+    exact_backend = NumpySearchBackend.load(args.index)
+    vectors = exact_backend.vectors
+    rng = np.random.default_rng(0)
+    picked = rng.choice(len(vectors), size=args.queries)
+    queries = np.asarray(vectors[picked], dtype=np.float32) + rng.normal(scale=0.05, size=(args.queries, vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    specializations = list(QdrantService.SPECIALIZATION_MAPPING)
+    categories = [QdrantService.SPECIALIZATION_MAPPING[specializations[i % len(specializations)]] for i in range(args.queries)]
+
+    print(f"📊 {len(vectors)} векторов размерности {vectors.shape[1]}, {args.queries} запросов, limit={args.limit}:")
+    exact = await run_backend(exact_backend, queries, categories, args.limit)
+    report("NumPy (точный)", exact, None)
+
+    if exact_backend.centroids is not None:
+        for nprobe in (int(v) for v in args.nprobe.split(",") if v):
+            backend = NumpySearchBackend.load(args.index, nprobe=nprobe)
+            report(f"NumPy IVF n={nprobe}", await run_backend(backend, queries, categories, args.limit), exact["results"])
+
+    if not args.skip_qdrant:
+        # Клиент и предохранитель - из QdrantService, поиск - напрямую через QdrantSearchBackend
+        service = QdrantService(backend=exact_backend)
+        qdrant = QdrantSearchBackend(service.client, service.collection_name, service.breaker)
+        try:
+            if await service.check_collection():
+                report("Qdrant", await run_backend(qdrant, queries, categories, args.limit), exact["results"])
+        finally:
+            await service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Сборка индекса для in-process поиска (VECTOR_SEARCH_BACKEND=numpy).
+Использование: python scripts/build_vector_index.py [--output vector_index] [--ivf-lists 0]
+
+Берет те же эмбеддинги и payload, что и scripts/load_to_qdrant.py, и сохраняет
+vectors.npy (нормированные float32, строки отсортированы по категории), payloads.json и meta.json.
+При --ivf-lists > 0 дополнительно строится IVF (k-means) для поиска с VECTOR_INDEX_NPROBE.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_storage import load_embeddings
+from app.services.recommendations.vector_backends import write_vector_index
+from scripts.load_to_qdrant import prepare_payloads
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сборка индекса NumpySearchBackend")
+    parser.add_argument("--output", default=settings.vector_index_path)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="число IVF списков (0 - без IVF)")
+    args = parser.parse_args()
+
+    if not Path(INPUT_FILE).exists():
+        print(f"❌ Файл {INPUT_FILE} не найден!")
+        print("💡 Сначала запустите: python scripts/generate_embeddings.py")
+        return
+
+    print(f"📂 Загружаем данные из {INPUT_FILE}...")
+    with open(INPUT_FILE, "rb") as f:
+        data = pickle.load(f)
+    df = data["dataframe"]
+    embeddings = load_embeddings(data)
+    if len(df) != len(embeddings):
+        print(f"❌ Размерности не совпадают: df={len(df)}, embeddings={len(embeddings)}")
+        return
+
+    payloads = []
+    rows = []
+    for idx, parsed in enumerate(prepare_payloads(df)):
+        if not parsed["hh_id"]:
+            print(f"⚠️  Пропускаем запись без hh_id на индексе {idx}")
+            continue
+        payloads.append(parsed)
+        rows.append(idx)
+
+    started = time.perf_counter()
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    write_vector_index(
+        args.output,
+        embeddings[rows],
+        payloads,
+        version=version,
+        ivf_lists=args.ivf_lists,
+        model=data.get("metadata", {}).get("model", ""),
+    )
+    print(f"✅ Индекс {args.output} (версия {version}): {len(payloads)} векторов "
+          f"размерности {embeddings.shape[1]}, IVF списков: {args.ivf_lists}, "
+          f"{time.perf_counter() - started:.1f} с")
+    print("💡 Включение: VECTOR_SEARCH_BACKEND=numpy VECTOR_INDEX_PATH=" + args.output)
+
+
+if __name__ == "__main__":
+    main()
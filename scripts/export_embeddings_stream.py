@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Перевод файла эмбеддингов (pickle) в потоковый формат для scripts/load_to_qdrant.py --stream.
+Использование: python scripts/export_embeddings_stream.py [--output embeddings_stream] [--shard-rows 50000]
+
+Каталог: manifest.json, embeddings-NNNNN.npy (шарды в том же dtype, что и pickle, читаются через mmap)
+и payloads.parquet с row groups - загрузчик читает их батчами, не поднимая весь корпус в память.
+Нужен pyarrow.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recommendations.embedding_storage import load_embeddings, write_embedding_stream
+
+INPUT_FILE = os.getenv("EMBEDDINGS_FILE", "vacancies_with_embeddings.pickle")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Экспорт эмбеддингов в потоковый формат")
+    parser.add_argument("--output", default="embeddings_stream")
+    parser.add_argument("--shard-rows", type=int, default=50_000, help="строк в одном .npy шарде")
+    parser.add_argument("--row-group-rows", type=int, default=5_000, help="строк в row group parquet")
+    args = parser.parse_args()
+
+    if not Path(INPUT_FILE).exists():
+        print(f"❌ Файл {INPUT_FILE} не найден!")
+        print("💡 Сначала запустите: python scripts/generate_embeddings.py")
+        return
+
+    print(f"📂 Загружаем данные из {INPUT_FILE}...")
+    with open(INPUT_FILE, "rb") as f:
+        data = pickle.load(f)
+    metadata = data.get("metadata", {})
+
+    started = time.perf_counter()
+    write_embedding_stream(
+        args.output,
+        data["dataframe"],
+        load_embeddings(data),
+        metadata={key: metadata[key] for key in ("model", "provider", "created_at") if key in metadata},
+        dtype=metadata.get("dtype", "float32"),
+        shard_rows=args.shard_rows,
+        row_group_rows=args.row_group_rows,
+    )
+    print(f"✅ Потоковый каталог {args.output}: {len(data['dataframe'])} записей, "
+          f"{time.perf_counter() - started:.1f} с")
+    print(f"💡 Загрузка: python scripts/load_to_qdrant.py --stream {args.output}")
+
+
+if __name__ == "__main__":
+    main()
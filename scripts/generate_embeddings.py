@@ -2,6 +2,7 @@
 """
 Скрипт для генерации эмбеддингов из вакансий и сохранения в файл.
 Использование: python scripts/generate_embeddings.py
+Провайдер задается EMBEDDING_PROVIDER (yandex | hashing - офлайн, без ключей и сети).
 """
 import asyncio
 import os
@@ -9,35 +10,52 @@ import pickle
 import json
 import re
 import math
+import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-from tenacity import retry, wait_exponential_jitter, stop_after_attempt, retry_if_exception_type
-from yandex_cloud_ml_sdk import YCloudML
 import tiktoken
 
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_providers import get_embedding_provider
+from app.services.recommendations.embedding_storage import STORAGE_DTYPES, encode_embeddings
+
 # ==================== НАСТРОЙКИ ====================
 MODEL = "text-search-doc"  # Yandex embeddings model через SDK
-DIM = 256  # Yandex embeddings dimension
-CONCURRENCY = 2  # УМЕНЬШЕНО для обхода рейт-лимитов
-BATCH_SIZE = 25   # УМЕНЬШЕНО для обхода рейт-лимитов
-DELAY_BETWEEN_BATCHES = 2  # задержка между батчами в секундах
+DIM = 256  # Yandex embeddings dimension (и размерность локального провайдера)
+# Параллелизм и рейт-лимит берутся из настроек общего клиента:
+# EMBEDDING_MAX_CONCURRENCY, EMBEDDING_REQUESTS_PER_SECOND
+BATCH_SIZE = 25   # размер батча для отчета о прогрессе
 
 PICKLE_FILE = "scored_vacs.pickle"
 OUTPUT_FILE = "vacancies_with_embeddings.pickle"
+# Тип хранения векторов в файле: float32 | float16 (x2 меньше) | int8 (x4 меньше, масштаб на строку)
+EMBEDDINGS_DTYPE = os.getenv("EMBEDDINGS_DTYPE", "float32")
 
 # ==================== EMBEDDING ФУНКЦИИ ====================
-enc = tiktoken.get_encoding("cl100k_base")
+_enc = None
+
+def get_encoder():
+    """Токенизатор загружается лениво: офлайн-провайдеру он не нужен."""
+    global _enc
+    if _enc is None:
+        _enc = tiktoken.get_encoding("cl100k_base")
+    return _enc
 
 def count_tokens(text: str) -> int:
     """Подсчитывает количество токенов в тексте."""
-    return len(enc.encode(text or ""))
+    return len(get_encoder().encode(text or ""))
 
 def chunk_by_tokens(text: str, max_tokens: int = 400, overlap: int = 40) -> List[str]:
     """Резка длинных текстов по токенам с перекрытием."""
+    enc = get_encoder()
     ids = enc.encode(text or "")
     if not ids:
         return [""]
@@ -49,68 +67,34 @@ def chunk_by_tokens(text: str, max_tokens: int = 400, overlap: int = 40) -> List
         chunks.append(enc.decode(sub))
     return chunks or [""]
 
-@retry(
-    wait=wait_exponential_jitter(initial=2, max=60),
-    stop=stop_after_attempt(10),
-    retry=retry_if_exception_type((Exception,))
-)
-async def embed_batch(sdk: YCloudML, texts: List[str], *, dimensions: int = DIM) -> np.ndarray:
-    """Один батч в Yandex Embeddings API через SDK с улучшенными ретраями."""
-    try:
-        embeddings_list = []
-        
-        # Обрабатываем тексты по одному через SDK
-        for text in texts:
-            # Выполняем синхронный вызов в executor для совместимости с async
-            import functools
-            loop = asyncio.get_event_loop()
-            
-            # Используем SDK для создания эмбеддинга
-            embedding_model = sdk.models.text_embeddings(MODEL)
-            result = await loop.run_in_executor(
-                None, 
-                functools.partial(embedding_model.run, text)
-            )
-            
-            # Извлекаем эмбеддинг из результата (SDK возвращает TextEmbeddingsModelResult)
-            embedding = np.array(result.embedding, dtype=np.float32)
-            
-            embeddings_list.append(embedding)
-        
-        vecs = np.array(embeddings_list, dtype=np.float32)
-        
-        # L2-нормирование под cosine/IP
-        norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-        return vecs / norms
-        
-    except Exception as e:
-        print(f"❌ Ошибка в embed_batch: {e}")
-        raise
+def get_provider():
+    """Тот же провайдер, что и в сервисе рекомендаций (для Yandex - общий handle модели и рейт-лимит)."""
+    if settings.embedding_provider.lower() == "yandex":
+        return get_embedding_provider(MODEL, DIM, max_attempts=10, max_backoff=60)
+    return get_embedding_provider(MODEL, DIM)
 
 async def embed_long_docs(docs: List[str]) -> np.ndarray:
-    """Длинные тексты: чанкинг (~400 токенов) + mean-pooling в 1 вектор на документ."""
+    """Длинные тексты: чанкинг (по лимиту токенов провайдера) + mean-pooling в 1 вектор на документ."""
     if not docs:
         print("⚠️  Пустой список документов!")
         return np.array([]).reshape(0, DIM)
     
-    # Инициализируем Yandex Cloud ML SDK
-    api_key = os.getenv("YANDEX_GPT_API_KEY")
-    folder_id = os.getenv("YANDEX_GPT_FOLDER_ID")
-    
-    if not api_key or not folder_id:
-        raise ValueError("YANDEX_GPT_API_KEY и YANDEX_GPT_FOLDER_ID должны быть установлены")
-    
-    sdk = YCloudML(folder_id=folder_id, auth=api_key)
-    sem = asyncio.Semaphore(CONCURRENCY)
+    client = get_provider()
 
     print(f"🔄 Подготовка {len(docs)} документов для эмбеддинга...")
-    print(f"🔧 Параметры: CONCURRENCY={CONCURRENCY}, BATCH_SIZE={BATCH_SIZE}, DELAY={DELAY_BETWEEN_BATCHES}s")
+    print(
+        f"🔧 Параметры: CONCURRENCY={settings.embedding_max_concurrency}, "
+        f"RPS={settings.embedding_requests_per_second}, BATCH_SIZE={BATCH_SIZE}"
+    )
 
     # 1) готовим куски и обратную индексацию
     doc_spans: List[str] = []
     doc_ptrs: List[int] = []  # сколько спанов у i-го документа
     for text in docs:
-        spans = chunk_by_tokens(text, max_tokens=400, overlap=40)
+        if client.max_tokens is None:
+            spans = [text]
+        else:
+            spans = chunk_by_tokens(text, max_tokens=client.max_tokens, overlap=40)
         doc_spans.extend(spans)
         doc_ptrs.append(len(spans))
 
@@ -120,14 +104,12 @@ async def embed_long_docs(docs: List[str]) -> np.ndarray:
         print("⚠️  Нет спанов для обработки!")
         return np.array([]).reshape(0, DIM)
 
-    # 2) батчинг спанов
+    # 2) батчинг спанов (параллелизм внутри батчей ограничивает клиент)
     async def run_batch(start: int, end: int, batch_num: int):
-        async with sem:
-            if batch_num > 0:
-                await asyncio.sleep(DELAY_BETWEEN_BATCHES)
-            batch_texts = doc_spans[start:end]
-            print(f"   🔄 Батч {batch_num + 1}: обрабатываем спаны {start}-{end} ({len(batch_texts)} элементов)")
-            return await embed_batch(sdk, batch_texts)
+        batch_texts = doc_spans[start:end]
+        vecs = await client.embed(batch_texts)
+        print(f"   ✅ Батч {batch_num + 1}: спаны {start}-{end} ({len(batch_texts)} элементов)")
+        return vecs
 
     # Создаем задачи для батчей
     tasks = []
@@ -135,7 +117,7 @@ async def embed_long_docs(docs: List[str]) -> np.ndarray:
         end = min(start + BATCH_SIZE, len(doc_spans))
         tasks.append(run_batch(start, end, batch_num))
 
-    # Выполняем батчи с ограничением concurrency
+    # Выполняем батчи (порядок результатов совпадает с порядком задач)
     print(f"🚀 Запускаем {len(tasks)} батчей...")
     try:
         span_vecs_list = await asyncio.gather(*tasks)
@@ -280,25 +262,32 @@ def clean_and_validate_data(df: pd.DataFrame) -> pd.DataFrame:
 
 async def main():
     """Основная функция для генерации эмбеддингов."""
-    print("🚀 ГЕНЕРАЦИЯ ЭМБЕДДИНГОВ ДЛЯ ВАКАНСИЙ (Yandex API)")
+    print(f"🚀 ГЕНЕРАЦИЯ ЭМБЕДДИНГОВ ДЛЯ ВАКАНСИЙ (провайдер: {settings.embedding_provider})")
     print("=" * 50)
     
+    if EMBEDDINGS_DTYPE not in STORAGE_DTYPES:
+        print(f"❌ EMBEDDINGS_DTYPE должен быть одним из {STORAGE_DTYPES}, получено: {EMBEDDINGS_DTYPE}")
+        return
+    
     # Проверяем наличие входного файла
     if not Path(PICKLE_FILE).exists():
         print(f"❌ Файл {PICKLE_FILE} не найден!")
         print("💡 Убедитесь, что файл scored_vacs.pickle находится в корне проекта")
         return
     
-    # Проверяем Yandex GPT API ключи
+    remote = settings.embedding_provider.lower() == "yandex"
+    
+    # Проверяем Yandex GPT API ключи (локальному провайдеру они не нужны)
     api_key = os.getenv("YANDEX_GPT_API_KEY")
     folder_id = os.getenv("YANDEX_GPT_FOLDER_ID")
     
-    if not api_key:
+    if remote and not api_key:
         print("❌ Yandex GPT API ключ не найден!")
         print("💡 Установите переменную окружения: export YANDEX_GPT_API_KEY='your-key'")
+        print("💡 Или используйте офлайн-провайдер: export EMBEDDING_PROVIDER=hashing")
         return
         
-    if not folder_id:
+    if remote and not folder_id:
         print("❌ Yandex GPT folder_id не найден!")
         print("💡 Установите переменную окружения: export YANDEX_GPT_FOLDER_ID='your-folder-id'")
         return
@@ -335,15 +324,19 @@ async def main():
     print("🔄 Подготавливаем тексты для эмбеддинга...")
     texts = df['tasks_text'].tolist()
     
-    # Считаем токены и стоимость
-    total_tokens = sum(count_tokens(text) for text in texts)
-    estimated_cost = (total_tokens / 1_000_000) * 0.02  # $0.02 per 1M tokens
+    # Считаем токены и стоимость (локальный провайдер бесплатен и токенизатор ему не нужен)
+    if remote:
+        total_tokens = sum(count_tokens(text) for text in texts)
+        estimated_cost = (total_tokens / 1_000_000) * 0.02  # $0.02 per 1M tokens
+    else:
+        total_tokens = sum(len(text) for text in texts)  # символы вместо токенов
+        estimated_cost = 0.0
     
     print(f"📊 Статистика:")
     print(f"   📄 Документов: {len(texts):,}")
     print(f"   🔤 Токенов: {total_tokens:,}")
     print(f"   💰 Примерная стоимость: ${estimated_cost:.2f}")
-    print(f"   🤖 Модель: {MODEL}")
+    print(f"   🤖 Модель: {get_provider().model}")
     print(f"   📐 Размерность: {DIM}")
     
     # Проверяем автоподтверждение для Docker
@@ -370,13 +363,17 @@ async def main():
     # Добавляем эмбеддинги к данным
     print("💾 Сохраняем результат...")
     
-    # Создаем результирующую структуру
+    # Создаем результирующую структуру (читать через embedding_storage.load_embeddings)
+    stored_embeddings, embedding_scales = encode_embeddings(embeddings, EMBEDDINGS_DTYPE)
     result_data = {
         'dataframe': df,
-        'embeddings': embeddings,
+        'embeddings': stored_embeddings,
+        'embedding_scales': embedding_scales,
         'metadata': {
-            'model': MODEL,
+            'model': get_provider().model,
+            'provider': settings.embedding_provider,
             'dimensions': DIM,
+            'dtype': EMBEDDINGS_DTYPE,
             'created_at': datetime.now().isoformat(),
             'total_records': len(df),
             'total_tokens': total_tokens,
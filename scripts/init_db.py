@@ -1,7 +1,7 @@
 import asyncio
 
 from app.infrastructure.db.base import Base
-from app.infrastructure.db.models import user, chat_session, message  # noqa: F401
+from app.infrastructure.db.models import user, chat_session, message, refresh_token  # noqa: F401
 from app.core.settings import settings
 from sqlalchemy.ext.asyncio import create_async_engine
 
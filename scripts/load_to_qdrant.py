@@ -1,37 +1,201 @@
 #!/usr/bin/env python3
 """
 Скрипт для загрузки готовых эмбеддингов в Qdrant.
-Использование: python scripts/load_to_qdrant.py
+Использование: python scripts/load_to_qdrant.py [--bulk [--memmap]] [--sync] [--stream DIR] [--snapshot DIR] [--rollback] [--keep 2]
+
+Каждая загрузка создает новую коллекцию <QDRANT_COLLECTION>_v<версия>, ждет окончания индексации
+и атомарно переключает на нее алиас QDRANT_COLLECTION - сервис все время читает целую коллекцию.
+Предыдущие версии остаются для отката (--rollback) и удаляются, когда их больше --keep.
+--sync обновляет текущую коллекцию на месте: только новые/измененные точки (по content_hash) и удаление исчезнувших.
+--stream DIR читает потоковый каталог (scripts/export_embeddings_stream.py) батчами вместо pickle.
+--snapshot DIR после переключения алиаса сохраняет снапшот коллекции (scripts/qdrant_snapshot.py deploy на хостах).
+Квантизация: QDRANT_QUANTIZATION=scalar|product (по умолчанию none), см. scripts/benchmark_quantization.py
 """
+import argparse
 import asyncio
+import hashlib
 import os
 import pickle
 import json
 import re
+import resource
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from uuid import UUID, uuid5, NAMESPACE_URL
 from datetime import datetime
 
+import httpx
 import numpy as np
 import pandas as pd
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
     VectorParams, Distance, PointStruct, 
-    CollectionStatus, OptimizersConfigDiff
+    CollectionStatus, OptimizersConfigDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    ProductQuantization, ProductQuantizationConfig, CompressionRatio,
+    KeywordIndexParams, KeywordIndexType, HnswConfigDiff,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    PointIdsList, Batch,
 )
 
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.settings import settings
+from app.services.recommendations.embedding_storage import EmbeddingStream, load_embeddings
+from app.services.recommendations.vector_backends import COLLECTION_VERSION_FIELD, VERSION_MARKER_ID
+
 # ==================== НАСТРОЙКИ ====================
 QDRANT_URL = "http://localhost:6333"  # Локальное подключение
-COLLECTION_NAME = "vacancies_tasks"
+# Имя, по которому ищет сервис (settings.qdrant_collection) - алиас на последнюю версию коллекции
+COLLECTION_NAME = settings.qdrant_collection
+# Сколько последних версий коллекции хранить (текущая под алиасом не удаляется никогда)
+KEEP_COLLECTIONS = int(os.getenv('QDRANT_KEEP_COLLECTIONS', '2'))
+INDEXING_TIMEOUT = float(os.getenv('QDRANT_INDEXING_TIMEOUT', '600'))
+# Хэш payload + вектора точки: по нему --sync находит измененные вакансии
+CONTENT_HASH_FIELD = "content_hash"
+SYNC_SCROLL_BATCH = 1000
+# Хэши точек после последней синхронизации: следующий --sync не сканирует коллекцию целиком
+SYNC_STATE_FILE = os.getenv('QDRANT_SYNC_STATE', 'qdrant_sync_state.json')
+# Bulk-режим (--bulk): HNSW строится один раз после загрузки, точки пишут параллельные воркеры
+BULK_PARALLEL = int(os.getenv('QDRANT_BULK_PARALLEL', '4'))
 # Используем основной файл по умолчанию
 INPUT_FILE = os.getenv('EMBEDDINGS_FILE', "vacancies_with_embeddings.pickle")
 print(f"🔍 Используем файл эмбеддингов: {INPUT_FILE}")
 UPLOAD_BATCH_SIZE = 256
+# Сколько батчей upsert одновременно в полете
+UPLOAD_IN_FLIGHT = int(os.getenv('QDRANT_UPLOAD_IN_FLIGHT', '4'))
+# Транспорт: gRPC (QDRANT_PREFER_GRPC=true, порт QDRANT_GRPC_PORT) или HTTP/JSON
+PREFER_GRPC = settings.qdrant_prefer_grpc
+# Квантизация вектора "tasks": none | scalar (int8, x4 меньше памяти) | product (x16)
+QUANTIZATION = os.getenv('QDRANT_QUANTIZATION', 'none').lower()
+# Держать квантованные векторы в RAM (исходные float32 при этом можно вынести на диск)
+QUANTIZATION_ALWAYS_RAM = os.getenv('QDRANT_QUANTIZATION_ALWAYS_RAM', 'true').lower() in ['true', '1', 'yes']
+VECTORS_ON_DISK = os.getenv('QDRANT_VECTORS_ON_DISK', 'false').lower() in ['true', '1', 'yes']
+# Параметры HNSW графа (по умолчанию - значения Qdrant); подбор - scripts/benchmark_hnsw.py
+HNSW_M = int(os.getenv('QDRANT_HNSW_M', '16'))
+HNSW_EF_CONSTRUCT = int(os.getenv('QDRANT_HNSW_EF_CONSTRUCT', '100'))
+
+# Payload индексы под фильтры поиска. raw_category есть в каждом запросе рекомендаций,
+# поэтому индексируется как tenant: точки одной категории лежат рядом и фильтр не перебирает payload
+PAYLOAD_INDEXES = {
+    "raw_category": KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+    "hh_id": KeywordIndexParams(type=KeywordIndexType.KEYWORD),
+    "experience": KeywordIndexParams(type=KeywordIndexType.KEYWORD),
+    "employment_type": KeywordIndexParams(type=KeywordIndexType.KEYWORD),
+}
 
 # ==================== QDRANT ФУНКЦИИ ====================
 
-async def setup_qdrant_collection(client: QdrantClient, collection_name: str, vector_dim: int):
+def build_quantization_config(kind: str, always_ram: bool = True):
+    """Конфиг квантизации коллекции (None - без квантизации)."""
+    if kind in ("", "none"):
+        return None
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if kind == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=always_ram)
+        )
+    raise ValueError(f"Неизвестный тип квантизации: {kind} (ожидается none | scalar | product)")
+
+def create_payload_indexes(client: QdrantClient, collection_name: str):
+    """Создает payload индексы для полей фильтрации (до загрузки точек, чтобы HNSW учел фильтры)."""
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_schema,
+            wait=True
+        )
+    print(f"🗂️  Payload индексы: {', '.join(PAYLOAD_INDEXES)}")
+
+def versioned_collection_name(alias: str, version: str) -> str:
+    return f"{alias}_v{version}"
+
+def list_collection_versions(client: QdrantClient, alias: str) -> List[str]:
+    """Версии коллекции алиаса, от старых к новым (версия - метка времени, сортируется как строка)."""
+    prefix = f"{alias}_v"
+    return sorted(c.name for c in client.get_collections().collections if c.name.startswith(prefix))
+
+def get_alias_target(client: QdrantClient, alias: str) -> Optional[str]:
+    """Коллекция, на которую указывает алиас (None - алиаса нет)."""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+def swap_alias(client: QdrantClient, alias: str, collection_name: str) -> Optional[str]:
+    """Атомарно переключает алиас на collection_name; возвращает прежнюю коллекцию."""
+    previous = get_alias_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        # Миграция со схемы без алиасов: имя занято обычной коллекцией. Удаляем ее
+        # непосредственно перед созданием алиаса - новая коллекция к этому моменту готова
+        print(f"⚠️  '{alias}' - коллекция, а не алиас. Удаляем ее, чтобы создать алиас...")
+        client.delete_collection(alias)
+    
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)))
+    # Удаление и создание алиаса - одна операция: поиск не видит момента без алиаса
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"🔀 Алиас '{alias}': {previous or '-'} -> {collection_name}")
+    return previous
+
+def rollback_alias(client: QdrantClient, alias: str) -> Optional[str]:
+    """Переключает алиас на предыдущую версию коллекции."""
+    current = get_alias_target(client, alias)
+    older = [name for name in list_collection_versions(client, alias) if current is None or name < current]
+    if not older:
+        print(f"❌ Нет версии старше {current} для отката")
+        return None
+    swap_alias(client, alias, older[-1])
+    return older[-1]
+
+def garbage_collect_versions(client: QdrantClient, alias: str, keep: int = KEEP_COLLECTIONS) -> List[str]:
+    """Удаляет версии коллекции старше keep последних; коллекцию под алиасом не трогает."""
+    current = get_alias_target(client, alias)
+    versions = list_collection_versions(client, alias)
+    stale = [name for name in versions[:max(len(versions) - keep, 0)] if name != current]
+    for name in stale:
+        client.delete_collection(name)
+        print(f"🧹 Удалена старая версия коллекции: {name}")
+    return stale
+
+def wait_for_indexing(client: QdrantClient, collection_name: str, timeout: float = INDEXING_TIMEOUT):
+    """Ждет, пока коллекция станет green (HNSW и оптимизации завершены)."""
+    print(f"⏳ Ждем окончания индексации '{collection_name}'...")
+    started = time.monotonic()
+    while True:
+        status = client.get_collection(collection_name).status
+        if status == CollectionStatus.GREEN:
+            print(f"✅ Индексация завершена за {time.monotonic() - started:.1f}s")
+            return
+        if status == CollectionStatus.RED:
+            raise RuntimeError(f"Коллекция {collection_name} в статусе red")
+        if status == CollectionStatus.GREY:
+            # Оптимизации в очереди, но не запущены - пустое обновление конфига их запускает
+            client.update_collection(collection_name, optimizers_config=OptimizersConfigDiff())
+        if time.monotonic() - started > timeout:
+            raise TimeoutError(f"Коллекция {collection_name} не проиндексирована за {timeout:.0f}s")
+        time.sleep(1)
+
+async def setup_qdrant_collection(
+    client: QdrantClient,
+    collection_name: str,
+    vector_dim: int,
+    quantization_config=None,
+    on_disk: bool = False,
+    hnsw_m: int = HNSW_M,
+    hnsw_ef_construct: int = HNSW_EF_CONSTRUCT,
+):
     """Создает или пересоздает коллекцию Qdrant."""
     print(f"🔧 Настройка коллекции '{collection_name}'...")
     
@@ -54,13 +218,20 @@ async def setup_qdrant_collection(client: QdrantClient, collection_name: str, ve
             vectors_config={
                 "tasks": VectorParams(
                     size=vector_dim,
-                    distance=Distance.COSINE
+                    distance=Distance.COSINE,
+                    on_disk=on_disk
                 )
             },
             optimizers_config=OptimizersConfigDiff(
                 indexing_threshold=10000
-            )
+            ),
+            hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+            quantization_config=quantization_config
         )
+        print(f"🕸️  HNSW: m={hnsw_m}, ef_construct={hnsw_ef_construct}")
+        create_payload_indexes(client, collection_name)
+        if quantization_config is not None:
+            print(f"🗜️  Квантизация: {QUANTIZATION} (always_ram={QUANTIZATION_ALWAYS_RAM}, on_disk={on_disk})")
         
         print(f"✅ Коллекция '{collection_name}' создана успешно")
         
@@ -149,81 +320,395 @@ def parse_vacancy_data(row) -> Dict[str, Any]:
         "confidence": float(row.get("confidence", 0.0)) if not pd.isna(row.get("confidence")) else 0.0,
     }
 
+def _str_column(df: pd.DataFrame, name: str) -> List[str]:
+    """Колонка как в safe_get: NaN/None -> "", иначе str(value).strip() (отсутствующая колонка - "")."""
+    if name not in df.columns:
+        return [""] * len(df)
+    column = df[name]
+    return column.astype(str).str.strip().where(~column.isna(), "").tolist()
+
+def _parse_tasks(tasks):
+    if isinstance(tasks, list):
+        return tasks, " ".join(str(task).strip() for task in tasks if str(task).strip())
+    if isinstance(tasks, str):
+        try:
+            tasks_list = json.loads(tasks)
+            return tasks_list, " ".join(str(task).strip() for task in tasks_list if str(task).strip())
+        except:
+            return [tasks], tasks.strip()
+    return [], ""
+
+def _parse_skills(skills):
+    if isinstance(skills, str):
+        try:
+            skills = json.loads(skills)
+        except:
+            skills = [skills] if skills.strip() else []
+    return skills if isinstance(skills, list) else []
+
+def prepare_payloads(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    То же, что parse_vacancy_data для каждой строки, но по колонкам: без df.iloc и pd.isna на каждое поле.
+    Вакансии без hh_id возвращаются с пустым hh_id - отфильтровывает вызывающий код.
+    """
+    count = len(df)
+    urls = _str_column(df, "url")
+    hh_ids = [
+        hh_id or (url.split('/')[-1] if url and 'vacancy/' in url else fallback_id)
+        for hh_id, url, fallback_id in zip(_str_column(df, "hh_id"), urls, _str_column(df, "id"))
+    ]
+    urls = [url or (f"https://hh.ru/vacancy/{hh_id}" if hh_id else url) for url, hh_id in zip(urls, hh_ids)]
+    
+    tasks = [_parse_tasks(value) for value in (df["tasks"].tolist() if "tasks" in df.columns else [[]] * count)]
+    tasks_texts = [text for _, text in tasks]
+    if "tasks_text" in df.columns:
+        # Как в parse_vacancy_data: готовый tasks_text заменяет собранный, если значение истинно
+        tasks_texts = [
+            clean if raw else text
+            for raw, clean, text in zip(df["tasks_text"].tolist(), _str_column(df, "tasks_text"), tasks_texts)
+        ]
+    skills = [_parse_skills(value) for value in (df["skills"].tolist() if "skills" in df.columns else [[]] * count)]
+    confidence = (
+        pd.to_numeric(df["confidence"]).fillna(0.0).astype(float).tolist()
+        if "confidence" in df.columns else [0.0] * count
+    )
+    
+    columns = {
+        "hh_id": hh_ids,
+        "url": urls,
+        **{name: _str_column(df, name) for name in (
+            "title", "company", "location", "experience", "employment_type", "remote", "posted_at"
+        )},
+        "tasks_list": [tasks_list for tasks_list, _ in tasks],
+        "tasks_text": tasks_texts,
+        "skills": skills,
+        "raw_category": _str_column(df, "category"),
+        "confidence": confidence,
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def prepare_points(
+    df: pd.DataFrame, embeddings: np.ndarray, collection_version: str = ""
+) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+    """
+    Строки с hh_id, id точек и payload (с content_hash и версией) для загрузки.
+    Векторы не копируются: загрузчик берет embeddings[rows] срезами по батчам.
+    """
+    payloads = prepare_payloads(df)
+    rows = np.array([i for i, payload in enumerate(payloads) if payload["hh_id"]], dtype=np.int64)
+    skipped = len(payloads) - len(rows)
+    if skipped:
+        print(f"⚠️  Пропускаем {skipped} записей без hh_id")
+    payloads = [payloads[i] for i in rows]
+    for row, payload in zip(rows, payloads):
+        payload[CONTENT_HASH_FIELD] = content_hash(payload, embeddings[row])
+        # По версии QdrantService сбрасывает кэш результатов поиска
+        payload[COLLECTION_VERSION_FIELD] = collection_version
+    # Уникальный ID на основе hh_id
+    ids = [str(uuid5(NAMESPACE_URL, payload["hh_id"])) for payload in payloads]
+    return rows, ids, payloads
+
+async def bulk_upload_to_qdrant(
+    client: QdrantClient,
+    collection_name: str,
+    df: pd.DataFrame,
+    embeddings: np.ndarray,
+    collection_version: str = "",
+    hnsw_m: int = HNSW_M,
+    parallel: int = BULK_PARALLEL,
+    batch_size: int = UPLOAD_BATCH_SIZE
+) -> Dict[str, float]:
+    """
+    Bulk-загрузка в коллекцию, созданную с hnsw m=0 (граф не строится во время записи):
+    параллельный upload_points, затем включение HNSW и ожидание green.
+    Возвращает длительность фаз в секундах.
+    """
+    if len(df) != len(embeddings):
+        raise ValueError(f"Размерности не совпадают: df={len(df)}, embeddings={len(embeddings)}")
+    timings: Dict[str, float] = {}
+    
+    started = time.perf_counter()
+    rows, ids, payloads = prepare_points(df, embeddings, collection_version)
+    timings["prepare"] = time.perf_counter() - started
+    
+    print(f"📤 Bulk-загрузка {len(ids)} точек ({parallel} воркеров, батч {batch_size})...")
+    started = time.perf_counter()
+    # Векторы передаются NumPy массивом: клиент режет его на батчи без поштучного tolist()
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors={"tasks": np.ascontiguousarray(embeddings[rows], dtype=np.float32)},
+        payload=payloads,
+        ids=ids,
+        batch_size=batch_size,
+        parallel=parallel,
+        max_retries=3,
+        wait=True,
+    )
+    timings["upload"] = time.perf_counter() - started
+    verify_point_count(client, collection_name, len(ids), len(ids))
+    
+    print(f"🕸️  Включаем HNSW (m={hnsw_m}) и ждем индексации...")
+    started = time.perf_counter()
+    client.update_collection(collection_name, hnsw_config=HnswConfigDiff(m=hnsw_m))
+    wait_for_indexing(client, collection_name)
+    timings["index"] = time.perf_counter() - started
+    
+    print(f"📊 Фазы bulk-загрузки ({len(ids)} точек):")
+    for phase, title in (("prepare", "подготовка"), ("upload", "загрузка"), ("index", "индексация")):
+        rate = len(ids) / timings[phase] if timings[phase] else float("inf")
+        print(f"   {title:<11} {timings[phase]:7.1f}s  {rate:10.0f} точек/с")
+    total = sum(timings.values())
+    print(f"   {'всего':<11} {total:7.1f}s  {len(ids) / total if total else float('inf'):10.0f} точек/с")
+    return timings
+
+def upload_batches(
+    client: QdrantClient,
+    collection_name: str,
+    batches: Iterable[Batch],
+    in_flight: int = UPLOAD_IN_FLIGHT,
+    total_batches: Optional[int] = None
+) -> int:
+    """
+    Отправляет батчи параллельно, но не больше in_flight одновременно. Итератор читается лениво:
+    следующий батч готовится, пока предыдущие в полете, и в памяти не больше in_flight + 1 батчей.
+    Возвращает число загруженных точек.
+    """
+    successful_uploads = 0
+    of_total = f"/{total_batches}" if total_batches else ""
+    
+    def upload_batch(batch: Batch) -> int:
+        client.upsert(collection_name=collection_name, points=batch)
+        return len(batch.ids)
+    
+    def collect(done) -> None:
+        nonlocal successful_uploads
+        for future in done:
+            batch_num = futures.pop(future)
+            try:
+                uploaded = future.result()
+                successful_uploads += uploaded
+                print(f"   ✅ Батч {batch_num + 1}{of_total}: загружено {uploaded} точек")
+            except Exception as e:
+                print(f"   ❌ Ошибка загрузки батча {batch_num + 1}: {e}")
+    
+    futures = {}
+    with ThreadPoolExecutor(max_workers=in_flight) as pool:
+        for batch_num, batch in enumerate(batches):
+            if len(futures) >= in_flight:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+            futures[pool.submit(upload_batch, batch)] = batch_num
+        collect(list(futures))
+    return successful_uploads
+
+def verify_point_count(client: QdrantClient, collection_name: str, uploaded: int, expected: int):
+    """
+    Проверка перед переключением алиаса: все батчи записаны и в коллекции ровно expected точек.
+    Иначе RuntimeError - неполная коллекция не должна попасть под алиас.
+    """
+    points_count = client.count(collection_name, exact=True).count
+    print(f"📊 Записей в коллекции: {points_count} (ожидалось {expected})")
+    if uploaded != expected or points_count != expected:
+        raise RuntimeError(
+            f"Коллекция {collection_name} неполная: загружено {uploaded}, в коллекции {points_count} из {expected} точек"
+        )
+
 async def upload_to_qdrant(
     client: QdrantClient, 
     collection_name: str, 
     df: pd.DataFrame, 
     embeddings: np.ndarray,
-    batch_size: int = UPLOAD_BATCH_SIZE
-):
-    """Загружает данные и эмбеддинги в Qdrant."""
+    batch_size: int = UPLOAD_BATCH_SIZE,
+    collection_version: str = "",
+    in_flight: int = UPLOAD_IN_FLIGHT
+) -> int:
+    """
+    Загружает данные и эмбеддинги в Qdrant (версия загрузки пишется в payload каждой точки).
+    Батчи отправляются параллельно, но не больше in_flight одновременно - память ограничена окном.
+    Возвращает число записанных точек; если часть батчей не загрузилась - RuntimeError.
+    """
     print(f"📤 Загружаем {len(df)} записей в Qdrant...")
     
     if len(df) != len(embeddings):
         raise ValueError(f"Размерности не совпадают: df={len(df)}, embeddings={len(embeddings)}")
     
-    total_batches = (len(df) + batch_size - 1) // batch_size
-    successful_uploads = 0
+    rows, ids, payloads = prepare_points(df, embeddings, collection_version)
     
-    for batch_num in range(total_batches):
-        start_idx = batch_num * batch_size
-        end_idx = min((batch_num + 1) * batch_size, len(df))
-        
-        print(f"   📦 Батч {batch_num + 1}/{total_batches}: записи {start_idx}-{end_idx}")
-        
-        points = []
-        for idx in range(start_idx, end_idx):
-            row = df.iloc[idx]
-            
-            # Парсим данные вакансии
-            parsed = parse_vacancy_data(row)
-            
-            # Генерируем ID точки
-            hh_id = parsed["hh_id"]
-            if not hh_id:
-                print(f"⚠️  Пропускаем запись без hh_id на индексе {idx}")
-                continue
-            
-            # Создаем уникальный ID на основе hh_id
-            point_id = str(uuid5(NAMESPACE_URL, hh_id))
-            
-            # Получаем эмбеддинг
-            vector = embeddings[idx].tolist()
-            
-            # Создаем точку
-            point = PointStruct(
-                id=point_id,
-                vector={"tasks": vector},
-                payload=parsed
-            )
-            points.append(point)
-        
-        if not points:
-            print(f"⚠️  Батч {batch_num + 1} пуст, пропускаем")
-            continue
-        
-        try:
-            # Загружаем батч
-            operation_info = client.upsert(
-                collection_name=collection_name,
-                points=points
+    def batches():
+        for start_idx in range(0, len(ids), batch_size):
+            end_idx = start_idx + batch_size
+            yield Batch(
+                ids=ids[start_idx:end_idx],
+                # Один tolist() на батч (C-цикл NumPy), а не на каждую точку
+                vectors={"tasks": embeddings[rows[start_idx:end_idx]].tolist()},
+                payloads=payloads[start_idx:end_idx],
             )
-            successful_uploads += len(points)
-            print(f"   ✅ Загружено {len(points)} точек (статус: {operation_info.status})")
-            
-        except Exception as e:
-            print(f"   ❌ Ошибка загрузки батча {batch_num + 1}: {e}")
-            continue
     
+    total_batches = (len(ids) + batch_size - 1) // batch_size
+    successful_uploads = upload_batches(client, collection_name, batches(), in_flight, total_batches)
     print(f"✅ Загрузка завершена: {successful_uploads}/{len(df)} записей")
     
     # Проверяем итоговое количество
+    verify_point_count(client, collection_name, successful_uploads, len(ids))
+    return successful_uploads
+
+async def stream_upload_to_qdrant(
+    client: QdrantClient,
+    collection_name: str,
+    stream: EmbeddingStream,
+    batch_size: int = UPLOAD_BATCH_SIZE,
+    collection_version: str = "",
+    in_flight: int = UPLOAD_IN_FLIGHT
+) -> int:
+    """
+    Загрузка из потокового каталога (шарды .npy через mmap + parquet по батчам): чтение и подготовка
+    следующего батча идут, пока предыдущие в полете, - память не зависит от размера корпуса.
+    Возвращает число записанных точек; если часть батчей не загрузилась - RuntimeError.
+    """
+    print(f"📤 Потоковая загрузка {stream.count} записей в Qdrant...")
+    expected = 0
+    
+    def batches():
+        nonlocal expected
+        for df, vectors in stream.iter_batches(batch_size):
+            rows, ids, payloads = prepare_points(df, vectors, collection_version)
+            expected += len(ids)
+            if ids:
+                yield Batch(ids=ids, vectors={"tasks": vectors[rows].tolist()}, payloads=payloads)
+    
+    total_batches = (stream.count + batch_size - 1) // batch_size
+    successful_uploads = upload_batches(client, collection_name, batches(), in_flight, total_batches)
+    print(f"✅ Загрузка завершена: {successful_uploads}/{stream.count} записей")
+    verify_point_count(client, collection_name, successful_uploads, expected)
+    return successful_uploads
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса в МБ (ru_maxrss: КБ в Linux, байты в macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def content_hash(payload: Dict[str, Any], vector: np.ndarray) -> str:
+    """Хэш содержимого точки (payload без служебных полей + float32 вектор)."""
+    data = {k: v for k, v in payload.items() if k not in (CONTENT_HASH_FIELD, COLLECTION_VERSION_FIELD)}
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    digest.update(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+def fetch_point_hashes(client: QdrantClient, collection_name: str) -> Dict[str, str]:
+    """id точки -> content_hash для всей коллекции (только payload поле, без векторов)."""
+    hashes: Dict[str, str] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=SYNC_SCROLL_BATCH,
+            offset=offset,
+            with_payload=[CONTENT_HASH_FIELD],
+            with_vectors=False,
+        )
+        for point in points:
+            if str(point.id) != VERSION_MARKER_ID:
+                hashes[str(point.id)] = (point.payload or {}).get(CONTENT_HASH_FIELD, "")
+        if offset is None:
+            return hashes
+
+def read_collection_version(client: QdrantClient, collection_name: str) -> str:
+    """Версия коллекции: из маркера (после --sync), иначе из payload любой точки полной загрузки."""
+    markers = client.retrieve(collection_name, ids=[VERSION_MARKER_ID], with_payload=[COLLECTION_VERSION_FIELD])
+    points = markers or client.scroll(collection_name, limit=1, with_payload=[COLLECTION_VERSION_FIELD])[0]
+    return str((points[0].payload or {}).get(COLLECTION_VERSION_FIELD, "")) if points else ""
+
+def write_version_marker(client: QdrantClient, collection_name: str, collection_version: str):
+    """Одна точка без вектора - в поиск не попадает, а версия меняется одной записью."""
+    client.upsert(
+        collection_name=collection_name,
+        points=[PointStruct(id=VERSION_MARKER_ID, vector={}, payload={COLLECTION_VERSION_FIELD: collection_version})],
+    )
+
+def load_sync_state(state_file: Optional[str], collection_name: str, collection_version: str) -> Optional[Dict[str, str]]:
+    """Хэши из прошлой синхронизации, если они относятся к этой коллекции и ее текущей версии."""
+    if not state_file or not Path(state_file).exists():
+        return None
     try:
-        collection_info = client.get_collection(collection_name)
-        points_count = collection_info.points_count
-        print(f"📊 Записей в коллекции: {points_count}")
-    except Exception as e:
-        print(f"⚠️  Не удалось получить информацию о коллекции: {e}")
+        state = json.loads(Path(state_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Не удалось прочитать {state_file}: {e}")
+        return None
+    if state.get("collection") != collection_name or state.get("version") != collection_version:
+        return None
+    return state["hashes"]
+
+def save_sync_state(state_file: Optional[str], collection_name: str, collection_version: str, hashes: Dict[str, str]):
+    if state_file:
+        state = {"collection": collection_name, "version": collection_version, "hashes": hashes}
+        Path(state_file).write_text(json.dumps(state), encoding="utf-8")
+
+async def sync_to_qdrant(
+    client: QdrantClient,
+    collection_name: str,
+    df: pd.DataFrame,
+    embeddings: np.ndarray,
+    collection_version: str,
+    batch_size: int = UPLOAD_BATCH_SIZE,
+    state_file: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Идемпотентная синхронизация: upsert новых и измененных точек, удаление исчезнувших.
+    Повторный запуск на тех же данных ничего не пишет. Возвращает сводку изменений.
+    Запросы к Qdrant пропорциональны числу изменений: хэши берутся из state_file, если он
+    соответствует текущей версии коллекции (иначе - один полный scroll), а версия пишется в маркер.
+    """
+    print(f"🔄 Синхронизация {len(df)} записей с коллекцией '{collection_name}'...")
+    started = time.perf_counter()
+    live_version = read_collection_version(client, collection_name)
+    existing = load_sync_state(state_file, collection_name, live_version)
+    if existing is None:
+        existing = fetch_point_hashes(client, collection_name)
+        print(f"   📥 В коллекции {len(existing)} точек ({time.perf_counter() - started:.1f}s)")
+    else:
+        print(f"   📥 Хэши {len(existing)} точек из {state_file} (версия {live_version})")
+    
+    summary = {"new": 0, "changed": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+    changed_points: List[PointStruct] = []
+    source_hashes: Dict[str, str] = {}
+    for idx, parsed in enumerate(prepare_payloads(df)):
+        hh_id = parsed["hh_id"]
+        if not hh_id:
+            summary["skipped"] += 1
+            continue
+        point_id = str(uuid5(NAMESPACE_URL, hh_id))
+        parsed[CONTENT_HASH_FIELD] = content_hash(parsed, embeddings[idx])
+        source_hashes[point_id] = parsed[CONTENT_HASH_FIELD]
+        stored_hash = existing.get(point_id)
+        if stored_hash == parsed[CONTENT_HASH_FIELD]:
+            summary["unchanged"] += 1
+            continue
+        summary["new" if stored_hash is None else "changed"] += 1
+        changed_points.append(PointStruct(id=point_id, vector={"tasks": embeddings[idx].tolist()}, payload=parsed))
+    
+    for start in range(0, len(changed_points), batch_size):
+        client.upsert(collection_name=collection_name, points=changed_points[start:start + batch_size])
+    
+    vanished = [point_id for point_id in existing if point_id not in source_hashes]
+    for start in range(0, len(vanished), batch_size):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=vanished[start:start + batch_size]),
+        )
+    summary["deleted"] = len(vanished)
+    
+    if changed_points or vanished:
+        # Новая версия - одна запись в маркер; сервис по ней сбросит кэш поиска
+        write_version_marker(client, collection_name, collection_version)
+        live_version = collection_version
+    save_sync_state(state_file, collection_name, live_version, source_hashes)
+    
+    print(
+        f"✅ Синхронизация за {time.perf_counter() - started:.1f}s: "
+        f"новых {summary['new']}, измененных {summary['changed']}, удалено {summary['deleted']}, "
+        f"без изменений {summary['unchanged']}, без hh_id {summary['skipped']}"
+    )
+    return summary
 
 async def test_search(client: QdrantClient, collection_name: str, test_embedding: np.ndarray):
     """Тестирует поиск в созданной коллекции."""
@@ -253,11 +738,50 @@ async def test_search(client: QdrantClient, collection_name: str, test_embedding
         print(f"❌ Ошибка тестирования поиска: {e}")
         return False
 
+def connect_qdrant() -> Optional[QdrantClient]:
+    """Подключается к Qdrant; None - недоступен."""
+    print(f"🔗 Подключаемся к Qdrant: {QDRANT_URL} ({'gRPC' if PREFER_GRPC else 'HTTP'})")
+    try:
+        client = QdrantClient(url=QDRANT_URL, prefer_grpc=PREFER_GRPC, grpc_port=settings.qdrant_grpc_port)
+        
+        # Проверяем подключение
+        client.get_collections()
+        print(f"✅ Подключение к Qdrant установлено")
+        return client
+        
+    except Exception as e:
+        print(f"❌ Ошибка подключения к Qdrant: {e}")
+        print("💡 Убедитесь, что Qdrant запущен: docker-compose up -d")
+        return None
+
 async def main():
     """Основная функция для загрузки в Qdrant."""
+    parser = argparse.ArgumentParser(description="Загрузка эмбеддингов в Qdrant")
+    parser.add_argument("--bulk", action="store_true", help="загрузка без индексации, HNSW строится в конце")
+    parser.add_argument("--memmap", action="store_true", help="хранить векторы на диске (mmap), как QDRANT_VECTORS_ON_DISK")
+    parser.add_argument("--sync", action="store_true", help="обновить текущую коллекцию только изменениями")
+    parser.add_argument("--stream", metavar="DIR", help="потоковый каталог: шарды .npy + payloads.parquet")
+    parser.add_argument("--snapshot", metavar="DIR", help="после загрузки сохранить снапшот коллекции в DIR")
+    parser.add_argument("--rollback", action="store_true", help="переключить алиас на предыдущую версию и выйти")
+    parser.add_argument("--keep", type=int, default=KEEP_COLLECTIONS, help="сколько версий коллекции хранить")
+    args = parser.parse_args()
+    
+    if args.rollback:
+        qdrant_client = connect_qdrant()
+        if qdrant_client is not None:
+            rollback_alias(qdrant_client, COLLECTION_NAME)
+        return
+    
     print("🚀 ЗАГРУЗКА ЭМБЕДДИНГОВ В QDRANT")
     print("=" * 50)
     
+    if args.stream:
+        if args.sync or args.bulk:
+            print("❌ --stream не сочетается с --sync и --bulk")
+            return
+        await stream_main(args)
+        return
+    
     # Проверяем наличие входного файла
     if not Path(INPUT_FILE).exists():
         print(f"❌ Файл {INPUT_FILE} не найден!")
@@ -271,7 +795,7 @@ async def main():
             data = pickle.load(f)
         
         df = data['dataframe']
-        embeddings = data['embeddings']
+        embeddings = load_embeddings(data)
         metadata = data['metadata']
         
         print(f"✅ Загружено:")
@@ -290,44 +814,150 @@ async def main():
         return
     
     # Подключаемся к Qdrant
-    print(f"🔗 Подключаемся к Qdrant: {QDRANT_URL}")
-    try:
-        qdrant_client = QdrantClient(url=QDRANT_URL)
-        
-        # Проверяем подключение
-        collections = qdrant_client.get_collections()
-        print(f"✅ Подключение к Qdrant установлено")
-        
-    except Exception as e:
-        print(f"❌ Ошибка подключения к Qdrant: {e}")
-        print("💡 Убедитесь, что Qdrant запущен: docker-compose up -d")
+    qdrant_client = connect_qdrant()
+    if qdrant_client is None:
         return
     
+    collection_version = datetime.now().strftime("%Y%m%d%H%M%S")
+    print(f"🏷️  Версия коллекции: {collection_version}")
+    
+    if args.sync:
+        live_collection = get_alias_target(qdrant_client, COLLECTION_NAME)
+        if live_collection is None and qdrant_client.collection_exists(COLLECTION_NAME):
+            live_collection = COLLECTION_NAME
+        if live_collection is not None:
+            await sync_to_qdrant(
+                qdrant_client, live_collection, df, embeddings, collection_version, state_file=SYNC_STATE_FILE
+            )
+            return
+        print(f"⚠️  Коллекции '{COLLECTION_NAME}' еще нет - выполняем полную загрузку")
+    
+    # Новая версия коллекции; алиас COLLECTION_NAME пока указывает на прежнюю
+    target_collection = versioned_collection_name(COLLECTION_NAME, collection_version)
+    
     # Настраиваем коллекцию
     try:
         vector_dim = embeddings.shape[1]
-        await setup_qdrant_collection(qdrant_client, COLLECTION_NAME, vector_dim)
+        await setup_qdrant_collection(
+            qdrant_client,
+            target_collection,
+            vector_dim,
+            quantization_config=build_quantization_config(QUANTIZATION, QUANTIZATION_ALWAYS_RAM),
+            on_disk=VECTORS_ON_DISK or args.memmap,
+            # m=0 - граф не строится во время загрузки, включается в bulk_upload_to_qdrant
+            hnsw_m=0 if args.bulk else HNSW_M,
+        )
     except Exception as e:
         print(f"❌ Ошибка настройки коллекции: {e}")
         return
     
-    # Загружаем данные
+    # Загружаем данные и ждем индексации
     try:
-        await upload_to_qdrant(qdrant_client, COLLECTION_NAME, df, embeddings)
+        if args.bulk:
+            await bulk_upload_to_qdrant(qdrant_client, target_collection, df, embeddings, collection_version=collection_version)
+        else:
+            await upload_to_qdrant(qdrant_client, target_collection, df, embeddings, collection_version=collection_version)
+            wait_for_indexing(qdrant_client, target_collection)
     except Exception as e:
         print(f"❌ Ошибка загрузки данных: {e}")
-        return
+        print(f"💡 Алиас '{COLLECTION_NAME}' не изменен, недогруженная коллекция удаляется")
+        qdrant_client.delete_collection(target_collection)
+        sys.exit(1)
     
     # Тестируем поиск
-    test_success = await test_search(qdrant_client, COLLECTION_NAME, embeddings)
+    test_success = await test_search(qdrant_client, target_collection, embeddings)
+    if not test_success:
+        print(f"❌ Тест поиска не прошел - алиас '{COLLECTION_NAME}' не переключен")
+        qdrant_client.delete_collection(target_collection)
+        sys.exit(1)
+    
+    # Переключаем алиас и удаляем лишние старые версии
+    previous_collection = swap_alias(qdrant_client, COLLECTION_NAME, target_collection)
+    garbage_collect_versions(qdrant_client, COLLECTION_NAME, keep=args.keep)
+    if args.snapshot:
+        save_snapshot(qdrant_client, args.snapshot)
     
     # Итоговая статистика
     print(f"\n🎉 ЗАГРУЗКА ЗАВЕРШЕНА!")
     print(f"   📊 Обработано записей: {len(df):,}")
     print(f"   🤖 Загружено эмбеддингов: {len(embeddings):,}")
-    print(f"   🗄️ Коллекция Qdrant: {COLLECTION_NAME}")
-    print(f"   🔍 Тест поиска: {'✅ Прошел' if test_success else '❌ Не прошел'}")
+    print(f"   🗄️ Коллекция Qdrant: {target_collection} (алиас {COLLECTION_NAME})")
+    if previous_collection:
+        print(f"   ↩️  Откат: python scripts/load_to_qdrant.py --rollback (на {previous_collection})")
     print(f"   🌐 Qdrant Dashboard: {QDRANT_URL}/dashboard")
+    print(f"   🧠 Пиковый RSS: {peak_rss_mb():.0f} МБ")
+
+def save_snapshot(client: QdrantClient, output_dir: str):
+    """Снапшот новой версии - артефакт для развертывания на других хостах без переиндексации."""
+    # qdrant_snapshot сам импортирует этот модуль - импорт здесь, а не наверху
+    from scripts.qdrant_snapshot import SNAPSHOT_TIMEOUT, export_snapshot
+    
+    try:
+        with httpx.Client(base_url=QDRANT_URL, timeout=SNAPSHOT_TIMEOUT) as http:
+            path = export_snapshot(client, http, COLLECTION_NAME, output_dir)
+        print(f"   📸 Развертывание: python scripts/qdrant_snapshot.py deploy {path}")
+    except Exception as e:
+        print(f"⚠️  Не удалось сохранить снапшот (коллекция уже под алиасом): {e}")
+
+async def stream_main(args):
+    """Полная загрузка из потокового каталога в новую версию коллекции с переключением алиаса."""
+    try:
+        stream = EmbeddingStream(args.stream)
+    except Exception as e:
+        print(f"❌ Ошибка открытия потокового каталога {args.stream}: {e}")
+        return
+    print(f"✅ Поток {args.stream}: {stream.count} записей, размерность {stream.dimensions}, "
+          f"шардов {len(stream.manifest['shards'])}, модель {stream.manifest.get('model', '?')}")
+    
+    qdrant_client = connect_qdrant()
+    if qdrant_client is None:
+        return
+    
+    collection_version = datetime.now().strftime("%Y%m%d%H%M%S")
+    target_collection = versioned_collection_name(COLLECTION_NAME, collection_version)
+    print(f"🏷️  Версия коллекции: {collection_version}")
+    
+    try:
+        await setup_qdrant_collection(
+            qdrant_client,
+            target_collection,
+            stream.dimensions,
+            quantization_config=build_quantization_config(QUANTIZATION, QUANTIZATION_ALWAYS_RAM),
+            on_disk=VECTORS_ON_DISK or args.memmap,
+        )
+    except Exception as e:
+        print(f"❌ Ошибка настройки коллекции: {e}")
+        return
+    
+    started = time.perf_counter()
+    try:
+        uploaded = await stream_upload_to_qdrant(
+            qdrant_client, target_collection, stream, collection_version=collection_version
+        )
+        wait_for_indexing(qdrant_client, target_collection)
+    except Exception as e:
+        print(f"❌ Ошибка загрузки данных: {e}")
+        print(f"💡 Алиас '{COLLECTION_NAME}' не изменен, недогруженная коллекция удаляется")
+        qdrant_client.delete_collection(target_collection)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    
+    if not await test_search(qdrant_client, target_collection, stream.vectors(0, 1)):
+        print(f"❌ Тест поиска не прошел - алиас '{COLLECTION_NAME}' не переключен")
+        qdrant_client.delete_collection(target_collection)
+        sys.exit(1)
+    
+    previous_collection = swap_alias(qdrant_client, COLLECTION_NAME, target_collection)
+    garbage_collect_versions(qdrant_client, COLLECTION_NAME, keep=args.keep)
+    if args.snapshot:
+        save_snapshot(qdrant_client, args.snapshot)
+    
+    print("\n🎉 ПОТОКОВАЯ ЗАГРУЗКА ЗАВЕРШЕНА!")
+    print(f"   📊 Загружено точек: {uploaded:,} за {elapsed:.1f}s ({uploaded / elapsed if elapsed else 0:.0f} точек/с)")
+    print(f"   🗄️ Коллекция Qdrant: {target_collection} (алиас {COLLECTION_NAME})")
+    if previous_collection:
+        print(f"   ↩️  Откат: python scripts/load_to_qdrant.py --rollback (на {previous_collection})")
+    print(f"   🧠 Пиковый RSS: {peak_rss_mb():.0f} МБ")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
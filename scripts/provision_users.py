@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Массовое создание пользователей из CSV файла (колонки: login,email,password).
+Использование: python scripts/provision_users.py users.csv [--workers N] [--chunk-size N] [--errors errors.csv]
+"""
+import argparse
+import asyncio
+import csv
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.application.auth.use_cases.provision_users import (
+    ProvisionRowError,
+    ProvisionUserRow,
+    ProvisionUsersUseCase,
+)
+from app.core.db import async_session_factory, engine
+from app.core.settings import settings
+from app.infrastructure.auth.password import PasswordHasher
+from app.infrastructure.db.repositories.user_repository import SqlAlchemyUserRepository
+
+
+def read_rows(path: Path) -> List[ProvisionUserRow]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [
+            ProvisionUserRow(
+                login=(row.get("login") or "").strip(),
+                email=(row.get("email") or "").strip(),
+                password=row.get("password") or "",
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Массовое создание пользователей")
+    parser.add_argument("csv_file", type=Path)
+    parser.add_argument("--workers", type=int, default=settings.provisioning_hash_workers or None)
+    parser.add_argument("--chunk-size", type=int, default=settings.provisioning_chunk_size)
+    parser.add_argument("--errors", type=Path, help="CSV для построчных ошибок")
+    args = parser.parse_args()
+
+    if not args.csv_file.exists():
+        print(f"❌ Файл {args.csv_file} не найден!")
+        return
+
+    rows = read_rows(args.csv_file)
+    print(f"📂 Загружено {len(rows)} строк из {args.csv_file}")
+
+    errors: List[ProvisionRowError] = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        async with async_session_factory() as session:
+            use_case = ProvisionUsersUseCase(
+                user_repository=SqlAlchemyUserRepository(session),
+                password_hasher=PasswordHasher(),
+                executor=executor,
+                chunk_size=args.chunk_size,
+            )
+            async for progress in use_case.execute(rows):
+                errors.extend(progress.errors)
+                rate = progress.processed / max(time.perf_counter() - started, 1e-9)
+                print(
+                    f"   📦 {progress.processed}/{progress.total}: "
+                    f"создано {progress.created}, ошибок {progress.failed} ({rate:.0f} строк/с)"
+                )
+    await engine.dispose()
+
+    for error in errors[:20]:
+        print(f"   ⚠️  строка {error.row} ({error.login}): {error.reason}")
+    if len(errors) > 20:
+        print(f"   ... и ещё {len(errors) - 20} ошибок")
+
+    if args.errors and errors:
+        with open(args.errors, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["row", "login", "reason"])
+            writer.writerows((e.row, e.login, e.reason) for e in errors)
+        print(f"💾 Ошибки сохранены в {args.errors}")
+
+    print(f"\n🎉 ГОТОВО за {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
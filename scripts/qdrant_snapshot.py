@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Снапшоты коллекции Qdrant: сборка один раз, развертывание на хостах без переиндексации.
+Использование:
+  python scripts/qdrant_snapshot.py export [--output snapshots]       # снапшот коллекции под алиасом
+  python scripts/qdrant_snapshot.py deploy FILE.snapshot [--keep 2]   # восстановление + переключение алиаса
+
+export скачивает снапшот текущей версии (<QDRANT_COLLECTION>_v<версия>) в файл и пишет рядом
+FILE.snapshot.json (версия, число точек, sha256). То же делает load_to_qdrant.py --snapshot DIR после загрузки.
+deploy загружает файл в новую коллекцию <QDRANT_COLLECTION>_v<версия> (HNSW уже построен в снапшоте),
+проверяет число точек и поиск, атомарно переключает алиас и удаляет лишние старые версии.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+from qdrant_client import QdrantClient
+
+# Добавляем путь к проекту
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.load_to_qdrant import (
+    COLLECTION_NAME,
+    KEEP_COLLECTIONS,
+    QDRANT_URL,
+    connect_qdrant,
+    garbage_collect_versions,
+    get_alias_target,
+    read_collection_version,
+    swap_alias,
+    versioned_collection_name,
+    wait_for_indexing,
+)
+
+SNAPSHOT_DIR = os.getenv("QDRANT_SNAPSHOT_DIR", "snapshots")
+# Снапшоты большие - скачивание и загрузка идут дольше обычных запросов
+SNAPSHOT_TIMEOUT = float(os.getenv("QDRANT_SNAPSHOT_TIMEOUT", "1800"))
+CHUNK_SIZE = 1024 * 1024
+
+
+def manifest_path(snapshot_path: Path) -> Path:
+    return snapshot_path.with_name(snapshot_path.name + ".json")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collection_version(client: QdrantClient, collection_name: str) -> str:
+    """Версия коллекции (маркер или payload точек); для коллекций без нее - суффикс имени _v<версия>."""
+    version = read_collection_version(client, collection_name)
+    if version:
+        return version
+    return collection_name.rsplit("_v", 1)[-1] if "_v" in collection_name else datetime.now().strftime("%Y%m%d%H%M%S")
+
+
+def export_snapshot(
+    client: QdrantClient, http: httpx.Client, alias: str = COLLECTION_NAME, output_dir: str = SNAPSHOT_DIR
+) -> Path:
+    """Создает снапшот коллекции под алиасом, скачивает его в output_dir и пишет манифест рядом."""
+    collection_name = get_alias_target(client, alias) or alias
+    version = collection_version(client, collection_name)
+    points_count = client.get_collection(collection_name).points_count
+
+    print(f"📸 Создаем снапшот коллекции '{collection_name}' (версия {version}, {points_count} точек)...")
+    snapshot = client.create_snapshot(collection_name, wait=True)
+
+    target = Path(output_dir) / f"{versioned_collection_name(alias, version)}.snapshot"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    try:
+        # Скачиваем потоком: снапшот не помещается в память целиком
+        with http.stream("GET", f"/collections/{collection_name}/snapshots/{snapshot.name}") as response:
+            response.raise_for_status()
+            with open(target, "wb") as f:
+                for chunk in response.iter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+    finally:
+        # Артефакт теперь в файле - копию на сервере не держим
+        client.delete_snapshot(collection_name, snapshot.name)
+
+    checksum = digest.hexdigest()
+    if snapshot.checksum and snapshot.checksum != checksum:
+        target.unlink()
+        raise ValueError(f"Контрольная сумма скачанного снапшота не совпадает с серверной ({snapshot.name})")
+
+    manifest = {
+        "alias": alias,
+        "version": version,
+        "source_collection": collection_name,
+        "points_count": points_count,
+        "sha256": checksum,
+        "size_bytes": target.stat().st_size,
+        "created_at": datetime.now().isoformat(),
+    }
+    manifest_path(target).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ Снапшот {target} ({manifest['size_bytes'] / 1024 / 1024:.1f} МБ), манифест {manifest_path(target).name}")
+    return target
+
+
+def load_manifest(snapshot_path: Path) -> Dict[str, Any]:
+    path = manifest_path(snapshot_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Нет манифеста {path} - снапшот собран не через export?")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def smoke_search(client: QdrantClient, collection_name: str) -> bool:
+    """Поиск по вектору одной из точек должен находить ее же."""
+    points, _ = client.scroll(collection_name, limit=2, with_vectors=["tasks"])
+    # Маркер версии (после --sync) без вектора
+    points = [point for point in points if point.vector and "tasks" in point.vector]
+    if not points:
+        return False
+    hits = client.search(collection_name, query_vector=("tasks", points[0].vector["tasks"]), limit=3)
+    return any(hit.id == points[0].id for hit in hits)
+
+
+def deploy_snapshot(
+    client: QdrantClient,
+    http: httpx.Client,
+    snapshot_path: str,
+    alias: str = COLLECTION_NAME,
+    keep: int = KEEP_COLLECTIONS
+) -> str:
+    """
+    Восстанавливает снапшот в новую коллекцию <alias>_v<версия> и переключает на нее алиас.
+    Если проверки не прошли, коллекция удаляется, а алиас остается на прежней версии.
+    """
+    path = Path(snapshot_path)
+    manifest = load_manifest(path)
+    checksum = file_sha256(path)
+    if checksum != manifest["sha256"]:
+        raise ValueError(f"Файл {path} поврежден: sha256 {checksum} != {manifest['sha256']} из манифеста")
+
+    target_collection = versioned_collection_name(alias, manifest["version"])
+    if client.collection_exists(target_collection):
+        if get_alias_target(client, alias) == target_collection:
+            print(f"✅ Алиас '{alias}' уже указывает на {target_collection}")
+            return target_collection
+        raise RuntimeError(f"Коллекция {target_collection} уже есть, но не под алиасом - "
+                           f"удалите ее или используйте load_to_qdrant.py --rollback")
+
+    print(f"📦 Восстанавливаем {path.name} в '{target_collection}'...")
+    with open(path, "rb") as f:
+        # priority=snapshot: данные и индекс берутся из снапшота как есть; checksum проверяет сервер
+        response = http.post(
+            f"/collections/{target_collection}/snapshots/upload",
+            params={"priority": "snapshot", "wait": "true", "checksum": checksum},
+            files={"snapshot": (path.name, f, "application/octet-stream")},
+        )
+    response.raise_for_status()
+
+    try:
+        wait_for_indexing(client, target_collection)
+        points_count = client.get_collection(target_collection).points_count
+        if points_count != manifest["points_count"]:
+            raise RuntimeError(f"В коллекции {points_count} точек, в манифесте {manifest['points_count']}")
+        if not smoke_search(client, target_collection):
+            raise RuntimeError("Тестовый поиск не нашел точку по ее собственному вектору")
+    except Exception:
+        print(f"💡 Алиас '{alias}' не изменен, восстановленная коллекция удаляется")
+        client.delete_collection(target_collection)
+        raise
+
+    swap_alias(client, alias, target_collection)
+    garbage_collect_versions(client, alias, keep=keep)
+    return target_collection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Снапшоты коллекции Qdrant")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="снапшот коллекции под алиасом в файл")
+    export_parser.add_argument("--output", default=SNAPSHOT_DIR)
+    deploy_parser = commands.add_parser("deploy", help="восстановить снапшот и переключить алиас")
+    deploy_parser.add_argument("snapshot", help="файл .snapshot (рядом должен лежать .snapshot.json)")
+    deploy_parser.add_argument("--keep", type=int, default=KEEP_COLLECTIONS, help="сколько версий коллекции хранить")
+    args = parser.parse_args()
+
+    client = connect_qdrant()
+    if client is None:
+        return
+
+    with httpx.Client(base_url=QDRANT_URL, timeout=SNAPSHOT_TIMEOUT) as http:
+        try:
+            if args.command == "export":
+                export_snapshot(client, http, output_dir=args.output)
+            else:
+                target = deploy_snapshot(client, http, args.snapshot, keep=args.keep)
+                print(f"🎉 Развернута версия {target} (алиас {COLLECTION_NAME})")
+        except Exception as e:
+            print(f"❌ Ошибка {args.command}: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -60,11 +60,11 @@ async def test_qdrant_service():
     service = QdrantService()
     
     # Проверка подключения
-    if not service.test_connection():
+    if not await service.test_connection():
         print("❌ Не удалось подключиться к Qdrant")
         return False
     
-    if not service.check_collection():
+    if not await service.check_collection():
         print("❌ Коллекция vacancies_tasks не найдена")
         return False
     
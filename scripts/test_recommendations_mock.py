@@ -77,13 +77,13 @@ async def test_qdrant_connection_only():
     service = QdrantService()
     
     # Проверка подключения
-    if not service.test_connection():
+    if not await service.test_connection():
         print("⚠️ Qdrant недоступен. Проверьте:")
         print("   1. docker-compose up -d")
         print("   2. http://localhost:6333/health")
         return False
     
-    if not service.check_collection():
+    if not await service.check_collection():
         print("⚠️ Коллекция vacancies_tasks не найдена.")
         print("   Запустите: make load-vacancies")
         return False
@@ -146,12 +146,12 @@ async def test_architecture_demo():
     print("\n🔍 Шаг 2: Проверка Qdrant")
     qdrant_service = QdrantService()
     
-    if not qdrant_service.test_connection():
+    if not await qdrant_service.test_connection():
         print("⚠️ Qdrant недоступен - пропускаем реальный поиск")
         print("🎯 Архитектура готова, нужно только запустить Qdrant и загрузить данные")
         return True
     
-    if not qdrant_service.check_collection():
+    if not await qdrant_service.check_collection():
         print("⚠️ Коллекция не найдена - пропускаем поиск")
         print("🎯 Архитектура готова, нужно только загрузить данные вакансий")
         return True
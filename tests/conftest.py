@@ -0,0 +1,6 @@
+"""
+Shared test setup: the on-disk embedding cache is disabled so the suite does not leave SQLite files in the repo
+"""
+import os
+
+os.environ["EMBEDDING_CACHE_PATH"] = ""
@@ -1,15 +1,23 @@
 import os
 import sys
 import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.api.v1.routes.auth import register_user, login_user
-from app.domain.auth.entities import User
-from app.domain.auth.repositories import UserRepository
-from app.schemas.auth import UserRegisterRequest, UserLoginRequest
+from app.api.v1.routes.auth import get_client_ip, register_user, login_user, refresh_tokens
+from app.domain.auth.entities import RefreshToken, User
+from app.domain.auth.repositories import RefreshTokenRepository, UserRepository
+from app.infrastructure.auth.jwt import decode_access_token
+from app.schemas.auth import UserRegisterRequest, UserLoginRequest, RefreshTokenRequest
+
+
+def make_request(client_host="203.0.113.7", forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (client_host, 50000), "headers": headers})
 
 
 class InMemoryUserRepository(UserRepository):
@@ -30,13 +38,64 @@ class InMemoryUserRepository(UserRepository):
         self.users[login] = user
         return user
 
+    async def find_existing(self, logins, emails):
+        logins, emails = set(logins), set(emails)
+        taken = [u for u in self.users.values() if u.login in logins or u.email in emails]
+        return {u.login for u in taken}, {u.email for u in taken}
+
+    async def bulk_create(self, users):
+        created = set()
+        for login, email, password_hash in users:
+            if login in self.users or await self.get_by_email(email):
+                continue
+            await self.create(login, email, password_hash)
+            created.add(login)
+        return created
+
+
+class InMemoryRefreshTokenRepository(RefreshTokenRepository):
+    def __init__(self) -> None:
+        self.tokens: dict[str, RefreshToken] = {}
+
+    async def create(self, user_id: str, token_hash: str, family_id: str, expires_at: datetime) -> RefreshToken:
+        token = RefreshToken(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id,
+            created_at=datetime.now(timezone.utc),
+            expires_at=expires_at,
+        )
+        self.tokens[token.id] = token
+        return token
+
+    async def get_by_hash(self, token_hash: str):
+        for token in self.tokens.values():
+            if token.token_hash == token_hash:
+                return token
+        return None
+
+    async def revoke(self, token_id: str) -> bool:
+        token = self.tokens[token_id]
+        if token.revoked_at is not None:
+            return False
+        token.revoked_at = datetime.now(timezone.utc)
+        return True
+
+    async def revoke_family(self, family_id: str) -> None:
+        for token in self.tokens.values():
+            if token.family_id == family_id and token.revoked_at is None:
+                token.revoked_at = datetime.now(timezone.utc)
+
 
 def test_register_and_login():
     repo = InMemoryUserRepository()
+    refresh_repo = InMemoryRefreshTokenRepository()
     response = asyncio.run(
         register_user(
             UserRegisterRequest(login="user1", email="user1@example.com", password="secret"),
             repo=repo,
+            refresh_repo=refresh_repo,
         )
     )
     assert response.access_token
@@ -44,7 +103,9 @@ def test_register_and_login():
     response = asyncio.run(
         login_user(
             UserLoginRequest(login="user1", password="secret"),
+            request=make_request(),
             repo=repo,
+            refresh_repo=refresh_repo,
         )
     )
     assert response.access_token
@@ -52,16 +113,98 @@ def test_register_and_login():
 
 def test_login_wrong_password():
     repo = InMemoryUserRepository()
+    refresh_repo = InMemoryRefreshTokenRepository()
     asyncio.run(
         register_user(
             UserRegisterRequest(login="user2", email="user2@example.com", password="secret"),
             repo=repo,
+            refresh_repo=refresh_repo,
         )
     )
     with pytest.raises(HTTPException):
         asyncio.run(
             login_user(
                 UserLoginRequest(login="user2", password="wrong"),
+                request=make_request(),
                 repo=repo,
+                refresh_repo=refresh_repo,
             )
         )
+
+
+def test_refresh_rotates_token():
+    repo = InMemoryUserRepository()
+    refresh_repo = InMemoryRefreshTokenRepository()
+    response = asyncio.run(
+        register_user(
+            UserRegisterRequest(login="user3", email="user3@example.com", password="secret"),
+            repo=repo,
+            refresh_repo=refresh_repo,
+        )
+    )
+    assert response.refresh_token
+    assert all(t.token_hash != response.refresh_token for t in refresh_repo.tokens.values())
+
+    refreshed = asyncio.run(
+        refresh_tokens(RefreshTokenRequest(refresh_token=response.refresh_token), refresh_repo=refresh_repo)
+    )
+    assert decode_access_token(refreshed.access_token) == "user3"
+    assert refreshed.refresh_token != response.refresh_token
+
+    # The rotated token keeps working
+    refreshed_again = asyncio.run(
+        refresh_tokens(RefreshTokenRequest(refresh_token=refreshed.refresh_token), refresh_repo=refresh_repo)
+    )
+    assert refreshed_again.access_token
+
+
+def test_refresh_token_reuse_revokes_family():
+    repo = InMemoryUserRepository()
+    refresh_repo = InMemoryRefreshTokenRepository()
+    response = asyncio.run(
+        register_user(
+            UserRegisterRequest(login="user4", email="user4@example.com", password="secret"),
+            repo=repo,
+            refresh_repo=refresh_repo,
+        )
+    )
+    refreshed = asyncio.run(
+        refresh_tokens(RefreshTokenRequest(refresh_token=response.refresh_token), refresh_repo=refresh_repo)
+    )
+
+    # Replaying the old token is treated as theft
+    with pytest.raises(HTTPException):
+        asyncio.run(
+            refresh_tokens(RefreshTokenRequest(refresh_token=response.refresh_token), refresh_repo=refresh_repo)
+        )
+    # ...and the legitimately rotated token is revoked as well
+    with pytest.raises(HTTPException):
+        asyncio.run(
+            refresh_tokens(RefreshTokenRequest(refresh_token=refreshed.refresh_token), refresh_repo=refresh_repo)
+        )
+
+
+def test_expired_refresh_token_rejected():
+    refresh_repo = InMemoryRefreshTokenRepository()
+    response = asyncio.run(
+        register_user(
+            UserRegisterRequest(login="user5", email="user5@example.com", password="secret"),
+            repo=InMemoryUserRepository(),
+            refresh_repo=refresh_repo,
+        )
+    )
+    for token in refresh_repo.tokens.values():
+        token.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(HTTPException):
+        asyncio.run(
+            refresh_tokens(RefreshTokenRequest(refresh_token=response.refresh_token), refresh_repo=refresh_repo)
+        )
+
+
+def test_client_ip_comes_from_forwarded_for_only_behind_trusted_proxy():
+    # Прямой клиент не может подменить адрес заголовком
+    assert get_client_ip(make_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+    # За nginx (docker-сеть) берется адрес, который nginx дописал последним
+    assert get_client_ip(make_request("172.18.0.5", "198.51.100.1")) == "198.51.100.1"
+    assert get_client_ip(make_request("172.18.0.5", "1.2.3.4, 198.51.100.1")) == "198.51.100.1"
+    assert get_client_ip(make_request("172.18.0.5")) == "172.18.0.5"
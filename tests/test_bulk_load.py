@@ -0,0 +1,24 @@
+"""
+Tests for the bulk-load mode of scripts/load_to_qdrant.py, on the local in-memory client
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+from qdrant_client import QdrantClient
+
+from scripts.load_to_qdrant import bulk_upload_to_qdrant, setup_qdrant_collection
+
+
+def test_bulk_load_uploads_points_and_enables_hnsw():
+    client = QdrantClient(":memory:")
+    asyncio.run(setup_qdrant_collection(client, "vacancies", 3, hnsw_m=0))
+    df = pd.DataFrame({"hh_id": ["1", "2", ""], "title": ["Python", "Go", "Без id"], "category": ["x", "x", "y"]})
+
+    timings = asyncio.run(bulk_upload_to_qdrant(
+        client, "vacancies", df, np.eye(3, dtype=np.float32), collection_version="v1", hnsw_m=16, parallel=1
+    ))
+
+    assert set(timings) == {"prepare", "upload", "index"}
+    assert client.count("vacancies").count == 2
+    assert client.get_collection("vacancies").config.hnsw_config.m == 16
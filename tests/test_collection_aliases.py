@@ -0,0 +1,94 @@
+"""
+Tests for versioned collections behind a Qdrant alias (scripts/load_to_qdrant.py), on the local in-memory client
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from scripts.load_to_qdrant import (
+    garbage_collect_versions,
+    get_alias_target,
+    list_collection_versions,
+    rollback_alias,
+    swap_alias,
+    upload_to_qdrant,
+    versioned_collection_name,
+)
+
+ALIAS = "vacancies_test"
+
+
+def make_client(*versions):
+    client = QdrantClient(":memory:")
+    for version in versions:
+        client.create_collection(
+            versioned_collection_name(ALIAS, version),
+            vectors_config={"tasks": VectorParams(size=2, distance=Distance.COSINE)},
+        )
+    return client
+
+
+def test_swap_repoints_alias_and_returns_previous():
+    client = make_client("20250101000000", "20250201000000")
+
+    assert swap_alias(client, ALIAS, "vacancies_test_v20250101000000") is None
+    assert swap_alias(client, ALIAS, "vacancies_test_v20250201000000") == "vacancies_test_v20250101000000"
+    assert get_alias_target(client, ALIAS) == "vacancies_test_v20250201000000"
+    assert client.collection_exists("vacancies_test_v20250101000000")
+
+
+def test_swap_migrates_plain_collection_to_alias():
+    client = make_client("20250101000000")
+    client.create_collection(ALIAS, vectors_config={"tasks": VectorParams(size=2, distance=Distance.COSINE)})
+
+    swap_alias(client, ALIAS, "vacancies_test_v20250101000000")
+
+    assert get_alias_target(client, ALIAS) == "vacancies_test_v20250101000000"
+
+
+def test_rollback_points_alias_to_previous_version():
+    client = make_client("20250101000000", "20250201000000")
+    swap_alias(client, ALIAS, "vacancies_test_v20250201000000")
+
+    assert rollback_alias(client, ALIAS) == "vacancies_test_v20250101000000"
+    assert get_alias_target(client, ALIAS) == "vacancies_test_v20250101000000"
+    assert rollback_alias(client, ALIAS) is None
+
+
+def test_garbage_collection_keeps_recent_versions_and_alias_target():
+    client = make_client("20250101000000", "20250201000000", "20250301000000", "20250401000000")
+    swap_alias(client, ALIAS, "vacancies_test_v20250101000000")
+
+    removed = garbage_collect_versions(client, ALIAS, keep=2)
+
+    assert removed == ["vacancies_test_v20250201000000"]
+    assert list_collection_versions(client, ALIAS) == [
+        "vacancies_test_v20250101000000",
+        "vacancies_test_v20250301000000",
+        "vacancies_test_v20250401000000",
+    ]
+
+
+def test_partial_upload_is_rejected_before_alias_swap():
+    client = make_client("20250101000000")
+    upsert = client.upsert
+    calls = []
+
+    def flaky_upsert(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError("qdrant unavailable")
+        return upsert(*args, **kwargs)
+
+    client.upsert = flaky_upsert
+    df = pd.DataFrame({"hh_id": [str(i) for i in range(6)], "title": ["t"] * 6})
+    embeddings = np.random.default_rng(0).normal(size=(6, 2)).astype(np.float32)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(upload_to_qdrant(
+            client, "vacancies_test_v20250101000000", df, embeddings, batch_size=2, in_flight=1
+        ))
@@ -0,0 +1,137 @@
+"""
+Tests for the content-addressed embedding cache
+"""
+import asyncio
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.services.container import ServiceContainer
+from app.services.recommendations import embedding_cache as cache_module
+from app.services.recommendations import embeddings_service as embeddings_module
+from app.services.recommendations.embedding_cache import EmbeddingCache, make_cache_key
+from app.services.recommendations.embedding_providers import EmbeddingProvider
+
+
+class FakeEncoding:
+    def encode(self, text):
+        return list(text.encode("utf-8"))
+
+    def decode(self, ids):
+        return bytes(ids).decode("utf-8", errors="ignore")
+
+
+def test_key_depends_on_model_dimensions_and_normalized_text():
+    base = make_cache_key("text-search-doc", 256, "Разработка ПО")
+    assert make_cache_key("text-search-doc", 256, "  Разработка   ПО \n") == base
+    assert make_cache_key("text-search-query", 256, "Разработка ПО") != base
+    assert make_cache_key("text-search-doc", 128, "Разработка ПО") != base
+
+
+def test_disk_tier_survives_restart_and_dimension_change_invalidates(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    vector = np.arange(256, dtype=np.float64) / 256
+
+    cache = EmbeddingCache("text-search-doc", 256, path=path)
+    cache.put("Аналитика", vector)
+    cache.close()
+
+    reopened = EmbeddingCache("text-search-doc", 256, path=path)
+    disk_hits = metrics.get("embedding_cache_disk_hits_total")
+    cached = reopened.get("Аналитика")
+    assert cached.dtype == np.float32
+    assert np.allclose(cached, vector)
+    assert metrics.get("embedding_cache_disk_hits_total") == disk_hits + 1
+    reopened.close()
+
+    # Другая модель в том же файле не видит чужие векторы и не удаляет их
+    other_model = EmbeddingCache("text-search-query", 256, path=path)
+    assert other_model.get("Аналитика") is None
+    other_model.close()
+    reopened = EmbeddingCache("text-search-doc", 256, path=path)
+    assert reopened.get("Аналитика") is not None
+    reopened.close()
+
+    resized = EmbeddingCache("text-search-doc", 128, path=path)
+    resized.close()
+    assert EmbeddingCache("text-search-doc", 256, path=path).get("Аналитика") is None
+
+
+def test_async_access_runs_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "nested" / "cache.sqlite3")
+    vector = np.arange(256, dtype=np.float32) / 256
+    offloaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(func, *args):
+        offloaded.append(func.__name__)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", recording_to_thread)
+
+    async def run():
+        await EmbeddingCache("text-search-doc", 256, path=path).aput("Аналитика", vector)
+        return await EmbeddingCache("text-search-doc", 256, path=path).aget("Аналитика")
+
+    assert np.allclose(asyncio.run(run()), vector)
+    assert offloaded == ["_disk_put", "_disk_get"]
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = EmbeddingCache("m", 4, max_memory_items=2)
+    for text in ("a", "b", "c"):
+        cache.put(text, np.ones(4))
+    misses = metrics.get("embedding_cache_misses_total")
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert metrics.get("embedding_cache_misses_total") == misses + 1
+
+
+class RecordingClient(EmbeddingProvider):
+    model = "text-search-doc"
+
+    def __init__(self):
+        self.calls = []
+
+    async def embed(self, texts):
+        self.calls.append(texts)
+        return np.ones((len(texts), 256), dtype=np.float32) / 16
+
+
+def test_repeat_profile_needs_no_api_call(monkeypatch):
+    monkeypatch.setattr(embeddings_module.tiktoken, "get_encoding", lambda name: FakeEncoding())
+
+    client = RecordingClient()
+    service = embeddings_module.EmbeddingsService(
+        cache=EmbeddingCache("text-search-doc", 256), client=client
+    )
+    calls = client.calls
+
+    first = asyncio.run(service.create_embedding("Разработка ПО"))
+    second = asyncio.run(service.create_embedding("Разработка ПО "))
+    assert len(calls) == 1
+    assert np.allclose(first, second)
+
+
+class ClosableQdrant:
+    async def close(self):
+        pass
+
+
+def test_shared_cache_is_closed_and_evicted_only_by_container_shutdown(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "embedding_cache_enabled", True)
+    monkeypatch.setattr(settings, "embedding_cache_path", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(cache_module, "_shared_caches", {})
+    cache = cache_module.get_embedding_cache("text-search-doc", 256)
+    service = embeddings_module.EmbeddingsService(client=RecordingClient())
+    assert service.cache is cache
+    container = ServiceContainer(service, ClosableQdrant(), career_consultation_service=None)
+
+    asyncio.run(container.close())
+
+    assert cache._db is None
+    assert cache_module._shared_caches == {}
+    reopened = cache_module.get_embedding_cache("text-search-doc", 256)
+    assert reopened is not cache
+    reopened.close()
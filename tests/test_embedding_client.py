@@ -0,0 +1,112 @@
+"""
+Tests for the shared concurrent embedding client
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from app.core.settings import settings
+from app.services.recommendations import embedding_client
+from app.services.recommendations.embedding_client import AsyncRateLimiter, EmbeddingClient, RedisRateLimiter
+
+
+class FakeResult:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class FakeModel:
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.failures_left = 0
+        self._lock = threading.Lock()
+
+    def run(self, text):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            fail = self.failures_left > 0
+            if fail:
+                self.failures_left -= 1
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if fail:
+            raise RuntimeError("temporary failure")
+        return FakeResult([float(len(text)), 1.0, 0.0])
+
+
+class FakeModels:
+    def __init__(self, model):
+        self.model = model
+        self.handles_created = 0
+
+    def text_embeddings(self, name):
+        self.handles_created += 1
+        return self.model
+
+
+class FakeSDK:
+    def __init__(self, model):
+        self.models = FakeModels(model)
+
+
+def test_embed_runs_concurrently_and_preserves_order():
+    model = FakeModel()
+    sdk = FakeSDK(model)
+    client = EmbeddingClient(sdk, max_concurrency=3)
+    texts = ["a" * n for n in range(1, 11)]
+
+    vecs = asyncio.run(client.embed(texts))
+    vecs_again = asyncio.run(client.embed(texts))
+
+    assert sdk.models.handles_created == 1
+    assert 1 < model.max_active <= 3
+    expected = np.array([[n, 1.0, 0.0] for n in range(1, 11)], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(vecs, expected, atol=1e-6)
+    assert np.allclose(vecs_again, vecs)
+
+
+def test_embed_one_retries_transient_errors(monkeypatch):
+    model = FakeModel(delay=0)
+    model.failures_left = 2
+    client = EmbeddingClient(FakeSDK(model), max_attempts=3, max_backoff=0)
+    vec = asyncio.run(client.embed_one("abc"))
+    assert vec.tolist() == [3.0, 1.0, 0.0]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = AsyncRateLimiter(rate=50, burst=1)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_shared_rate_limiter_uses_redis_when_configured(monkeypatch):
+    monkeypatch.setattr(embedding_client, "_shared_rate_limiter", None)
+    monkeypatch.setattr(settings, "redis_url", "redis://127.0.0.1:1/0")
+    assert isinstance(embedding_client.get_shared_rate_limiter(), RedisRateLimiter)
+
+    monkeypatch.setattr(embedding_client, "_shared_rate_limiter", None)
+    monkeypatch.setattr(settings, "redis_url", "")
+    assert isinstance(embedding_client.get_shared_rate_limiter(), AsyncRateLimiter)
+
+
+def test_redis_rate_limiter_falls_back_when_redis_is_down():
+    limiter = RedisRateLimiter("redis://127.0.0.1:1/0", rate=50, burst=1)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,102 @@
+"""
+Tests for single-flight coalescing and micro-batching of embedding requests
+"""
+import asyncio
+
+import numpy as np
+
+from app.services.recommendations.embedding_dispatcher import EmbeddingDispatcher
+
+
+class RecordingBatchFn:
+    def __init__(self, delay: float = 0.01, error: Exception = None):
+        self.calls = []
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_burst_is_coalesced_into_one_batch():
+    batch_fn = RecordingBatchFn()
+    dispatcher = EmbeddingDispatcher(batch_fn, max_batch_size=32, max_delay=0.005)
+    texts = ["Разработка ПО", "Аналитика", "Разработка  ПО", "Тестирование", "Аналитика"] * 4
+
+    async def run():
+        return await asyncio.gather(*(dispatcher.embed(t) for t in texts))
+
+    results = asyncio.run(run())
+
+    assert len(batch_fn.calls) == 1
+    assert sorted(batch_fn.calls[0]) == sorted(["Разработка ПО", "Аналитика", "Тестирование"])
+    for text, vector in zip(texts, results):
+        assert vector[0] == len(" ".join(text.split()))
+
+
+def test_full_batch_flushes_without_waiting():
+    batch_fn = RecordingBatchFn(delay=0)
+    dispatcher = EmbeddingDispatcher(batch_fn, max_batch_size=2, max_delay=10)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(dispatcher.embed(t) for t in "abcd")), timeout=1)
+
+    asyncio.run(run())
+    assert [len(c) for c in batch_fn.calls] == [2, 2]
+
+
+def test_errors_reach_every_waiter_and_cancellation_is_isolated():
+    failing = EmbeddingDispatcher(RecordingBatchFn(error=RuntimeError("boom")), max_delay=0.001)
+
+    async def run_failing():
+        return await asyncio.gather(failing.embed("x"), failing.embed("x"), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run_failing()))
+
+    batch_fn = RecordingBatchFn(delay=0.02)
+    dispatcher = EmbeddingDispatcher(batch_fn, max_delay=0.001)
+
+    async def run_cancel():
+        first = asyncio.ensure_future(dispatcher.embed("shared"))
+        second = asyncio.ensure_future(dispatcher.embed("shared"))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run_cancel())[0] == len("shared")
+    assert len(batch_fn.calls) == 1
+
+
+def test_failing_text_does_not_fail_the_rest_of_the_batch():
+    async def batch_fn(texts):
+        return [RuntimeError("boom") if text == "bad" else np.array([len(text), 1.0]) for text in texts]
+
+    dispatcher = EmbeddingDispatcher(batch_fn, max_delay=0.001)
+
+    async def run():
+        return await asyncio.gather(dispatcher.embed("good user A"), dispatcher.embed("bad"), return_exceptions=True)
+
+    good, bad = asyncio.run(run())
+    assert good[0] == len("good user A")
+    assert isinstance(bad, RuntimeError)
+
+
+def test_short_batch_result_fails_every_waiter_instead_of_hanging():
+    async def batch_fn(texts):
+        return [np.array([1.0, 1.0])] * (len(texts) - 1)
+
+    dispatcher = EmbeddingDispatcher(batch_fn, max_delay=0.001)
+
+    async def run():
+        results = await asyncio.wait_for(
+            asyncio.gather(dispatcher.embed("a"), dispatcher.embed("b"), return_exceptions=True), timeout=1
+        )
+        return results, dict(dispatcher._inflight)
+
+    results, inflight = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert inflight == {}
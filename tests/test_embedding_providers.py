@@ -0,0 +1,65 @@
+"""
+Tests for the offline embedding provider and provider selection
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.settings import settings
+from app.services.recommendations import embedding_providers
+from app.services.recommendations.embedding_providers import HashingEmbeddingProvider, get_embedding_provider
+from app.services.recommendations.embeddings_service import EmbeddingsService
+
+
+def test_hashing_provider_is_deterministic_and_normalized():
+    provider = HashingEmbeddingProvider(dimensions=64)
+    texts = ["Разработка backend-сервисов на Python", "Анализ данных и SQL", ""]
+
+    first = asyncio.run(provider.embed(texts))
+    second = asyncio.run(HashingEmbeddingProvider(dimensions=64).embed(texts))
+
+    assert first.shape == (3, 64)
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first[:2], axis=1), 1.0, atol=1e-5)
+    assert not first[2].any()
+
+
+def test_hashing_provider_ranks_related_texts_higher():
+    provider = HashingEmbeddingProvider()
+    query, related, unrelated = asyncio.run(provider.embed([
+        "разработка микросервисов на python",
+        "Разрабатывать микросервисы на Python и FastAPI",
+        "Ведение бухгалтерского учета и отчетности",
+    ]))
+
+    assert float(query @ related) > float(query @ unrelated)
+
+
+def test_provider_is_selected_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_provider", "hashing")
+    monkeypatch.setattr(embedding_providers, "_shared_providers", {})
+
+    provider = get_embedding_provider("text-search-doc", 128)
+
+    assert isinstance(provider, HashingEmbeddingProvider)
+    assert provider.dimensions == 128
+    assert get_embedding_provider("text-search-doc", 128) is provider
+
+    monkeypatch.setattr(settings, "embedding_provider", "unknown")
+    with pytest.raises(ValueError):
+        get_embedding_provider("text-search-doc", 128)
+
+
+def test_service_with_local_provider_needs_no_tokenizer(monkeypatch):
+    def fail_get_encoding(name):
+        raise AssertionError("tokenizer must not be loaded for the local provider")
+
+    monkeypatch.setattr("tiktoken.get_encoding", fail_get_encoding)
+    monkeypatch.setattr(settings, "embedding_cache_enabled", False)
+    service = EmbeddingsService(dimensions=32, client=HashingEmbeddingProvider(dimensions=32))
+
+    vector = asyncio.run(service.create_embedding("длинный текст " * 500))
+
+    assert vector.shape == (32,)
+    assert np.isclose(np.linalg.norm(vector), 1.0, atol=1e-5)
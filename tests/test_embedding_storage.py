@@ -0,0 +1,37 @@
+"""
+Tests for compact on-disk storage of offline embeddings
+"""
+import numpy as np
+import pytest
+
+from app.services.recommendations.embedding_storage import decode_embeddings, encode_embeddings, load_embeddings
+
+
+@pytest.fixture
+def embeddings():
+    vectors = np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype, itemsize, atol", [("float32", 4, 0), ("float16", 2, 1e-3), ("int8", 1, 1e-2)])
+def test_round_trip_within_precision(embeddings, dtype, itemsize, atol):
+    stored, scales = encode_embeddings(embeddings, dtype)
+
+    assert stored.dtype.itemsize == itemsize
+    assert (scales is not None) == (dtype == "int8")
+    assert np.allclose(decode_embeddings(stored, scales), embeddings, atol=atol)
+
+
+def test_load_embeddings_reads_int8_file_layout(embeddings):
+    stored, scales = encode_embeddings(embeddings, "int8")
+    data = {"embeddings": stored, "embedding_scales": scales}
+
+    restored = load_embeddings(data)
+
+    assert restored.dtype == np.float32
+    assert np.array_equal(np.argmax(restored @ embeddings.T, axis=1), np.arange(len(embeddings)))
+
+
+def test_unknown_dtype_is_rejected(embeddings):
+    with pytest.raises(ValueError):
+        encode_embeddings(embeddings, "bfloat16")
@@ -0,0 +1,61 @@
+"""
+Tests for the streaming embeddings format (embedding_storage) and the streaming Qdrant upload
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from app.services.recommendations.embedding_storage import (
+    EmbeddingStream,
+    write_embedding_shards,
+    write_embedding_stream,
+    write_stream_manifest,
+)
+
+
+def make_embeddings(rows=10, dim=4):
+    return np.random.default_rng(0).normal(size=(rows, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_vectors_are_sliced_across_shard_boundaries(tmp_path, dtype):
+    embeddings = make_embeddings()
+    shards = write_embedding_shards(str(tmp_path), embeddings, dtype=dtype, shard_rows=3)
+    write_stream_manifest(str(tmp_path), shards, {"dtype": dtype})
+
+    stream = EmbeddingStream(str(tmp_path))
+
+    assert stream.count == 10 and len(shards) == 4
+    assert stream.vectors(2, 8).dtype == np.float32
+    assert np.allclose(stream.vectors(2, 8), embeddings[2:8], atol=0.05)
+    assert np.allclose(stream.vectors(9, 20), embeddings[9:], atol=0.05)
+
+
+def test_stream_upload_writes_every_point(tmp_path):
+    pytest.importorskip("pyarrow")
+    from scripts.load_to_qdrant import stream_upload_to_qdrant
+
+    embeddings = make_embeddings(rows=11)
+    df = pd.DataFrame({
+        "hh_id": [str(i) if i != 3 else "" for i in range(11)],
+        "title": ["t"] * 11,
+        "tasks": [["писать код"]] * 11,
+        "confidence": [0.5] * 11,
+    })
+    write_embedding_stream(str(tmp_path), df, embeddings, {"model": "test"}, shard_rows=4, row_group_rows=3)
+    client = QdrantClient(":memory:")
+    client.create_collection("vacancies", vectors_config={"tasks": VectorParams(size=4, distance=Distance.COSINE)})
+
+    uploaded = asyncio.run(stream_upload_to_qdrant(
+        client, "vacancies", EmbeddingStream(str(tmp_path)), batch_size=2, collection_version="v1", in_flight=1
+    ))
+
+    points, _ = client.scroll("vacancies", limit=20, with_vectors=True)
+    by_hh_id = {point.payload["hh_id"]: point for point in points}
+    assert uploaded == 10 and len(points) == 10
+    assert by_hh_id["7"].payload["tasks_list"] == ["писать код"]
+    assert np.allclose(by_hh_id["7"].vector["tasks"], embeddings[7] / np.linalg.norm(embeddings[7]), atol=1e-6)
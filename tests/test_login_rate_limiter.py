@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.application.auth.use_cases.authenticate_user import AuthenticateUserUseCase
+from app.core.metrics import metrics
+from app.infrastructure.auth.password import PasswordHasher
+from app.infrastructure.auth.rate_limiter import (
+    InMemoryRateLimitStore,
+    LoginRateLimiter,
+    TooManyAttemptsError,
+)
+from tests.test_auth import InMemoryUserRepository
+
+
+class CountingHasher(PasswordHasher):
+    def __init__(self) -> None:
+        self.verify_calls = 0
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        self.verify_calls += 1
+        return super().verify(password, password_hash)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(clock: FakeClock, max_keys: int = 100) -> LoginRateLimiter:
+    return LoginRateLimiter(
+        InMemoryRateLimitStore(max_keys=max_keys),
+        max_attempts_per_login=3,
+        max_attempts_per_ip=5,
+        window_seconds=60,
+        clock=clock,
+    )
+
+
+class SlowUserRepository(InMemoryUserRepository):
+    async def get_by_login(self, login):
+        # Like a real DB round trip: other requests run while this one waits
+        await asyncio.sleep(0)
+        return await super().get_by_login(login)
+
+
+def make_use_case(limiter: LoginRateLimiter, repo_class=InMemoryUserRepository):
+    repo = repo_class()
+    hasher = CountingHasher()
+    asyncio.run(repo.create("user1", "user1@example.com", hasher.hash("secret")))
+    return AuthenticateUserUseCase(user_repository=repo, password_hasher=hasher, rate_limiter=limiter), hasher
+
+
+def test_throttled_login_skips_hashing():
+    use_case, hasher = make_use_case(make_limiter(FakeClock()))
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            asyncio.run(use_case.execute("user1", "wrong", client_ip="10.0.0.1"))
+    assert hasher.verify_calls == 3
+
+    rejected_before = metrics.get("login_rate_limited_total")
+    with pytest.raises(TooManyAttemptsError):
+        asyncio.run(use_case.execute("user1", "secret", client_ip="10.0.0.1"))
+    assert hasher.verify_calls == 3
+    assert metrics.get("login_rate_limited_total") == rejected_before + 1
+
+
+def test_ip_limit_applies_across_logins():
+    use_case, _ = make_use_case(make_limiter(FakeClock()))
+    for i in range(5):
+        with pytest.raises(ValueError):
+            asyncio.run(use_case.execute(f"ghost{i}", "wrong", client_ip="10.0.0.2"))
+    with pytest.raises(TooManyAttemptsError):
+        asyncio.run(use_case.execute("user1", "secret", client_ip="10.0.0.2"))
+    # Another client is not affected
+    assert asyncio.run(use_case.execute("user1", "secret", client_ip="10.0.0.3")).login == "user1"
+
+
+def test_window_slides_and_success_resets():
+    clock = FakeClock()
+    use_case, _ = make_use_case(make_limiter(clock))
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            asyncio.run(use_case.execute("user1", "wrong"))
+    with pytest.raises(TooManyAttemptsError):
+        asyncio.run(use_case.execute("user1", "secret"))
+
+    clock.now += 120
+    assert asyncio.run(use_case.execute("user1", "secret")).login == "user1"
+    with pytest.raises(ValueError):
+        asyncio.run(use_case.execute("user1", "wrong"))
+    assert asyncio.run(use_case.execute("user1", "secret")).login == "user1"
+
+
+def test_store_memory_is_bounded():
+    clock = FakeClock()
+    limiter = make_limiter(clock, max_keys=10)
+    for i in range(100):
+        asyncio.run(limiter.reserve(f"user{i}"))
+    assert len(limiter.store) == 10
+
+
+def test_concurrent_burst_is_throttled_before_hashing():
+    limiter = make_limiter(FakeClock())
+    use_case, hasher = make_use_case(limiter, SlowUserRepository)
+
+    async def burst():
+        return await asyncio.gather(
+            *(use_case.execute("user1", "wrong", client_ip=f"10.1.0.{i}") for i in range(20)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(burst())
+
+    assert hasher.verify_calls <= limiter.max_attempts_per_login
+    assert sum(isinstance(r, TooManyAttemptsError) for r in results) == 20 - hasher.verify_calls
+
+
+def test_successful_logins_do_not_use_up_ip_budget():
+    use_case, _ = make_use_case(make_limiter(FakeClock()))
+    for _ in range(10):
+        assert asyncio.run(use_case.execute("user1", "secret", client_ip="10.0.0.9")).login == "user1"
@@ -0,0 +1,92 @@
+"""
+Tests for column-wise payload preparation and windowed upload in scripts/load_to_qdrant.py
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from scripts.load_to_qdrant import parse_vacancy_data, prepare_payloads, upload_to_qdrant
+
+
+def make_frame():
+    return pd.DataFrame({
+        "hh_id": ["101", None, "", "104", 105],
+        "url": [None, "https://hh.ru/vacancy/202", None, " https://x.ru/104 ", None],
+        "id": ["a", "b", "c", "d", "e"],
+        "title": ["  Python  ", np.nan, "Go", "Java", "Rust"],
+        "company": ["ACME", "ACME", None, "Beta", "Gamma"],
+        "experience": ["Нет опыта", "От 3 до 6 лет", np.nan, "Более 6 лет", ""],
+        "tasks": [["писать код", " "], '["ревью", "тесты"]', "не json", np.nan, []],
+        "tasks_text": [None, "готовый текст", np.nan, "", "rust"],
+        "skills": ['["Python"]', "SQL", " ", ["Go"], np.nan],
+        "category": ["Бэкенд-разработчик", "Бэкенд-разработчик", np.nan, "QA Engineer", "DevOps-инженер"],
+        "confidence": [0.9, np.nan, "0.5", 1, None],
+    })
+
+
+def test_prepare_payloads_matches_row_by_row_parsing():
+    df = make_frame()
+
+    assert prepare_payloads(df) == [parse_vacancy_data(df.iloc[i]) for i in range(len(df))]
+
+
+def test_prepare_payloads_handles_missing_optional_columns():
+    df = pd.DataFrame({"hh_id": ["1"], "title": ["Python"]})
+
+    assert prepare_payloads(df) == [parse_vacancy_data(df.iloc[0])]
+
+
+def test_windowed_upload_writes_every_point_with_numpy_vectors():
+    client = QdrantClient(":memory:")
+    client.create_collection("vacancies", vectors_config={"tasks": VectorParams(size=4, distance=Distance.COSINE)})
+    df = pd.DataFrame({"hh_id": [str(i) if i != 3 else "" for i in range(11)], "title": ["t"] * 11})
+    embeddings = np.random.default_rng(0).normal(size=(11, 4)).astype(np.float32)
+
+    # Локальный клиент не потокобезопасен - окно из одного батча
+    asyncio.run(upload_to_qdrant(client, "vacancies", df, embeddings, batch_size=2, collection_version="v1", in_flight=1))
+
+    points, _ = client.scroll("vacancies", limit=20, with_vectors=True)
+    assert len(points) == 10
+    by_hh_id = {point.payload["hh_id"]: point for point in points}
+    expected = embeddings[7] / np.linalg.norm(embeddings[7])
+    assert np.allclose(by_hh_id["7"].vector["tasks"], expected, atol=1e-6)
+    assert {point.payload["collection_version"] for point in points} == {"v1"}
+
+
+class ConcurrentUpsertClient:
+    """Потокобезопасный фейк: считает точки и максимум одновременных upsert."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.ids = set()
+
+    def upsert(self, collection_name, points):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+            self.ids.update(points.ids)
+
+    def count(self, collection_name, exact=True):
+        return SimpleNamespace(count=len(self.ids))
+
+
+def test_upload_window_bounds_concurrent_batches():
+    client = ConcurrentUpsertClient()
+    df = pd.DataFrame({"hh_id": [str(i) for i in range(20)], "title": ["t"] * 20})
+    embeddings = np.random.default_rng(0).normal(size=(20, 4)).astype(np.float32)
+
+    uploaded = asyncio.run(upload_to_qdrant(client, "vacancies", df, embeddings, batch_size=2, in_flight=3))
+
+    assert uploaded == 20 and len(client.ids) == 20
+    assert client.max_active == 3
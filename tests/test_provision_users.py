@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routes.auth import provision_users
+from app.application.auth.use_cases.provision_users import ProvisionUserRow, ProvisionUsersUseCase
+from app.infrastructure.auth.password import PasswordHasher
+from app.infrastructure.db.repositories import user_repository as user_repository_module
+from app.schemas.auth import BulkProvisionRequest, UserRegisterRequest
+from tests.test_auth import InMemoryUserRepository
+
+
+async def collect(use_case, rows):
+    return [progress async for progress in use_case.execute(rows)]
+
+
+def test_bulk_provisioning_reports_progress_and_row_errors():
+    repo = InMemoryUserRepository()
+    hasher = PasswordHasher()
+    asyncio.run(repo.create("taken", "taken@example.com", hasher.hash("secret")))
+    rows = [
+        ProvisionUserRow("alice", "alice@example.com", "pw1"),
+        ProvisionUserRow("taken", "new@example.com", "pw2"),
+        ProvisionUserRow("bob", "bob@example.com", "pw3"),
+        ProvisionUserRow("alice", "alice2@example.com", "pw4"),
+        ProvisionUserRow("", "empty@example.com", "pw5"),
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        use_case = ProvisionUsersUseCase(repo, hasher, executor=executor, chunk_size=2)
+        progress = asyncio.run(collect(use_case, rows))
+
+    assert [p.processed for p in progress] == [2, 4, 5]
+    assert progress[-1].created == 2
+    assert progress[-1].failed == 3
+    errors = [e for p in progress for e in p.errors]
+    assert {(e.row, e.reason) for e in errors} == {
+        (1, "user already exists"),
+        (3, "duplicate login in import"),
+        (4, "empty login"),
+    }
+    assert hasher.verify("pw3", repo.users["bob"].password_hash)
+
+
+def test_provision_endpoint_requires_key():
+    payload = BulkProvisionRequest(users=[UserRegisterRequest(login="a", email="a@example.com", password="p")])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(provision_users(payload, x_provisioning_key="anything", executor=None))
+    assert exc.value.status_code == 403
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_bulk_create_splits_insert_under_bind_parameter_limit(monkeypatch):
+    monkeypatch.setattr(user_repository_module, "MAX_BIND_PARAMS", 40)
+    session = RecordingSession()
+    repo = user_repository_module.SqlAlchemyUserRepository(session)
+    users = [(f"u{i}", f"u{i}@example.com", "hash") for i in range(25)]
+
+    asyncio.run(repo.bulk_create(users))
+
+    # 40 // 4 = 10 строк на INSERT
+    assert [len(stmt.compile().params) // 4 for stmt in session.statements] == [10, 10, 5]
+    assert session.commits == 1
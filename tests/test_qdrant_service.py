@@ -0,0 +1,183 @@
+"""
+Tests for the Qdrant search service (with an in-memory fake of AsyncQdrantClient)
+"""
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.resilience import CircuitBreaker
+from app.services.recommendations.qdrant_service import QdrantService
+
+
+class FakeAsyncQdrantClient:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.closed = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def search(self, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("qdrant unavailable")
+        return [
+            SimpleNamespace(
+                score=0.91,
+                payload={
+                    "hh_id": 123,
+                    "title": "Python-разработчик",
+                    "company": "ACME",
+                    "url": "https://hh.ru/vacancy/123",
+                    "raw_category": "Бэкенд-разработчик",
+                },
+                vector={"tasks": [0.6, 0.8]} if kwargs.get("with_vectors") else None,
+            )
+        ]
+
+    async def search_batch(self, collection_name, requests):
+        self.calls.append({"batch": requests})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if self.fail:
+            raise ConnectionError("qdrant unavailable")
+        return [
+            [
+                SimpleNamespace(
+                    score=request.vector.vector[0],
+                    payload={"hh_id": i, "raw_category": request.filter.must[0].match.any[0]},
+                    vector=None,
+                )
+                for i in range(request.limit)
+            ]
+            for request in requests
+        ]
+
+    async def close(self):
+        self.closed = True
+
+
+def make_service(client, breaker=None):
+    return QdrantService(
+        url="http://qdrant:6333",
+        collection_name="vacancies_tasks",
+        client=client,
+        breaker=breaker or CircuitBreaker("qdrant-test"),
+    )
+
+
+def test_search_maps_results_to_recommendations():
+    service = make_service(FakeAsyncQdrantClient())
+
+    recommendations = asyncio.run(
+        service.search_similar_vacancies(np.ones(4, dtype=np.float32), "Бэкенд-разработчик")
+    )
+
+    assert [(r.hh_id, r.title, r.company, r.category) for r in recommendations] == [
+        ("123", "Python-разработчик", "ACME", "Бэкенд-разработчик")
+    ]
+    assert recommendations[0].score == 0.91
+
+
+def test_search_requests_only_needed_payload_fields():
+    client = FakeAsyncQdrantClient()
+    service = make_service(client)
+
+    asyncio.run(service.search_similar_vacancies(np.ones(4, dtype=np.float32), "Data Scientist"))
+
+    assert client.calls[0]["with_payload"] == ["hh_id", "title", "company", "url", "raw_category", "experience"]
+    assert client.calls[0]["with_vectors"] is False
+
+
+def test_search_filters_categories_with_single_match_any():
+    client = FakeAsyncQdrantClient()
+    service = make_service(client)
+
+    asyncio.run(service.search_similar_vacancies(np.ones(4, dtype=np.float32), "Фулстек-разработчик"))
+
+    query_filter = client.calls[0]["query_filter"]
+    assert query_filter.should is None
+    [condition] = query_filter.must
+    assert condition.key == "raw_category"
+    assert condition.match.any == ["Бэкенд-разработчик", "Фронтенд-разработчик", "Фулстек-разработчик"]
+
+
+def test_search_can_return_vectors_for_reranking():
+    client = FakeAsyncQdrantClient()
+    service = make_service(client)
+
+    recommendations = asyncio.run(
+        service.search_similar_vacancies(np.ones(4, dtype=np.float32), "Data Scientist", with_vectors=True)
+    )
+
+    assert client.calls[0]["with_vectors"] == ["tasks"]
+    assert recommendations[0].vector.dtype == np.float32
+    assert recommendations[0].vector.tolist() == pytest.approx([0.6, 0.8])
+
+
+def test_concurrent_searches_do_not_block_event_loop():
+    service = make_service(FakeAsyncQdrantClient(delay=0.05))
+    embedding = np.ones(4, dtype=np.float32)
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(service.search_similar_vacancies(embedding, "Data Scientist") for _ in range(20)))
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(run()) < 0.5
+
+
+def test_failures_open_breaker_and_skip_qdrant():
+    client = FakeAsyncQdrantClient(fail=True)
+    service = make_service(client, CircuitBreaker("qdrant-test", failure_threshold=2, recovery_timeout=60))
+    embedding = np.ones(4, dtype=np.float32)
+
+    for _ in range(3):
+        assert asyncio.run(service.search_similar_vacancies(embedding, "Data Scientist")) == []
+
+    assert len(client.calls) == 2
+
+
+def test_close_releases_client():
+    client = FakeAsyncQdrantClient()
+    asyncio.run(make_service(client).close())
+    assert client.closed
+
+
+def test_search_batch_keeps_input_order_across_chunks():
+    client = FakeAsyncQdrantClient(delay=0.01)
+    service = make_service(client)
+    specializations = ["Data Scientist", "DevOps-инженер", "Бэкенд-разработчик"]
+    queries = [(np.full(4, float(i), dtype=np.float32), specializations[i % 3], 1 + i % 2) for i in range(10)]
+
+    results = asyncio.run(service.search_batch(queries, chunk_size=3, concurrency=2))
+
+    assert [found[0].score for found in results] == [float(i) for i in range(10)]
+    assert [found[0].category for found in results] == [specializations[i % 3] for i in range(10)]
+    assert [len(found) for found in results] == [1 + i % 2 for i in range(10)]
+    assert [len(call["batch"]) for call in client.calls] == [3, 3, 3, 1]
+    assert client.max_in_flight == 2
+
+
+def test_search_batch_returns_empty_lists_for_failed_chunks():
+    service = make_service(FakeAsyncQdrantClient(fail=True))
+    queries = [(np.ones(4, dtype=np.float32), "Data Scientist", 5)] * 3
+
+    assert asyncio.run(service.search_batch(queries, chunk_size=2)) == [[], [], []]
+
+
+def test_search_passes_configured_hnsw_ef(monkeypatch):
+    monkeypatch.setattr("app.core.settings.settings.qdrant_hnsw_ef", 128)
+    client = FakeAsyncQdrantClient()
+
+    asyncio.run(make_service(client).search_similar_vacancies(np.ones(4, dtype=np.float32), "Data Scientist"))
+
+    params = client.calls[0]["search_params"]
+    assert params.hnsw_ef == 128
+    assert params.exact is False
@@ -0,0 +1,85 @@
+"""
+Tests for snapshot export/deploy (scripts/qdrant_snapshot.py): the local in-memory client plays the
+Qdrant server, and httpx.MockTransport serves the snapshot download/upload endpoints
+"""
+import json
+
+import httpx
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, SnapshotDescription, VectorParams
+
+from scripts.load_to_qdrant import get_alias_target, swap_alias
+from scripts.qdrant_snapshot import deploy_snapshot, export_snapshot, manifest_path
+
+ALIAS = "vacancies_test"
+SNAPSHOT_BYTES = b"qdrant-snapshot" * 1000
+
+
+def fill_collection(client, name, version, count=5):
+    client.create_collection(name, vectors_config={"tasks": VectorParams(size=3, distance=Distance.COSINE)})
+    vectors = np.random.default_rng(0).normal(size=(count, 3))
+    client.upsert(name, [
+        PointStruct(id=i, vector={"tasks": vectors[i].tolist()}, payload={"collection_version": version})
+        for i in range(count)
+    ])
+
+
+def make_http(client, uploads):
+    def handler(request):
+        if request.method == "GET":
+            return httpx.Response(200, content=SNAPSHOT_BYTES)
+        # Загрузка снапшота: "сервер" создает коллекцию из него
+        collection_name = request.url.path.split("/")[2]
+        uploads.append((collection_name, dict(request.url.params)))
+        fill_collection(client, collection_name, collection_name.rsplit("_v", 1)[-1])
+        return httpx.Response(200, json={"result": True})
+
+    return httpx.Client(base_url="http://qdrant", transport=httpx.MockTransport(handler))
+
+
+def exported_snapshot(tmp_path):
+    client = QdrantClient(":memory:")
+    fill_collection(client, f"{ALIAS}_v20250101000000", "20250101000000")
+    swap_alias(client, ALIAS, f"{ALIAS}_v20250101000000")
+    client.create_snapshot = lambda name, wait=True: SnapshotDescription(name="s1", size=len(SNAPSHOT_BYTES))
+    client.delete_snapshot = lambda name, snapshot_name, wait=True: True
+    return export_snapshot(client, make_http(client, []), ALIAS, str(tmp_path))
+
+
+def test_export_writes_snapshot_and_manifest(tmp_path):
+    path = exported_snapshot(tmp_path)
+
+    manifest = json.loads(manifest_path(path).read_text())
+    assert path.name == f"{ALIAS}_v20250101000000.snapshot"
+    assert path.read_bytes() == SNAPSHOT_BYTES
+    assert manifest["version"] == "20250101000000" and manifest["points_count"] == 5
+
+
+def test_deploy_restores_into_new_version_and_swaps_alias(tmp_path):
+    path = exported_snapshot(tmp_path)
+    client = QdrantClient(":memory:")
+    fill_collection(client, f"{ALIAS}_v20240101000000", "20240101000000")
+    swap_alias(client, ALIAS, f"{ALIAS}_v20240101000000")
+    uploads = []
+
+    target = deploy_snapshot(client, make_http(client, uploads), str(path), ALIAS, keep=2)
+
+    assert target == f"{ALIAS}_v20250101000000"
+    assert get_alias_target(client, ALIAS) == target
+    assert uploads[0][1]["priority"] == "snapshot"
+    assert uploads[0][1]["checksum"] == json.loads(manifest_path(path).read_text())["sha256"]
+    assert client.collection_exists(f"{ALIAS}_v20240101000000")
+
+
+def test_deploy_rejects_corrupted_file_before_upload(tmp_path):
+    path = exported_snapshot(tmp_path)
+    path.write_bytes(SNAPSHOT_BYTES[:-1])
+    client = QdrantClient(":memory:")
+    uploads = []
+
+    with pytest.raises(ValueError):
+        deploy_snapshot(client, make_http(client, uploads), str(path), ALIAS)
+
+    assert uploads == [] and get_alias_target(client, ALIAS) is None
@@ -0,0 +1,101 @@
+"""
+Tests for the incremental sync mode of scripts/load_to_qdrant.py, on the local in-memory client
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from app.core.resilience import CircuitBreaker
+from app.services.recommendations.vector_backends import VERSION_MARKER_ID, QdrantSearchBackend
+from scripts.load_to_qdrant import content_hash, read_collection_version, sync_to_qdrant
+
+
+def make_collection():
+    client = QdrantClient(":memory:")
+    client.create_collection("vacancies", vectors_config={"tasks": VectorParams(size=3, distance=Distance.COSINE)})
+    return client
+
+
+def make_frame(titles):
+    return pd.DataFrame({
+        "hh_id": list(titles),
+        "title": list(titles.values()),
+        "category": ["Бэкенд-разработчик"] * len(titles),
+    })
+
+
+def sync(client, df, embeddings, version, state_file=None):
+    return asyncio.run(sync_to_qdrant(client, "vacancies", df, embeddings, version, batch_size=2, state_file=state_file))
+
+
+def point_versions(client):
+    return {point.payload.get("collection_version") for point in client.scroll("vacancies", limit=10)[0]}
+
+
+def test_repeated_sync_is_a_no_op():
+    client = make_collection()
+    df = make_frame({"1": "Python", "2": "Go", "3": "Java"})
+    embeddings = np.eye(3, dtype=np.float32)
+
+    assert sync(client, df, embeddings, "v1")["new"] == 3
+    summary = sync(client, df, embeddings, "v2")
+
+    assert summary == {"new": 0, "changed": 0, "unchanged": 3, "deleted": 0, "skipped": 0}
+    assert read_collection_version(client, "vacancies") == "v1"
+
+
+def test_sync_upserts_changes_deletes_vanished_and_bumps_version():
+    client = make_collection()
+    embeddings = np.eye(3, dtype=np.float32)
+    sync(client, make_frame({"1": "Python", "2": "Go", "3": "Java"}), embeddings, "v1")
+
+    summary = sync(client, make_frame({"1": "Python", "2": "Golang", "4": "Rust"}), embeddings, "v2")
+
+    assert summary == {"new": 1, "changed": 1, "unchanged": 1, "deleted": 1, "skipped": 0}
+    points = {point.payload.get("hh_id"): point.payload for point in client.scroll("vacancies", limit=10)[0]}
+    assert sorted(points, key=str) == ["1", "2", "4", None]
+    assert points["2"]["title"] == "Golang"
+    # Версия - только в маркере, остальные точки не переписываются
+    assert read_collection_version(client, "vacancies") == "v2"
+    assert point_versions(client) == {None, "v2"}
+
+
+def test_sync_with_state_file_does_not_scan_collection(tmp_path):
+    client = make_collection()
+    state_file = str(tmp_path / "sync_state.json")
+    embeddings = np.eye(3, dtype=np.float32)
+    sync(client, make_frame({"1": "Python", "2": "Go", "3": "Java"}), embeddings, "v1", state_file)
+
+    def no_scroll(*args, **kwargs):
+        raise AssertionError("scroll of the whole collection")
+
+    client.scroll = no_scroll
+    summary = sync(client, make_frame({"1": "Python", "2": "Golang"}), embeddings[:2], "v2", state_file)
+
+    assert summary == {"new": 0, "changed": 1, "unchanged": 1, "deleted": 1, "skipped": 0}
+    assert read_collection_version(client, "vacancies") == "v2"
+
+
+def test_search_backend_reads_version_from_marker():
+    async def scenario():
+        client = AsyncQdrantClient(":memory:")
+        await client.create_collection("vacancies", vectors_config={"tasks": VectorParams(size=3, distance=Distance.COSINE)})
+        backend = QdrantSearchBackend(client, "vacancies", CircuitBreaker("qdrant-test"))
+        before = await backend.current_version()
+        await client.upsert("vacancies", [
+            PointStruct(id=VERSION_MARKER_ID, vector={}, payload={"collection_version": "v7"})
+        ])
+        return before, await backend.current_version()
+
+    assert asyncio.run(scenario()) == ("", "v7")
+
+
+def test_content_hash_depends_on_vector_but_not_on_service_fields():
+    payload = {"hh_id": "1", "title": "Python"}
+    vector = np.array([0.1, 0.2], dtype=np.float32)
+
+    assert content_hash(payload, vector) == content_hash({**payload, "collection_version": "v9"}, vector)
+    assert content_hash(payload, vector) != content_hash(payload, vector + 0.01)
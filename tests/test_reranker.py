@@ -0,0 +1,69 @@
+"""
+Tests for the MMR rerank stage
+"""
+import numpy as np
+
+from app.services.recommendations.reranker import experience_level, rerank_recommendations
+from app.services.recommendations.vector_backends import VacancyRecommendation
+
+
+def make_candidate(hh_id, score, vector, company="ACME", experience=None):
+    vector = np.asarray(vector, dtype=np.float32)
+    return VacancyRecommendation(
+        hh_id=hh_id, title=f"Вакансия {hh_id}", company=company, score=score,
+        experience=experience, vector=vector / np.linalg.norm(vector),
+    )
+
+
+def test_near_duplicates_give_way_to_diverse_candidate():
+    candidates = [
+        make_candidate("1", 0.95, [1, 0, 0], company="A"),
+        make_candidate("2", 0.94, [1, 0.01, 0], company="B"),
+        make_candidate("3", 0.80, [0, 1, 0], company="C"),
+    ]
+
+    picked = rerank_recommendations(candidates, limit=2, mmr_lambda=0.5, company_penalty=0)
+
+    assert [c.hh_id for c in picked] == ["1", "3"]
+
+
+def test_pure_relevance_keeps_search_order():
+    candidates = [make_candidate(str(i), 1 - i / 10, [1, i, 0], company=str(i)) for i in range(5)]
+
+    picked = rerank_recommendations(candidates, limit=3, mmr_lambda=1.0, company_penalty=0)
+
+    assert [c.hh_id for c in picked] == ["0", "1", "2"]
+
+
+def test_same_company_is_penalized():
+    candidates = [
+        make_candidate("1", 0.90, [1, 0, 0], company="ACME"),
+        make_candidate("2", 0.89, [0, 1, 0], company="ACME"),
+        make_candidate("3", 0.85, [0, 0, 1], company="Other"),
+    ]
+
+    picked = rerank_recommendations(candidates, limit=2, mmr_lambda=1.0, company_penalty=0.1)
+
+    assert [c.hh_id for c in picked] == ["1", "3"]
+
+
+def test_level_mismatch_lowers_relevance():
+    candidates = [
+        make_candidate("senior", 0.90, [1, 0, 0], company="A", experience="Более 6 лет"),
+        make_candidate("junior", 0.88, [0, 1, 0], company="B", experience="Нет опыта"),
+    ]
+
+    picked = rerank_recommendations(candidates, limit=1, user_level=experience_level("0"),
+                                    mmr_lambda=1.0, level_weight=0.05)
+
+    assert picked[0].hh_id == "junior"
+
+
+def test_candidates_without_vectors_are_truncated():
+    candidates = [VacancyRecommendation(hh_id=str(i), title="", company="", score=1.0) for i in range(5)]
+
+    assert len(rerank_recommendations(candidates, limit=2)) == 2
+
+
+def test_experience_level_parsing():
+    assert [experience_level(v) for v in ("0", 2, "4,5", 10, "не помню", None)] == [0, 1, 2, 3, None, None]
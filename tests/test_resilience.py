@@ -0,0 +1,191 @@
+"""
+Tests for circuit breakers and deadline budgets around external AI calls
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded
+from app.services.recommendations.embedding_client import EmbeddingClient
+from app.services.recommendations.embedding_dispatcher import EmbeddingDispatcher
+from app.services.recommendations.recommendation_service import RecommendationService
+from tests.test_embedding_client import FakeModel, FakeSDK
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def failing():
+    raise RuntimeError("upstream down")
+
+
+async def succeeding():
+    return "ok"
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=10, clock=clock)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(breaker.call(failing))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breaker.call(succeeding))
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()  # проба занята
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert asyncio.run(breaker.call(succeeding)) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_stops_client_retries():
+    model = FakeModel(delay=0)
+    model.failures_left = 100
+    breaker = CircuitBreaker("embeddings-test", failure_threshold=2, recovery_timeout=60)
+    client = EmbeddingClient(FakeSDK(model), max_attempts=5, max_backoff=0.01, breaker=breaker)
+
+    async def run():
+        with pytest.raises(CircuitOpenError):
+            await client.embed(["text"])
+
+    asyncio.run(run())
+
+    assert model.failures_left == 98  # два реальных вызова, дальше предохранитель
+
+
+def test_deadline_cancels_slow_step():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def run():
+        deadline = Deadline(0.05)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(slow())
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(slow())
+
+    asyncio.run(run())
+
+
+class SessionRepo:
+    async def get_session(self, session_id):
+        return SimpleNamespace(collected_data={
+            "target_area": "Бэкенд-разработчик",
+            "preferred_activities": "Разработка API",
+        })
+
+
+class SlowEmbeddings:
+    async def create_embedding(self, text):
+        await asyncio.sleep(1)
+        return np.ones(4, dtype=np.float32)
+
+
+class FastEmbeddings:
+    async def create_embedding(self, text):
+        return np.ones(4, dtype=np.float32)
+
+
+class FakeQdrant:
+    async def search_similar_vacancies(self, embedding, target_specialization, limit=5, with_vectors=False):
+        return [SimpleNamespace(hh_id="1", title="Python", company="ACME", score=0.9)]
+
+
+class RecordingConsultation:
+    def __init__(self):
+        self.timeouts = []
+
+    async def get_career_consultation(self, user_data, vacancies, timeout=None):
+        self.timeouts.append(timeout)
+        return "запасная консультация" if timeout <= 0 else "консультация"
+
+
+def test_recommendations_respect_shared_deadline():
+    consultation = RecordingConsultation()
+    service = RecommendationService(
+        SessionRepo(),
+        embeddings_service=SlowEmbeddings(),
+        qdrant_service=FakeQdrant(),
+        career_consultation_service=consultation,
+    )
+
+    result = asyncio.run(service.get_career_consultation_and_recommendations(uuid4(), Deadline(0.05)))
+
+    assert result.vacancy_recommendations == []
+    assert result.career_consultation == "запасная консультация"
+    assert consultation.timeouts == [0.0]
+
+
+class FailingEmbeddings:
+    async def create_embedding(self, text):
+        return None
+
+
+def test_embedding_failure_returns_consultation_without_vacancies():
+    consultation = RecordingConsultation()
+    service = RecommendationService(
+        SessionRepo(),
+        embeddings_service=FailingEmbeddings(),
+        qdrant_service=FakeQdrant(),
+        career_consultation_service=consultation,
+    )
+
+    result = asyncio.run(service.get_career_consultation_and_recommendations(uuid4(), Deadline(5)))
+
+    assert result.vacancy_recommendations == []
+    assert result.career_consultation == "консультация"
+
+
+def test_deadline_cancels_abandoned_embedding_batch():
+    cancelled = []
+
+    async def slow_batch(texts):
+        try:
+            await asyncio.sleep(10)  # ретраи клиента с бэкоффом
+        except asyncio.CancelledError:
+            cancelled.append(texts)
+            raise
+
+    dispatcher = EmbeddingDispatcher(slow_batch, max_delay=0.001)
+
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            await Deadline(0.05).run(dispatcher.embed("Разработка API"))
+        await asyncio.sleep(0.01)
+        return dict(dispatcher._inflight), dict(dispatcher._tasks)
+
+    inflight, tasks = asyncio.run(run())
+    assert cancelled == [["Разработка API"]]
+    assert inflight == {} and tasks == {}
+
+
+def test_consultation_gets_remaining_budget():
+    consultation = RecordingConsultation()
+    service = RecommendationService(
+        SessionRepo(),
+        embeddings_service=FastEmbeddings(),
+        qdrant_service=FakeQdrant(),
+        career_consultation_service=consultation,
+    )
+
+    result = asyncio.run(service.get_career_consultation_and_recommendations(uuid4(), Deadline(5)))
+
+    assert result.career_consultation == "консультация"
+    assert 0 < consultation.timeouts[0] <= 5
@@ -0,0 +1,126 @@
+"""
+Tests for the vector search result cache
+"""
+import asyncio
+
+import numpy as np
+
+from app.core.metrics import metrics
+from app.core.resilience import CircuitBreaker
+from app.services.recommendations.qdrant_service import QdrantService
+from app.services.recommendations.search_cache import SearchResultCache
+from app.services.recommendations.vector_backends import VectorSearchBackend, recommendation_from_payload
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingBackend(VectorSearchBackend):
+    def __init__(self, version="v1"):
+        self.version = version
+        self.calls = 0
+
+    async def search(self, embedding, categories, limit, with_vectors=False):
+        self.calls += 1
+        return [recommendation_from_payload({"hh_id": "1", "raw_category": categories[0]}, 0.9)]
+
+    async def current_version(self):
+        return self.version
+
+
+def make_service(backend, cache):
+    return QdrantService(
+        client=object(),
+        breaker=CircuitBreaker("qdrant-test"),
+        backend=backend,
+        search_cache=cache,
+    )
+
+
+def test_key_ignores_rounding_noise_and_category_order():
+    cache = SearchResultCache(decimals=3)
+    embedding = np.array([0.1, -0.2, 0.3], dtype=np.float32)
+
+    key = cache.make_key(embedding, ["a", "b"], 5)
+
+    assert cache.make_key(embedding + 1e-5, ["b", "a"], 5) == key
+    assert cache.make_key(embedding, ["a"], 5) != key
+    assert cache.make_key(embedding, ["a", "b"], 10) != key
+    assert cache.make_key(embedding, ["a", "b"], 5, with_vectors=True) != key
+
+
+def test_entries_expire_and_lru_is_bounded():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl_seconds=10, max_items=2, clock=clock)
+    cache.put("a", [])
+    cache.put("b", [])
+    assert cache.get("a") == []  # a - самый свежий
+    cache.put("c", [])
+
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+
+def test_version_change_clears_cache():
+    cache = SearchResultCache()
+    cache.set_version("v1")
+    cache.put("a", [])
+
+    assert cache.set_version("v1") is False
+    assert cache.set_version("v2") is True
+    assert cache.get("a") is None
+
+
+def test_service_serves_repeated_queries_from_cache_until_version_changes(monkeypatch):
+    monkeypatch.setattr("app.core.settings.settings.search_cache_version_check_seconds", 0)
+    backend = CountingBackend()
+    service = make_service(backend, SearchResultCache())
+    embedding = np.ones(4, dtype=np.float32)
+    hits_before = metrics.get("search_cache_hits_total")
+
+    async def run():
+        for _ in range(3):
+            found = await service.search_similar_vacancies(embedding, "Data Scientist")
+            assert found[0].category == "Data Scientist"
+        backend.version = "v2"
+        await service.search_similar_vacancies(embedding, "Data Scientist")
+
+    asyncio.run(run())
+
+    assert backend.calls == 2
+    assert metrics.get("search_cache_hits_total") - hits_before == 2
+
+
+def test_cached_results_are_isolated_from_callers():
+    cache = SearchResultCache()
+    original = recommendation_from_payload({"hh_id": "1"}, 0.9, vector=np.ones(3, dtype=np.float32))
+    cache.put("k", [original])
+    original.score = 0.1
+
+    first = cache.get("k")
+    first[0].score = 0.5
+    first[0].vector[0] = 0.0
+    second = cache.get("k")
+
+    assert second[0] is not first[0]
+    assert second[0].score == 0.9
+    assert second[0].vector.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_service_without_cache_always_searches(monkeypatch):
+    monkeypatch.setattr("app.core.settings.settings.search_cache_enabled", False)
+    backend = CountingBackend()
+    service = make_service(backend, None)
+
+    for _ in range(2):
+        asyncio.run(service.search_similar_vacancies(np.ones(4, dtype=np.float32), "Data Scientist"))
+
+    assert backend.calls == 2
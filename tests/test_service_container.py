@@ -0,0 +1,83 @@
+"""
+Tests for the application-lifetime service container
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import FastAPI
+
+from app import main as main_module
+from app.api.v1.routes import chat as chat_module
+from app.api.v1.routes.chat import WebSocketHandler
+from app.core.settings import settings
+from app.services.container import ServiceContainer, get_service_container
+from tests.test_enhanced_protocol import MockWebSocket
+
+
+class FakeContainer:
+    def __init__(self):
+        self.embeddings_service = object()
+        self.qdrant_service = object()
+        self.career_consultation_service = object()
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_lifespan_creates_services_once_and_closes_them(monkeypatch):
+    created = []
+
+    def create():
+        created.append(FakeContainer())
+        return created[-1]
+
+    monkeypatch.setattr(settings, "enable_vacancy_recommendations", True)
+    monkeypatch.setattr(ServiceContainer, "create", staticmethod(create))
+    app = FastAPI()
+
+    async def run():
+        async with main_module.lifespan(app):
+            connection = SimpleNamespace(app=app)
+            assert get_service_container(connection) is created[0]
+            assert get_service_container(connection) is created[0]
+
+    asyncio.run(run())
+
+    assert len(created) == 1
+    assert created[0].closed
+
+
+def test_lifespan_without_recommendations_has_no_services(monkeypatch):
+    monkeypatch.setattr(settings, "enable_vacancy_recommendations", False)
+    app = FastAPI()
+
+    async def run():
+        async with main_module.lifespan(app):
+            assert get_service_container(SimpleNamespace(app=app)) is None
+
+    asyncio.run(run())
+
+
+def test_recommendations_use_injected_services(monkeypatch):
+    captured = {}
+
+    class StubRecommendationService:
+        def __init__(self, repo, **services):
+            captured.update(services)
+
+        async def get_career_consultation_and_recommendations(self, session_id):
+            return None
+
+    monkeypatch.setattr(chat_module, "RecommendationService", StubRecommendationService)
+    container = FakeContainer()
+    ws = MockWebSocket()
+    handler = WebSocketHandler(ws, repo=None, services=container)
+
+    asyncio.run(handler._send_vacancy_recommendations(uuid4()))
+
+    assert captured["embeddings_service"] is container.embeddings_service
+    assert captured["qdrant_service"] is container.qdrant_service
+    assert captured["career_consultation_service"] is container.career_consultation_service
+    assert ws.sent_messages[-1]["event"] == "recommendations_error"
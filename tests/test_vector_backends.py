@@ -0,0 +1,100 @@
+"""
+Tests for the in-process NumPy vector search backend
+"""
+import asyncio
+
+import numpy as np
+
+from app.core.resilience import CircuitBreaker
+from app.services.recommendations.qdrant_service import QdrantService
+from app.services.recommendations.vector_backends import NumpySearchBackend, write_vector_index
+
+CATEGORIES = ["Бэкенд-разработчик", "Фронтенд-разработчик", "Data Scientist"]
+
+
+def make_corpus(count: int = 300, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    payloads = [
+        {"hh_id": str(i), "title": f"Вакансия {i}", "company": "ACME", "raw_category": CATEGORIES[i % len(CATEGORIES)]}
+        for i in range(count)
+    ]
+    return vectors, payloads
+
+
+def brute_force(vectors, payloads, query, categories, limit):
+    rows = [i for i, p in enumerate(payloads) if p["raw_category"] in categories]
+    scores = vectors[rows] @ query
+    return [payloads[rows[i]]["hh_id"] for i in np.argsort(-scores)[:limit]]
+
+
+def test_exact_search_matches_brute_force_with_interleaved_categories():
+    # Категории чередуются - партиции хранятся как массивы индексов, а не срезы
+    vectors, payloads = make_corpus()
+    backend = NumpySearchBackend(vectors, payloads)
+    query = vectors[6]
+
+    found = backend.search_sync(query, ["Бэкенд-разработчик", "Data Scientist"], limit=10)
+
+    assert [r.hh_id for r in found] == brute_force(vectors, payloads, query, {"Бэкенд-разработчик", "Data Scientist"}, 10)
+    assert found[0].hh_id == "6"
+    assert all(r.category in {"Бэкенд-разработчик", "Data Scientist"} for r in found)
+    assert [r.score for r in found] == sorted((r.score for r in found), reverse=True)
+
+
+def test_search_without_categories_and_unknown_category():
+    vectors, payloads = make_corpus()
+    backend = NumpySearchBackend(vectors, payloads)
+
+    assert [r.hh_id for r in backend.search_sync(vectors[3], None, limit=3)][0] == "3"
+    assert backend.search_sync(vectors[3], ["Нет такой категории"], limit=3) == []
+
+
+def test_written_index_is_sorted_by_category_and_memory_mapped(tmp_path):
+    vectors, payloads = make_corpus()
+    write_vector_index(str(tmp_path), vectors * 3.0, payloads, version="v1")
+
+    backend = NumpySearchBackend.load(str(tmp_path))
+
+    assert isinstance(backend.vectors, np.memmap)
+    assert backend.version == "v1"
+    assert all(isinstance(part, slice) for part in backend._partitions.values())
+    found = asyncio.run(backend.search(vectors[10], ["Фронтенд-разработчик"], 5, with_vectors=True))
+    assert [r.hh_id for r in found] == brute_force(vectors, payloads, vectors[10], {"Фронтенд-разработчик"}, 5)
+    assert np.allclose(found[0].vector, vectors[10], atol=1e-6)
+
+
+def test_ivf_probing_all_lists_equals_exact_search(tmp_path):
+    vectors, payloads = make_corpus()
+    write_vector_index(str(tmp_path), vectors, payloads, version="v1", ivf_lists=8)
+    exact = NumpySearchBackend.load(str(tmp_path))
+    full_probe = NumpySearchBackend.load(str(tmp_path), nprobe=8)
+    partial_probe = NumpySearchBackend.load(str(tmp_path), nprobe=2)
+
+    for query in vectors[:20]:
+        expected = [r.hh_id for r in exact.search_sync(query, ["Бэкенд-разработчик"], 5)]
+        assert [r.hh_id for r in full_probe.search_sync(query, ["Бэкенд-разработчик"], 5)] == expected
+        assert len(partial_probe.search_sync(query, ["Бэкенд-разработчик"], 5)) <= 5
+
+
+def test_qdrant_service_delegates_search_to_injected_backend():
+    vectors, payloads = make_corpus()
+
+    class UnusedClient:
+        async def search(self, **kwargs):
+            raise AssertionError("поиск не должен идти в Qdrant")
+
+        async def close(self):
+            pass
+
+    service = QdrantService(
+        client=UnusedClient(),
+        breaker=CircuitBreaker("qdrant-test"),
+        backend=NumpySearchBackend(vectors, payloads),
+    )
+
+    found = asyncio.run(service.search_similar_vacancies(vectors[0], "Бэкенд-разработчик", limit=3))
+
+    assert [r.hh_id for r in found] == brute_force(vectors, payloads, vectors[0], {"Бэкенд-разработчик"}, 3)
+    asyncio.run(service.close())
@@ -1,15 +1,34 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import AuthPage from '../pages/AuthPage.jsx';
 import ChatPage from '../pages/ChatPage.jsx';
+import { refresh, clearTokens, hasRefreshToken, accessTokenExpiresAt } from '../services/auth.js';
+
+// Обновляем access-токен заранее, чтобы новое подключение не получило отказ
+const REFRESH_AHEAD_MS = 60 * 1000;
 
 function App() {
   const [token, setToken] = useState(null);
 
   useEffect(() => {
     const stored = localStorage.getItem('token');
-    if (stored) {
-      setToken(stored);
-    }
+    // Access-токен живёт 30 минут: сначала пробуем обновить его через refresh-токен
+    refresh().then((fresh) => {
+      if (fresh) {
+        localStorage.setItem('token', fresh);
+        setToken(fresh);
+      } else if (stored) {
+        setToken(stored);
+      }
+    });
+  }, []);
+
+  useEffect(() => {
+    // Токен, обновленный или сброшенный в другой вкладке, применяется и здесь
+    const onStorage = (event) => {
+      if (event.key === 'token') setToken(event.newValue);
+    };
+    window.addEventListener('storage', onStorage);
+    return () => window.removeEventListener('storage', onStorage);
   }, []);
 
   const handleAuth = (t) => {
@@ -17,16 +36,36 @@ function App() {
     setToken(t);
   };
 
-  const handleLogout = () => {
+  const handleLogout = useCallback(() => {
     localStorage.removeItem('token');
+    clearTokens();
     setToken(null);
-  };
+  }, []);
+
+  // Новый access-токен или null; без действующего refresh-токена - выход
+  const renewToken = useCallback(async () => {
+    const fresh = await refresh();
+    if (fresh) {
+      localStorage.setItem('token', fresh);
+      setToken(fresh);
+    } else if (!hasRefreshToken()) {
+      handleLogout();
+    }
+    return fresh;
+  }, [handleLogout]);
+
+  useEffect(() => {
+    const expiresAt = token && accessTokenExpiresAt(token);
+    if (!expiresAt) return undefined;
+    const timer = setTimeout(renewToken, Math.max(expiresAt - Date.now() - REFRESH_AHEAD_MS, 0));
+    return () => clearTimeout(timer);
+  }, [token, renewToken]);
 
   if (!token) {
     return <AuthPage onAuth={handleAuth} />;
   }
 
-  return <ChatPage token={token} onLogout={handleLogout} />;
+  return <ChatPage token={token} onLogout={handleLogout} onTokenExpired={renewToken} />;
 }
 
 export default App;
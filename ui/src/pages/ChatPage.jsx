@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import QuestionInput from '../components/QuestionInput.jsx';
 
-function ChatPage({ token, onLogout }) {
+function ChatPage({ token, onLogout, onTokenExpired }) {
   const [messages, setMessages] = useState([]);
   const [currentInput, setCurrentInput] = useState('');
   const [isConnected, setIsConnected] = useState(false);
@@ -12,6 +12,10 @@ function ChatPage({ token, onLogout }) {
   const [validationError, setValidationError] = useState(null);
   const wsRef = useRef(null);
   const messagesEndRef = useRef(null);
+  // Токен нужен только при подключении: плановое обновление не рвет открытое соединение
+  const tokenRef = useRef(token);
+  const authRetriedRef = useRef(false);
+  tokenRef.current = token;
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -28,9 +32,9 @@ function ChatPage({ token, onLogout }) {
         wsRef.current.close();
       }
     };
-  }, [token]);
+  }, []);
 
-  const connectWebSocket = () => {
+  const connectWebSocket = (accessToken = tokenRef.current) => {
     try {
       // Определяем WebSocket URL в зависимости от окружения
       const isLocalhost = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1';
@@ -39,11 +43,11 @@ function ChatPage({ token, onLogout }) {
       let wsUrl;
       if (isDevelopment) {
         // Development режим - подключаемся напрямую к backend
-        wsUrl = `ws://127.0.0.1:8000/api/v1/chat/ws?token=${token}`;
+        wsUrl = `ws://127.0.0.1:8000/api/v1/chat/ws?token=${accessToken}`;
       } else {
         // Production режим - подключаемся через nginx proxy
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        wsUrl = `${protocol}//${window.location.host}/api/v1/chat/ws?token=${token}`;
+        wsUrl = `${protocol}//${window.location.host}/api/v1/chat/ws?token=${accessToken}`;
       }
       
       console.log('🔌 Connecting to WebSocket:', wsUrl);
@@ -56,6 +60,8 @@ function ChatPage({ token, onLogout }) {
       };
 
       ws.onmessage = (event) => {
+        // Сервер принимает соединение до проверки токена: токен годен, только когда пошли сообщения
+        authRetriedRef.current = false;
         try {
           const data = JSON.parse(event.data);
           console.log('📨 Received message:', data);
@@ -153,6 +159,19 @@ function ChatPage({ token, onLogout }) {
       ws.onclose = (event) => {
         console.log('❌ WebSocket closed:', event.code, event.reason);
         setIsConnected(false);
+        if (event.code === 1008 && !authRetriedRef.current) {
+          // Сервер отверг токен (истек) - обновляем его и переподключаемся один раз
+          authRetriedRef.current = true;
+          console.log('🔑 Token rejected, refreshing and reconnecting...');
+          onTokenExpired().then((fresh) => {
+            if (fresh) {
+              connectWebSocket(fresh);
+            } else {
+              setError('Не удалось обновить сессию');
+            }
+          });
+          return;
+        }
         if (event.code !== 1000) {
           console.error('Unexpected WebSocket close code:', event.code);
           setError('Соединение с сервером потеряно');
@@ -262,7 +281,7 @@ function ChatPage({ token, onLogout }) {
       {error && (
         <div className="error-message">
           {error}
-          <button onClick={connectWebSocket} className="retry-btn">
+          <button onClick={() => { authRetriedRef.current = false; connectWebSocket(); }} className="retry-btn">
             Переподключиться
           </button>
         </div>
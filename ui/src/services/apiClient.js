@@ -29,8 +29,9 @@ export async function post(path, data) {
       } catch (_) {
         // ignore
       }
-      const message = toFriendlyMessage(res.status, json);
-      throw new Error(message);
+      const error = new Error(toFriendlyMessage(res.status, json));
+      error.status = res.status;
+      throw error;
     }
 
     return res.json();
@@ -1,11 +1,89 @@
 import { post } from './apiClient.js';
 
+const REFRESH_TOKEN_KEY = 'refresh_token';
+const ACCESS_TOKEN_KEY = 'token';
+const REFRESH_LOCK = 'career-coach-refresh';
+
+// Refresh-токен одноразовый: повторное предъявление сервер считает кражей и отзывает всю семью.
+// Поэтому во вкладке один запрос "в полете" (StrictMode вызывает эффект дважды), а между
+// вкладками - лок Web Locks.
+let inflightRefresh = null;
+
+function storeTokens(data) {
+  if (data.refresh_token) {
+    localStorage.setItem(REFRESH_TOKEN_KEY, data.refresh_token);
+  }
+  return data.access_token;
+}
+
 export async function login(email, password) {
   const data = await post('/api/v1/auth/login', { login: email, password });
-  return data.access_token;
+  return storeTokens(data);
 }
 
 export async function register(email, password) {
   const data = await post('/api/v1/auth/register', { login: email, email, password });
-  return data.access_token;
+  return storeTokens(data);
+}
+
+async function refreshOnce() {
+  const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY);
+  if (!refreshToken) return null;
+  try {
+    const data = await post('/api/v1/auth/refresh', { refresh_token: refreshToken });
+    const accessToken = storeTokens(data);
+    localStorage.setItem(ACCESS_TOKEN_KEY, accessToken);
+    return accessToken;
+  } catch (e) {
+    // Если токен тем временем обновила другая вкладка (браузер без Web Locks) - берем ее результат
+    if (localStorage.getItem(REFRESH_TOKEN_KEY) !== refreshToken) {
+      return localStorage.getItem(ACCESS_TOKEN_KEY);
+    }
+    // Сетевая ошибка не повод разлогинивать: refresh-токен выбрасываем, только если его отверг сервер
+    if (e.status === 401) {
+      localStorage.removeItem(REFRESH_TOKEN_KEY);
+    }
+    return null;
+  }
+}
+
+function refreshAcrossTabs() {
+  const seen = localStorage.getItem(REFRESH_TOKEN_KEY);
+  const locks = globalThis.navigator?.locks;
+  if (!locks) return refreshOnce();
+  return locks.request(REFRESH_LOCK, () => {
+    // Пока ждали лок, соседняя вкладка уже обменяла токен - вторая ротация не нужна
+    const current = localStorage.getItem(REFRESH_TOKEN_KEY);
+    if (current && current !== seen) return localStorage.getItem(ACCESS_TOKEN_KEY);
+    return refreshOnce();
+  });
+}
+
+// Обменивает refresh-токен на новую пару токенов без повторного ввода пароля
+export function refresh() {
+  if (!inflightRefresh) {
+    inflightRefresh = refreshAcrossTabs().finally(() => {
+      inflightRefresh = null;
+    });
+  }
+  return inflightRefresh;
+}
+
+export function hasRefreshToken() {
+  return Boolean(localStorage.getItem(REFRESH_TOKEN_KEY));
+}
+
+// Момент истечения access-токена (мс) из поля exp JWT; null, если токен не разобрать
+export function accessTokenExpiresAt(token) {
+  try {
+    const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/');
+    const { exp } = JSON.parse(atob(payload));
+    return typeof exp === 'number' ? exp * 1000 : null;
+  } catch (_) {
+    return null;
+  }
+}
+
+export function clearTokens() {
+  localStorage.removeItem(REFRESH_TOKEN_KEY);
 }